@@ -0,0 +1,192 @@
+from RowCodec import RowCodec
+
+class Column:
+    """ Definition of a single table column parsed from the schema string (ex. "id:char(10):N:PRI"). """
+    def __init__(self, name, data_type, nullable, key, position):
+        self.name = name
+        self.data_type = data_type  # "int", "date" or "char(n)"
+        self.nullable = nullable    # "Y" or "N"
+        self.key = key              # "", "PRI", "FOR" or "PRI/FOR"
+        self.position = position    # Index of the column in the table definition
+
+    def is_nullable(self):
+        return self.nullable == "Y"
+
+    def char_length(self):
+        """ Returns the maximum length of a char(n) column, or None for other types. """
+        if self.data_type.startswith("char"):
+            return int(self.data_type[len("char("):-1])
+        return None
+
+class ForeignKey:
+    """ Foreign key constraint parsed from the schema string (ex. "id,age:person:id,age"). """
+    def __init__(self, columns, referenced_table, referenced_columns):
+        self.columns = columns                        # list of str
+        self.referenced_table = referenced_table      # str
+        self.referenced_columns = referenced_columns  # list of str
+
+class Index:
+    """ Secondary index on columns of a table, created by CREATE INDEX (stored as "table:col,..."). """
+    def __init__(self, name, table_name, columns):
+        self.name = name              # str
+        self.table_name = table_name  # str
+        self.columns = columns        # list of str (the index is sorted by the first column, then the next, ...)
+
+    @classmethod
+    def parse(cls, name, index_str):
+        table_name, columns = index_str.split(":")
+        return cls(name, table_name, columns.split(","))
+
+    def encode(self):
+        return f"{self.table_name}:{','.join(self.columns)}"
+
+class TableSchema:
+    """
+    Parsed schema of a table.
+
+    Schema strings are stored in the database as "col:type:nullable:key;...|PK:col,...|FK:cols:table:cols;..."
+    and are parsed once into this object.
+    """
+    def __init__(self, table_name, columns, primary_keys, foreign_keys):
+        self.table_name = table_name
+        self.columns = columns              # list of Column
+        self.primary_keys = primary_keys    # list of str
+        self.foreign_keys = foreign_keys    # list of ForeignKey
+        self.column_names = [column.name for column in columns]
+        self.column_map = {column.name: column for column in columns}
+        self.column_positions = {column.name: column.position for column in columns}
+        self.row_codec = RowCodec(self) # Binary encoding of the table rows
+
+    @classmethod
+    def parse(cls, table_name, schema_str):
+        """
+        Parses a schema string into a TableSchema.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - schema_str (str): The encoded schema string stored in the database.
+
+        Returns:
+        - TableSchema: The parsed schema.
+        """
+        columns_enc, pk_enc, fk_enc = schema_str.split("|")
+
+        columns = []
+        for position, column_def in enumerate(columns_enc.split(";")):
+            column_name, data_type, nullable, key = column_def.split(":")
+            columns.append(Column(column_name, data_type, nullable, key, position))
+
+        primary_keys = pk_enc[len("PK:"):].split(",")
+        if primary_keys == ['']:
+            primary_keys = []
+
+        foreign_keys = []
+        for fk in fk_enc[len("FK:"):].split(";"):
+            if fk.count(":") == 2:
+                fk_columns, referenced_table, referenced_columns = fk.split(":")
+                foreign_keys.append(ForeignKey(fk_columns.split(","), referenced_table, referenced_columns.split(",")))
+
+        return cls(table_name, columns, primary_keys, foreign_keys)
+
+    def has_column(self, column_name):
+        return column_name in self.column_map
+
+    def get_column(self, column_name):
+        """ Returns the Column with the given name, or None if the table has no such column. """
+        return self.column_map.get(column_name)
+
+    def get_column_data_type(self, column_name):
+        """ Returns the data type of the column (ie. int, char(#), date), or None if the column does not exist. """
+        column = self.column_map.get(column_name)
+        return column.data_type if column is not None else None
+
+class Catalog:
+    """
+    In-process cache of parsed table schemas.
+
+    Each schema is read from the database and parsed once. Entries are invalidated when a table is
+    created or dropped, so name resolution and validation do not touch storage.
+    """
+    def __init__(self, database):
+        self.database = database
+        self.schemas = {}        # key: table_name, value: TableSchema or None (table does not exist)
+        self.table_names = None  # Cached list of all table names
+        self.indexes = None      # Cached secondary indexes (key: index name, value: Index)
+        self.statistics = {}     # key: table_name, value: TableStatistics or None (no statistics stored)
+        self.version = 0         # Incremented on every schema change (state resolved against an older version is stale)
+
+    def get_table(self, table_name):
+        """
+        Returns the parsed schema of the table.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - TableSchema or None: The schema, or None if the table does not exist.
+        """
+        if table_name not in self.schemas:
+            schema_str = self.database.read_table_schema(table_name)
+            self.schemas[table_name] = TableSchema.parse(table_name, schema_str) if schema_str else None
+        return self.schemas[table_name]
+
+    def get_table_names(self):
+        """ Returns the names of all tables in the database. """
+        if self.table_names is None:
+            self.table_names = self.database.get_tables()
+        return list(self.table_names)
+
+    def get_referencing_foreign_keys(self, table_name):
+        """
+        Returns the foreign keys of other tables referencing the given table.
+
+        Returns:
+        - list of tuple: (referencing table name, ForeignKey) for each foreign key referencing the table.
+        """
+        referencing_foreign_keys = []
+        for referencing_table in self.get_table_names():
+            for foreign_key in self.get_table(referencing_table).foreign_keys:
+                if foreign_key.referenced_table == table_name:
+                    referencing_foreign_keys.append((referencing_table, foreign_key))
+        return referencing_foreign_keys
+
+    def get_all_indexes(self):
+        """ Returns all secondary indexes (key: index name, value: Index). """
+        if self.indexes is None:
+            self.indexes = {index_name: Index.parse(index_name, index_str) for index_name, index_str in self.database.get_index_definitions()}
+        return self.indexes
+
+    def get_index(self, index_name):
+        """ Returns the secondary index with the given name, or None if it does not exist. """
+        return self.get_all_indexes().get(index_name)
+
+    def get_indexes(self, table_name):
+        """ Returns the secondary indexes of the table. """
+        return [index for index in self.get_all_indexes().values() if index.table_name == table_name]
+
+    def get_statistics(self, table_name):
+        """ Returns the statistics of the table (see TableStatistics), or None if the table has none. """
+        if table_name not in self.statistics:
+            self.statistics[table_name] = self.database.read_table_statistics(table_name)
+        return self.statistics[table_name]
+
+    def invalidate(self, table_name):
+        """ Drops cached entries affected by creating or dropping the given table. """
+        self.schemas.pop(table_name, None)
+        self.statistics.pop(table_name, None)
+        self.table_names = None
+        self.indexes = None
+        self.version += 1
+
+    def invalidate_indexes(self):
+        """ Drops cached indexes (after CREATE INDEX or DROP INDEX). """
+        self.indexes = None
+        self.version += 1
+
+    def clear(self):
+        """ Drops all cached entries (ex. after a rollback, which may undo any schema change). """
+        self.schemas = {}
+        self.table_names = None
+        self.indexes = None
+        self.statistics = {}
+        self.version += 1
@@ -41,6 +41,47 @@ class Message:
     REFERENCE_TABLE_SELF_ERROR = "Create table has failed: foreign key cannot reference its own table"
     INSERT_TABLE_DUPLICATE_COLUMN_ERROR = "Insert has failed: column name is duplicated"
 
+    # Transactions
+    BEGIN_RESULT = "Transaction started"
+    COMMIT_RESULT = "Transaction committed"
+    ROLLBACK_RESULT = "Transaction rolled back"
+    TRANSACTION_IN_PROGRESS_ERROR = "Begin has failed: a transaction is already in progress"
+    NO_TRANSACTION_ERROR = "'{}' has failed: no transaction in progress"
+    STORAGE_ERROR = "Statement has failed: storage error ({})"
+
+    # Bulk loading
+    INSERT_ROWS_RESULT = "{} rows inserted"
+    LOAD_FILE_ERROR = "Load has failed: cannot read '{}'"
+    LOAD_DELIMITER_ERROR = "Load has failed: delimiter should be a single character"
+
+    # Update
+    UPDATE_RESULT = "{} row(s) updated"
+    UPDATE_TYPE_MISMATCH_ERROR = "Update has failed: Types are not matched"
+    UPDATE_COLUMN_EXISTENCE_ERROR = "Update has failed: '{}' does not exist"
+    UPDATE_COLUMN_NON_NULLABLE_ERROR = "Update has failed: '{}' is not nullable"
+    UPDATE_DUPLICATE_COLUMN_ERROR = "Update has failed: column name is duplicated"
+    UPDATE_DUPLICATE_PRIMARY_KEY_ERROR = "Update has failed: Primary key duplication"
+    UPDATE_REFERENTIAL_INTEGRITY_ERROR = "Update has failed: Referential integrity violation"
+
+    # Indexes
+    CREATE_INDEX_SUCCESS = "'{}' index is created"
+    DROP_INDEX_SUCCESS = "'{}' index is dropped"
+    INDEX_EXISTENCE_ERROR = "Create index has failed: index with the same name already exists"
+    INDEX_COLUMN_EXISTENCE_ERROR = "Create index has failed: '{}' does not exist"
+    INDEX_DUPLICATE_COLUMN_ERROR = "Create index has failed: column name is duplicated"
+    NO_SUCH_INDEX = "No such index"
+
+    # Aggregation
+    SELECT_GROUP_BY_ERROR = "Selection has failed: '{}' must appear in GROUP BY clause"
+    SELECT_AGGREGATE_TYPE_ERROR = "Selection has failed: '{}' cannot be applied to non-integer column"
+    WHERE_AGGREGATE_ERROR = "Where clause cannot contain aggregate functions"
+
+    # Statistics
+    ANALYZE_SUCCESS = "'{}' table is analyzed"
+
+    # Limit
+    SELECT_LIMIT_ERROR = "Selection has failed: LIMIT and OFFSET should not be negative"
+
     @staticmethod
     def get_message(message, name=None, count=None):
         if count is not None:
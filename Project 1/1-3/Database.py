@@ -1,33 +1,433 @@
 from berkeleydb import db
 import json
+import os
+from Catalog import Catalog
+from Statistics import TableStatistics, StatisticsCollector
+from RowCodec import encode_index_key, encode_sortable_value
 
 SCHEMA_KEY_PREFIX = "##"
+META_KEY_PREFIX = "###"
 COUNTER_KEY = "###counter"
+VERSION_KEY = "###version"
+
+PK_INDEX_SUFFIX = "#pk"
+FK_INDEX_INFIX = "#fk#"
+SECONDARY_INDEX_INFIX = "#ix#" # Sub-database of a CREATE INDEX index (ex. "students#ix#students_name")
+INDEX_KEY_PREFIX = "#i#"      # Catalog key of a CREATE INDEX definition (ex. "#i#students_name")
+STATISTICS_KEY_PREFIX = "#s#" # Catalog key of the statistics of a table (ex. "#s#students")
+
+# Storage layout versions
+# 0: rows stored next to the schemas in the catalog file under "table#n" keys
+# 1: rows of each table stored in their own sub-database of the tables file
+# 2: rows encoded with RowCodec (typed binary) instead of JSON
+# 3: statistics (row count) stored for every table
+STORAGE_VERSION = 3
+
+# Durability of committed transactions (key: setting name, value: environment flag)
+# - sync: the log is written and flushed to disk on commit
+# - write-nosync: the log is written to the OS on commit, but not flushed (survives a process crash, not an OS crash)
+# - nosync: the log is neither written nor flushed on commit (committed changes may be lost on a crash, but stay atomic)
+DURABILITY_FLAGS = {
+    "sync": 0,
+    "write-nosync": db.DB_TXN_WRITE_NOSYNC,
+    "nosync": db.DB_TXN_NOSYNC,
+}
+
+MAX_LOCKS = 100000 # Lock table size (a single transaction inserting many rows holds many page locks)
 
 class Database:
-    def __init__(self, db_filename):
+    def __init__(self, db_filename, durability="sync"):
         self.db_filename = db_filename
-        self.db = db.DB()
-        self.db.open(self.db_filename, dbtype=db.DB_HASH, flags=db.DB_CREATE)
+        self.tables_filename = os.path.splitext(os.path.basename(db_filename))[0] + "_tables.db" # Ex. "myDB_tables.db"
+        home = os.path.dirname(os.path.abspath(db_filename))
+        log_dir = os.path.splitext(os.path.basename(db_filename))[0] + "_logs" # Ex. "myDB_logs"
+        os.makedirs(os.path.join(home, log_dir), exist_ok=True)
+
+        # Transactional environment shared by all databases (cache, locks and write-ahead log).
+        # Recovery runs on open, so changes of transactions left unfinished by a crash are rolled back.
+        self.env = db.DBEnv()
+        self.env.set_lg_dir(log_dir)
+        self.env.set_lk_max_locks(MAX_LOCKS)
+        self.env.set_lk_max_objects(MAX_LOCKS)
+        if DURABILITY_FLAGS[durability]:
+            self.env.set_flags(DURABILITY_FLAGS[durability], 1)
+        self.env.log_set_config(db.DB_LOG_AUTO_REMOVE, 1) # Remove log files no longer needed for recovery
+        self.env.open(home, db.DB_CREATE | db.DB_RECOVER | db.DB_INIT_MPOOL | db.DB_INIT_TXN | db.DB_INIT_LOG | db.DB_INIT_LOCK | db.DB_PRIVATE)
+
+        # Transactions
+        self.transaction = None     # Transaction started by BEGIN (None outside BEGIN ... COMMIT)
+        self.statement_txn = None   # Transaction of the current statement (child of self.transaction inside BEGIN ... COMMIT)
+        self.statement_opened = []  # Names of sub-databases opened by the current statement
+        self.transaction_opened = [] # Names of sub-databases opened since BEGIN
+        self.row_count_changes = {} # Records inserted minus records deleted by the current statement (key: table name)
+
+        self.table_dbs = {} # Open sub-database handles (key: sub-database name, ex. "students", "students#pk")
+        self.access_counters = None # AccessCounters of the statement run by EXPLAIN ANALYZE (None otherwise)
+        self.catalog = Catalog(self) # Cache of parsed table schemas
+
+        # Catalog database holding table schemas and the counter
+        self.db = db.DB(self.env)
+        self.db.open(os.path.basename(self.db_filename), dbtype=db.DB_HASH, flags=db.DB_CREATE, txn=self.txn)
+
         self.counter = self.get_counter()  # Initialize the counter by fetching its last saved value
+        self.saved_counter = self.counter  # Last counter value written to the catalog
+        self.migrate_storage()
         # self.clear_database() # Uncomment to clear database
+        self.end_statement(True)
 
     def close(self):
-        """ Updates counter and closes the database connection. """
-        self.update_counter() 
+        """ Rolls back an unfinished transaction, saves the counter and closes the database connection. """
+        self.end_statement(False)
+        if self.transaction is not None:
+            self.rollback_transaction()
+        self.save_counter()
+        self.end_statement(True)
+
+        # Secondary indexes are closed before the tables they are associated with
+        for dbname in sorted(self.table_dbs, key=lambda dbname: SECONDARY_INDEX_INFIX not in dbname):
+            self.table_dbs[dbname].close()
+        self.table_dbs = {}
         self.db.close()
+        self.env.txn_checkpoint()
+        self.env.close()
+
+    @property
+    def txn(self):
+        """
+        Returns the transaction of the current statement, which every database operation runs in.
+        It is started on first use, so statements that do not access the database do not start one.
+        """
+        if self.statement_txn is None:
+            self.statement_txn = self.env.txn_begin(self.transaction)
+        return self.statement_txn
+
+    def end_statement(self, success):
+        """
+        Ends the transaction of the current statement.
+
+        Outside BEGIN ... COMMIT, the statement is committed on its own (with the counter, if it changed).
+        Inside BEGIN ... COMMIT, its changes become part of the enclosing transaction; a failed statement
+        is rolled back without affecting the previous statements of the transaction.
+
+        Parameters:
+        - success (bool): True to commit the statement, False to roll it back.
+        """
+        if success and self.transaction is None:
+            self.save_counter()
+        if success:
+            self.save_row_counts()
+        self.row_count_changes = {}
+        if self.statement_txn is None:
+            return
+
+        statement_txn = self.statement_txn
+        self.statement_txn = None
+        if success:
+            statement_txn.commit()
+            if self.transaction is not None:
+                self.transaction_opened.extend(self.statement_opened)
+        else:
+            statement_txn.abort()
+            self.discard_handles(self.statement_opened)
+        self.statement_opened = []
+
+    def begin_transaction(self):
+        """ Starts a transaction grouping the following statements until COMMIT or ROLLBACK (BEGIN). """
+        self.end_statement(True)
+        self.transaction = self.env.txn_begin()
+
+    def commit_transaction(self):
+        """ Commits the transaction started by BEGIN, along with the counter (COMMIT). """
+        self.save_counter()
+        self.end_statement(True)
+        self.transaction.commit()
+        self.transaction = None
+        self.transaction_opened = []
+
+    def rollback_transaction(self):
+        """ Rolls back every change made since BEGIN (ROLLBACK). """
+        self.end_statement(False)
+        self.transaction.abort()
+        self.transaction = None
+        self.discard_handles(self.transaction_opened)
+        self.transaction_opened = []
+
+    def in_transaction(self):
+        """ Returns True between BEGIN and COMMIT/ROLLBACK. """
+        return self.transaction is not None
+
+    def discard_handles(self, dbnames):
+        """
+        Closes sub-database handles opened by a rolled back transaction (aborting a transaction invalidates
+        the handles it opened) and drops cached schemas, which may describe tables created by the transaction.
+        """
+        for dbname in dbnames:
+            if dbname in self.table_dbs:
+                try:
+                    self.table_dbs.pop(dbname).close()
+                except db.DBError as e:
+                    pass # Already closed by the abort
+            if SECONDARY_INDEX_INFIX in dbname:
+                # The table handle may be associated with the discarded index
+                self.close_table_handles(dbname.split(SECONDARY_INDEX_INFIX)[0])
+        self.catalog.clear()
+        self.saved_counter = None # The counter may have been written by the rolled back transaction
 
     def clear_database(self):
         """ Clears all records in database. """
-        cursor = self.db.cursor()
+        for table_name in self.get_tables():
+            self.drop_table(table_name)
+
+        cursor = self.db.cursor(self.txn)
         try:
             record = cursor.first()
             while record:
-                self.db.delete(record[0]) 
+                cursor.delete()
                 record = cursor.next()
         finally:
             cursor.close()
         self.counter = 0  # Reset the counter if used for generating keys
+        self.saved_counter = None
+        self.db.put(VERSION_KEY.encode(), str(STORAGE_VERSION).encode(), txn=self.txn)
+
+    def migrate_storage(self):
+        """ 
+        Upgrades database files written by older versions to the current storage layout.
+        Each step runs once; the storage version saved in the catalog marks the file as migrated.
+        """
+        version = self.db.get(VERSION_KEY.encode(), txn=self.txn)
+        version = int(version.decode()) if version is not None else 0
+        if version >= STORAGE_VERSION:
+            return
+        
+        if version < 1:
+            self.migrate_rows_to_table_databases()
+        if version < 2:
+            self.migrate_rows_to_binary_encoding()
+        if version < 3:
+            for table_name in self.get_tables():
+                self.analyze_table(table_name) # Statistics are then kept up to date
+        
+        self.db.put(VERSION_KEY.encode(), str(STORAGE_VERSION).encode(), txn=self.txn)
+
+    def migrate_rows_to_table_databases(self):
+        """ Moves rows stored in the catalog file (version 0) into the sub-database of their table. """
+        # Collect row keys first (catalog is not modified while iterating)
+        legacy_keys = []
+        cursor = self.db.cursor(self.txn)
+        record = cursor.first()
+        while record:
+            if not record[0].decode().startswith(SCHEMA_KEY_PREFIX): # Row keys are formatted as "tablename#n"
+                legacy_keys.append(record[0])
+            record = cursor.next()
+        cursor.close()
+
+        for key in legacy_keys:
+            table_name = key.decode().split("#")[0]
+            if self.db.get((SCHEMA_KEY_PREFIX + table_name).encode(), txn=self.txn) is not None: # Skip leftover rows of dropped tables
+                self.get_table_db(table_name).put(key, self.db.get(key, txn=self.txn), txn=self.txn)
+            self.db.delete(key, txn=self.txn)
+
+    def migrate_rows_to_binary_encoding(self):
+        """ Re-encodes JSON rows (version 1) with RowCodec and rebuilds the indexes of every table with typed values. """
+        for table_name in self.get_tables():
+            schema = self.catalog.get_table(table_name)
+            row_codec = schema.row_codec
+
+            cursor = self.get_table_db(table_name).cursor(self.txn)
+            record = cursor.first()
+            while record:
+                if record[1][:1] == b"{": # JSON row
+                    values = row_codec.convert_legacy_values(schema, json.loads(record[1].decode('utf-8')))
+                    cursor.put(record[0], row_codec.encode(values), db.DB_CURRENT)
+                record = cursor.next()
+            cursor.close()
+
+            # Index keys were built from string values
+            for index_name in self.get_index_names(table_name)[1:]:
+                if index_name in self.table_dbs:
+                    self.table_dbs.pop(index_name).close()
+                try:
+                    self.env.dbremove(self.tables_filename, index_name, txn=self.txn)
+                except db.DBError as e:
+                    pass # Index was never created (built on first use)
+
+    def get_table_db(self, table_name):
+        """
+        Returns the handle of the sub-database storing the rows of the specified table.
+        The sub-database is created if it does not exist yet.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - DB: Opened database handle for the table rows.
+        """
+        if table_name not in self.table_dbs:
+            table_db = db.DB(self.env)
+            table_db.open(self.tables_filename, dbname=table_name, dbtype=db.DB_BTREE, flags=db.DB_CREATE, txn=self.txn)
+            self.table_dbs[table_name] = table_db
+            self.statement_opened.append(table_name)
+
+            # Attach secondary indexes, which BerkeleyDB then updates on every change of the table records
+            for index in self.catalog.get_indexes(table_name):
+                self.open_secondary_index(index, table_db)
+        return self.count_accesses(self.table_dbs[table_name], True)
+
+    def count_accesses(self, handle, holds_records=False):
+        """
+        Returns the handle of a sub-database, wrapped to count its gets and cursor steps while EXPLAIN ANALYZE runs a statement.
+
+        Parameters:
+        - handle (DB): The opened database handle.
+        - holds_records (bool): Whether the entries of the sub-database are table records (their bytes are counted as decoded).
+        """
+        if self.access_counters is None:
+            return handle
+        return self.access_counters.wrap(handle, holds_records)
+
+    def open_secondary_index(self, index, table_db, build=False):
+        """
+        Opens the sub-database of a secondary index and associates it with the table records.
+
+        Parameters:
+        - index (Index): The index to open.
+        - table_db (DB): The opened handle of the table records.
+        - build (bool): Whether to fill the (new) index from the existing table records.
+        """
+        index_dbname = index.table_name + SECONDARY_INDEX_INFIX + index.name
+        index_db = db.DB(self.env)
+        index_db.set_flags(db.DB_DUPSORT) # Many records may share the same index key
+        index_db.open(self.tables_filename, dbname=index_dbname, dbtype=db.DB_BTREE, flags=db.DB_CREATE, txn=self.txn)
+        table_db.associate(index_db, self.get_index_key_function(index), flags=db.DB_CREATE if build else 0, txn=self.txn)
+        self.table_dbs[index_dbname] = index_db
+        self.statement_opened.append(index_dbname)
+
+    def get_index_key_function(self, index):
+        """
+        Returns the function computing the secondary index key of a table record (called by BerkeleyDB).
+        Records with a NULL value in an indexed column are not indexed (NULL never matches a comparison).
+        """
+        schema = self.catalog.get_table(index.table_name)
+        row_codec = schema.row_codec
+        positions = [schema.column_positions[column] for column in index.columns]
+        position_set = set(positions)
+        kinds = [row_codec.kinds[position] for position in positions]
+
+        def get_index_key(key, data):
+            values = row_codec.decode(data, position_set)
+            index_values = [values[position] for position in positions]
+            if any(value is None for value in index_values):
+                return db.DB_DONOTINDEX
+            return encode_index_key(kinds, index_values)
+        return get_index_key
+
+    def get_secondary_index_db(self, index):
+        """ Returns the handle of the sub-database of a secondary index (opened along with its table). """
+        self.get_table_db(index.table_name)
+        return self.count_accesses(self.table_dbs[index.table_name + SECONDARY_INDEX_INFIX + index.name])
+
+    def close_table_handles(self, table_name):
+        """ Closes the handles of the table records and its secondary indexes (secondary indexes first). They are reopened on next use. """
+        for dbname in [dbname for dbname in self.table_dbs if dbname.startswith(table_name + SECONDARY_INDEX_INFIX)] + [table_name]:
+            if dbname in self.table_dbs:
+                try:
+                    self.table_dbs.pop(dbname).close()
+                except db.DBError as e:
+                    pass # Already closed by an abort
+
+    def get_pk_index_db(self, table_name):
+        """
+        Returns the handle of the primary key index of the specified table.
+        The index maps the encoded primary key values of a record to the key of the record.
+
+        Parameters:
+        - table_name (str): The name of the table.
+
+        Returns:
+        - DB: Opened database handle for the primary key index.
+        """
+        return self.get_index_db(table_name + PK_INDEX_SUFFIX, table_name, self.get_primary_key_columns(table_name))
+
+    def get_fk_index_db(self, table_name, fk_column_list):
+        """
+        Returns the handle of the index on a foreign key of the specified (referencing) table.
+        The index maps the encoded foreign key values to the keys of all records holding them (duplicates allowed).
+
+        Parameters:
+        - table_name (str): The name of the referencing table.
+        - fk_column_list (list of str): The foreign key column names of the table.
+
+        Returns:
+        - DB: Opened database handle for the foreign key index.
+        """
+        index_name = table_name + FK_INDEX_INFIX + ",".join(fk_column_list) # Ex. "lectures#fk#s_id"
+        return self.get_index_db(index_name, table_name, fk_column_list, duplicates=True)
+
+    def get_index_db(self, index_name, table_name, column_list, duplicates=False):
+        """
+        Opens the index sub-database with the given name.
+        If the index does not exist yet (ex. table created by an older version), it is created and built from the table records.
+
+        Parameters:
+        - index_name (str): The name of the index sub-database.
+        - table_name (str): The name of the indexed table.
+        - column_list (list of str): The indexed column names.
+        - duplicates (bool): Whether multiple records may share the same index key.
+
+        Returns:
+        - DB: Opened database handle for the index.
+        """
+        if index_name not in self.table_dbs:
+            index_db = db.DB(self.env)
+            if duplicates:
+                index_db.set_flags(db.DB_DUPSORT)
+            try:
+                index_db.open(self.tables_filename, dbname=index_name, dbtype=db.DB_BTREE, txn=self.txn)
+                self.table_dbs[index_name] = index_db
+            except db.DBNoSuchFileError:
+                index_db.close()
+                index_db = db.DB(self.env)
+                if duplicates:
+                    index_db.set_flags(db.DB_DUPSORT)
+                index_db.open(self.tables_filename, dbname=index_name, dbtype=db.DB_BTREE, flags=db.DB_CREATE, txn=self.txn)
+                self.table_dbs[index_name] = index_db
+                self.build_index(index_db, table_name, column_list)
+            self.statement_opened.append(index_name)
+        return self.count_accesses(self.table_dbs[index_name])
+
+    def build_index(self, index_db, table_name, column_list):
+        """ Fills an index on the given columns of the table by scanning the records of the table. """
+        if len(column_list) == 0:
+            return
+        schema = self.catalog.get_table(table_name)
+        positions = [schema.column_positions[column] for column in column_list]
+        cursor = self.get_table_db(table_name).cursor(self.txn)
+        record = cursor.first()
+        while record:
+            values = schema.row_codec.decode(record[1], set(positions))
+            index_db.put(encode_key_values([values[position] for position in positions]), record[0], txn=self.txn)
+            record = cursor.next()
+        cursor.close()
+
+    def get_index_names(self, table_name):
+        """ Returns the names of all sub-databases belonging to the table (records, primary key index, foreign key indexes, secondary indexes). """
+        index_names = [table_name, table_name + PK_INDEX_SUFFIX]
+        for fk_column_list in self.get_foreign_key_column_lists(table_name):
+            index_names.append(table_name + FK_INDEX_INFIX + ",".join(fk_column_list))
+        for index in self.catalog.get_indexes(table_name):
+            index_names.append(table_name + SECONDARY_INDEX_INFIX + index.name)
+        return index_names
+
+    def get_primary_key_columns(self, table_name):
+        """ Returns the list of primary key column names of the table. """
+        schema = self.catalog.get_table(table_name)
+        return schema.primary_keys if schema is not None else []
+
+    def get_foreign_key_column_lists(self, table_name):
+        """ Returns the column name lists of all foreign keys of the table. """
+        schema = self.catalog.get_table(table_name)
+        return [foreign_key.columns for foreign_key in schema.foreign_keys] if schema is not None else []
 
     def get_counter(self):
         """ Retrieve the counter from the database using the '###counter' key.
@@ -36,7 +436,7 @@ class Database:
         - int: The current value of the counter or 0 if it's not set.
         """
         try:
-            counter_value = self.db.get(b'###counter')
+            counter_value = self.db.get(COUNTER_KEY.encode(), txn=self.txn)
             if counter_value is not None:
                 return int(counter_value.decode())
             return 0  # Default to 0 if key does not exist
@@ -46,55 +446,204 @@ class Database:
     def update_counter(self):
         """ Update the counter value in the database. """
         try:
-            self.db.put(b'###counter', str(self.counter).encode())  
+            self.db.put(COUNTER_KEY.encode(), str(self.counter).encode(), txn=self.txn)
         except db.DBError as e:
             return
 
+    def save_counter(self):
+        """ Writes the counter to the database if it changed since it was last written (once per commit, not per row). """
+        if self.counter != self.saved_counter:
+            self.update_counter()
+            self.saved_counter = self.counter
+
     def key_exists(self, key):
         """ Check if a given key exists in the database.  """
         try:
-            value = self.db.get(key.encode()) 
+            value = self.db.get(key.encode(), txn=self.txn)
             return value is not None
         except db.DBError as e:
             return False
             
     def drop_table(self, table_name):
-        """ Deletes all records and schema associated with the specified table. """
+        """ Removes the sub-database of the table and the schema associated with the specified table. """
         
-        # Delete records in the table
-        cursor = self.db.cursor()
-        record = cursor.first()
-        while record:
-            key_prefix = table_name + "#"
-            if record[0].decode().startswith(key_prefix): 
-                self.db.delete(record[0])
-            record = cursor.next()
-        cursor.close()
+        # Remove sub-databases holding the table records and indexes
+        self.close_table_handles(table_name)
+        for dbname in self.get_index_names(table_name):
+            if dbname in self.table_dbs:
+                self.table_dbs.pop(dbname).close()
+            try:
+                self.env.dbremove(self.tables_filename, dbname, txn=self.txn)
+            except db.DBError as e:
+                pass # Sub-database was never created
+
+        # Delete table schema, statistics and secondary index definitions
+        for index in self.catalog.get_indexes(table_name):
+            self.db.delete(f"{INDEX_KEY_PREFIX}{index.name}".encode(), txn=self.txn)
+        if self.key_exists(STATISTICS_KEY_PREFIX + table_name):
+            self.db.delete(f"{STATISTICS_KEY_PREFIX}{table_name}".encode(), txn=self.txn)
+        self.db.delete(f"##{table_name}".encode(), txn=self.txn)
+        self.row_count_changes.pop(table_name, None)
+        self.catalog.invalidate(table_name)
 
-        # Delete table schema
-        self.db.delete(f"##{table_name}".encode())
+    def can_truncate(self, table_name):
+        """
+        Returns whether all records of the table can be cleared by truncating its sub-databases.
+        Truncate is not allowed on a table with associated secondary indexes.
+        """
+        return len(self.catalog.get_indexes(table_name)) == 0
 
     def delete_all_table_records(self, table_name):
         """
         Clears all records from the specified table.
+
+        Returns:
+        - int: The number of deleted records.
         """
-        cursor = self.db.cursor()
-        record = cursor.first()
-        while record:
-            key, value = record
-            if key.decode().startswith(f"{table_name}#"):
-                self.db.delete(key)
-            record = cursor.next()
+        if not self.can_truncate(table_name):
+            # Truncate is not allowed on a table with associated secondary indexes: delete records one by one
+            # (BerkeleyDB removes their secondary index entries)
+            deleted_count = self.delete_records(table_name)
+        else:
+            deleted_count = self.get_table_db(table_name).truncate(txn=self.txn)
+            self.get_pk_index_db(table_name).truncate(txn=self.txn)
+            for fk_column_list in self.get_foreign_key_column_lists(table_name):
+                self.get_fk_index_db(table_name, fk_column_list).truncate(txn=self.txn)
+            self.change_row_count(table_name, -deleted_count)
+        return deleted_count
+
+    def delete_records(self, table_name, predicate=None, on_delete=None):
+        """
+        Deletes the records of a table in a single cursor pass, along with their index entries.
+
+        Each record is decoded and tested in place, and deleted through the cursor (cursor.delete()),
+        so no record is kept in memory. Secondary index entries are removed by BerkeleyDB.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - predicate (callable or None): Takes the column values of a record and returns whether to delete it (all records if None).
+        - on_delete (callable or None): Called with the column values of each deleted record.
+
+        Returns:
+        - int: The number of deleted records.
+        """
+        schema = self.catalog.get_table(table_name)
+        row_codec = schema.row_codec
+        deleted_count = 0
+        cursor = self.get_table_db(table_name).cursor(self.txn)
+        try:
+            record = cursor.first()
+            while record:
+                key, data = record
+                values = row_codec.decode(data)
+                if predicate is None or predicate(values):
+                    if on_delete is not None:
+                        on_delete(values)
+                    cursor.delete()
+                    self.delete_index_entries(schema, key, values)
+                    deleted_count += 1
+                record = cursor.next()
+        finally:
+            cursor.close()
+        self.change_row_count(table_name, -deleted_count)
+        return deleted_count
+
+    def delete_record(self, table_name, key, values):
+        """
+        Deletes a specified record from the database, along with its primary and foreign key index entries.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - key (bytes): The key of the record.
+        - values (list): The column values of the record.
+        """
+        self.get_table_db(table_name).delete(key, txn=self.txn)
+        self.delete_index_entries(self.catalog.get_table(table_name), key, values)
+        self.change_row_count(table_name, -1)
+
+    def delete_index_entries(self, schema, key, values):
+        """ Removes the primary and foreign key index entries of a deleted record. """
+        if len(schema.primary_keys) > 0:
+            pk_values = [values[schema.column_positions[pk_column]] for pk_column in schema.primary_keys]
+            self.get_pk_index_db(schema.table_name).delete(encode_key_values(pk_values), txn=self.txn)
+
+        for foreign_key in schema.foreign_keys:
+            fk_values = [values[schema.column_positions[fk_column]] for fk_column in foreign_key.columns]
+            self.delete_fk_index_entry(schema.table_name, foreign_key.columns, fk_values, key)
+
+    def delete_fk_index_entry(self, table_name, fk_column_list, fk_values, record_key):
+        """ Removes the entry of a record from a foreign key index (other records holding the same values keep theirs). """
+        cursor = self.get_fk_index_db(table_name, fk_column_list).cursor(self.txn)
+        if cursor.get_both(encode_key_values(fk_values), record_key):
+            cursor.delete()
         cursor.close()
 
-    def delete_record(self, table_name, record):
+    def update_records(self, table_name, assignments, predicate=None, check_row=None):
         """
-        Deletes a specified record from the database.
+        Rewrites the records of a table in a single cursor pass.
+
+        Each matching record is rewritten in place under its existing key (cursor put with DB_CURRENT).
+        Its primary key and foreign key index entries are moved only when their values change;
+        secondary indexes are updated by BerkeleyDB.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - assignments (list of tuple): (column position, new value) for each updated column.
+        - predicate (callable or None): Takes the column values of a record and returns whether to update it (all records if None).
+        - check_row (callable or None): Called with the old and new column values of each record before it is rewritten.
+          It raises an exception to reject the update (the statement is then rolled back).
+
+        Returns:
+        - int: The number of updated records.
         """
-        # Assuming each record can be uniquely identified by an 'id' key
-        # key_to_delete = f"{table_name}#{record['#']}"
-        key_to_delete = record[f'{table_name}.#']
-        self.db.delete(key_to_delete.encode())
+        schema = self.catalog.get_table(table_name)
+        row_codec = schema.row_codec
+        updated_positions = {position for position, _ in assignments}
+
+        # Indexes whose key may change: (column names, positions) of the primary key and of each foreign key
+        pk_positions = [schema.column_positions[pk_column] for pk_column in schema.primary_keys]
+        update_pk_index = not updated_positions.isdisjoint(pk_positions)
+        fk_indexes = []
+        for foreign_key in schema.foreign_keys:
+            fk_positions = [schema.column_positions[fk_column] for fk_column in foreign_key.columns]
+            if not updated_positions.isdisjoint(fk_positions):
+                fk_indexes.append((foreign_key.columns, fk_positions))
+
+        updated_count = 0
+        cursor = self.get_table_db(table_name).cursor(self.txn)
+        try:
+            record = cursor.first()
+            while record:
+                key, data = record
+                values = row_codec.decode(data)
+                if predicate is None or predicate(values):
+                    new_values = list(values)
+                    for position, value in assignments:
+                        new_values[position] = value
+                    if check_row is not None:
+                        check_row(values, new_values)
+
+                    cursor.put(key, row_codec.encode(new_values), db.DB_CURRENT)
+
+                    if update_pk_index:
+                        old_pk_values = [values[position] for position in pk_positions]
+                        new_pk_values = [new_values[position] for position in pk_positions]
+                        if old_pk_values != new_pk_values:
+                            pk_index_db = self.get_pk_index_db(table_name)
+                            pk_index_db.delete(encode_key_values(old_pk_values), txn=self.txn)
+                            pk_index_db.put(encode_key_values(new_pk_values), key, txn=self.txn)
+
+                    for fk_column_list, fk_positions in fk_indexes:
+                        old_fk_values = [values[position] for position in fk_positions]
+                        new_fk_values = [new_values[position] for position in fk_positions]
+                        if old_fk_values != new_fk_values:
+                            self.delete_fk_index_entry(table_name, fk_column_list, old_fk_values, key)
+                            self.get_fk_index_db(table_name, fk_column_list).put(encode_key_values(new_fk_values), key, txn=self.txn)
+                    updated_count += 1
+                record = cursor.next()
+        finally:
+            cursor.close()
+        return updated_count
 
     def insert_table(self, table_name, schema):
         """
@@ -105,28 +654,42 @@ class Database:
         - schema (str): The encoded string for schema of the table.
         """
         schema_key = SCHEMA_KEY_PREFIX + table_name
-        self.db.put(schema_key.encode(), schema.encode())
+        self.db.put(schema_key.encode(), schema.encode(), txn=self.txn)
+        self.write_table_statistics(table_name, TableStatistics(0)) # Empty table (row count kept from now on)
+        self.catalog.invalidate(table_name)
+        self.get_table_db(table_name) # Create sub-databases for the table records and indexes
+        self.get_pk_index_db(table_name)
+        for fk_column_list in self.get_foreign_key_column_lists(table_name):
+            self.get_fk_index_db(table_name, fk_column_list)
 
-    def insert_row(self, table_name, row_values):
+    def insert_row(self, table_name, values):
         """ 
         Insert a new row into the specified table. 
 
         Parameters:
         - table_name (str): The name of the table where the row will be inserted.
-        - row_values (dict): A dictionary representing the values of the row to insert, which will be serialized into JSON.
+        - values (list): Column values in the order of the table definition (None for NULL), which will be encoded with the RowCodec of the table.
         """
-        key = self.generate_unique_key(table_name)
+        key = self.generate_unique_key(table_name).encode()
         
-        row_values["#"] = key # Store key for record (needed for picking out records in DELETE and SELECT)
+        schema = self.catalog.get_table(table_name)
+        serialized_value = schema.row_codec.encode(values)
         
-        serialized_value = json.dumps(row_values).encode('utf-8')
-        
-        try:
-            self.db.put(key.encode(), serialized_value) 
-            self.counter += 1 
-            self.update_counter() 
-        except db.DBError as e:
-            return
+        # A DBError (ex. deadlock) is raised to the caller, which rolls back the statement:
+        # the record is never stored without its index entries
+        self.get_table_db(table_name).put(key, serialized_value, txn=self.txn)
+
+        pk_column_list = schema.primary_keys
+        if len(pk_column_list) > 0:
+            pk_values = [values[schema.column_positions[pk_column]] for pk_column in pk_column_list]
+            self.get_pk_index_db(table_name).put(encode_key_values(pk_values), key, txn=self.txn)
+
+        for foreign_key in schema.foreign_keys:
+            fk_values = [values[schema.column_positions[fk_column]] for fk_column in foreign_key.columns]
+            self.get_fk_index_db(table_name, foreign_key.columns).put(encode_key_values(fk_values), key, txn=self.txn)
+
+        self.counter += 1 # Saved once the statement (or transaction) commits
+        self.change_row_count(table_name, 1)
     
     def generate_unique_key(self, table_name):
         """ Generate a unique key for a new record. """
@@ -136,15 +699,108 @@ class Database:
     def get_tables(self):
         """ Retrieves a list of all tables in the database. """
         tables = []
-        cursor = self.db.cursor()
+        cursor = self.db.cursor(self.txn)
         record = cursor.first()
         while record:
             key = record[0].decode()
-            if key.startswith(SCHEMA_KEY_PREFIX) and key != COUNTER_KEY:
+            if key.startswith(SCHEMA_KEY_PREFIX) and not key.startswith(META_KEY_PREFIX):
                 tables.append(key.lstrip(SCHEMA_KEY_PREFIX))
             record = cursor.next()
+        cursor.close()
         return tables
+
+    def get_index_definitions(self):
+        """
+        Retrieves the definitions of all secondary indexes in the database.
+
+        Returns:
+        - list of tuple: (index name, encoded index definition "table:col,...") for each index.
+        """
+        definitions = []
+        cursor = self.db.cursor(self.txn)
+        try:
+            record = cursor.set_range(INDEX_KEY_PREFIX.encode())
+            while record and record[0].decode().startswith(INDEX_KEY_PREFIX):
+                definitions.append((record[0].decode()[len(INDEX_KEY_PREFIX):], record[1].decode()))
+                record = cursor.next()
+        finally:
+            cursor.close()
+        return definitions
+
+    def insert_index(self, index):
+        """
+        Stores the definition of a secondary index and builds it from the existing table records.
+
+        Parameters:
+        - index (Index): The index to create.
+        """
+        table_db = self.get_table_db(index.table_name) # Opened with its existing indexes
+        self.db.put(f"{INDEX_KEY_PREFIX}{index.name}".encode(), index.encode().encode(), txn=self.txn)
+        self.catalog.invalidate_indexes()
+        self.open_secondary_index(index, table_db, build=True)
+
+    def drop_index(self, index):
+        """
+        Removes a secondary index and its definition.
+
+        Parameters:
+        - index (Index): The index to drop.
+        """
+        # An index cannot be dissociated from an open table handle: close the table and its indexes
+        self.close_table_handles(index.table_name)
+        self.db.delete(f"{INDEX_KEY_PREFIX}{index.name}".encode(), txn=self.txn)
+        self.env.dbremove(self.tables_filename, index.table_name + SECONDARY_INDEX_INFIX + index.name, txn=self.txn)
+        self.catalog.invalidate_indexes()
     
+    def read_table_statistics(self, table_name):
+        """ Reads the statistics of the specified table (TableStatistics) from the catalog file (None if it has none). """
+        statistics_bytes = self.db.get(f"{STATISTICS_KEY_PREFIX}{table_name}".encode(), txn=self.txn)
+        schema = self.catalog.get_table(table_name)
+        if statistics_bytes is None or schema is None:
+            return None
+        return TableStatistics.parse(statistics_bytes.decode(), schema)
+
+    def write_table_statistics(self, table_name, statistics):
+        """ Stores the statistics of the specified table (TableStatistics) in the catalog file. """
+        self.db.put(f"{STATISTICS_KEY_PREFIX}{table_name}".encode(), statistics.encode().encode(), txn=self.txn)
+
+    def analyze_table(self, table_name):
+        """
+        Collects the statistics of a table in a single pass over its records and stores them (ANALYZE).
+
+        Returns:
+        - TableStatistics: The collected statistics.
+        """
+        collector = StatisticsCollector(self.catalog.get_table(table_name))
+        for _, values in self.iterate_records(table_name):
+            collector.add(values)
+        statistics = collector.get_statistics()
+        self.write_table_statistics(table_name, statistics)
+        self.row_count_changes.pop(table_name, None) # Counted by the scan
+        self.catalog.statistics[table_name] = statistics
+        return statistics
+
+    def get_row_count(self, table_name):
+        """ Returns the number of records of the table from its statistics (without scanning it), or None if unknown. """
+        statistics = self.catalog.get_statistics(table_name)
+        if statistics is None:
+            return None
+        return max(0, statistics.row_count + self.row_count_changes.get(table_name, 0))
+
+    def change_row_count(self, table_name, delta):
+        """ Records inserted (positive delta) or deleted (negative delta) records, saved with the statement. """
+        self.row_count_changes[table_name] = self.row_count_changes.get(table_name, 0) + delta
+
+    def save_row_counts(self):
+        """ Writes the row counts changed by the current statement to the statistics of their tables (once per table). """
+        for table_name, delta in self.row_count_changes.items():
+            statistics = self.catalog.get_statistics(table_name)
+            if delta == 0 or statistics is None:
+                continue
+            statistics.row_count = max(0, statistics.row_count + delta)
+            self.write_table_statistics(table_name, statistics)
+        self.row_count_changes = {}
+
     def get_table_schema(self, table_name):
         """
         Fetches the schema for the specified table.
@@ -156,7 +812,7 @@ class Database:
         - str or None: The schema of the table if available, or None if the table does not exist.
         """
         try:
-            schema_bytes = self.db.get(table_name.encode())
+            schema_bytes = self.db.get(table_name.encode(), txn=self.txn)
 
             if schema_bytes:
                 schema_str = schema_bytes.decode()
@@ -166,58 +822,210 @@ class Database:
         except db.DBError as e: 
             return None
         
-    def retrieve_records(self, table_name):
+    def read_table_schema(self, table_name):
+        """ Reads the schema string of the specified table from the catalog file (None if the table does not exist). """
+        return self.get_table_schema(SCHEMA_KEY_PREFIX + table_name)
+
+    def decode_record(self, schema, key, value, positions=None):
+        """
+        Decodes a stored record into a dictionary (key: column name, "#": key of the record).
+
+        Parameters:
+        - schema (TableSchema): The schema of the table.
+        - key (bytes): The key of the record.
+        - value (bytes): The encoded record.
+        - positions (set of int or None): Column positions to decode (all columns if None).
+
+        Returns:
+        - dict: The decoded record.
+        """
+        values = schema.row_codec.decode(value, positions)
+        if positions is None:
+            record_data = dict(zip(schema.column_names, values))
+        else:
+            record_data = {schema.column_names[position]: values[position] for position in positions}
+        record_data["#"] = key.decode() # Key of record (needed for picking out records in DELETE)
+        return record_data
+
+    def retrieve_records(self, table_name, column_names=None):
         """
-        Retrieves all records from the specified table, deserializing them from JSON.
+        Retrieves all records from the specified table, decoding them with the RowCodec of the table.
 
         Parameters:
         - table_name (str): The name of the table from which to retrieve records.
+        - column_names (list of str or None): Columns to decode (all columns if None).
 
         Returns:
         - list of dicts: A list of dictionaries representing each record in the table.
         """
         try:
+            schema = self.catalog.get_table(table_name)
+            positions = None if column_names is None else {schema.column_positions[column_name] for column_name in column_names}
             records = []
-            cursor = self.db.cursor()
+            cursor = self.get_table_db(table_name).cursor(self.txn)
             record = cursor.first()
             while record:
                 key, value = record
-                if key.decode().startswith(f"{table_name}#"):  
-                    record_data = json.loads(value.decode('utf-8'))
-                    records.append(record_data)  # Decoded JSON 
+                records.append(self.decode_record(schema, key, value, positions))
                 record = cursor.next()
             cursor.close()
             return records
         except db.DBError as e: 
             return []
-    
+
+    def iterate_records(self, table_name, positions=None):
+        """
+        Generates the records of the specified table one at a time, as they are read from a cursor.
+        The cursor is closed once the generator is exhausted or closed.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - positions (set of int or None): Column positions to decode (all columns if None).
+
+        Yields:
+        - tuple: (key of the record (bytes), list of column values in the order of the table definition)
+        """
+        row_codec = self.catalog.get_table(table_name).row_codec
+        cursor = self.get_table_db(table_name).cursor(self.txn)
+        try:
+            record = cursor.first()
+            while record:
+                yield record[0], row_codec.decode(record[1], positions)
+                record = cursor.next()
+        finally:
+            cursor.close()
+
+    def iterate_index_records(self, index, prefix_values, lower=None, upper=None):
+        """
+        Generates the records of a table through a secondary index, in index order.
+        Only the index entries in the requested key range are read.
+
+        Parameters:
+        - index (Index): The index to read.
+        - prefix_values (list): Values the first indexed columns must be equal to.
+        - lower (tuple or None): (value, inclusive) lower bound of the indexed column following the prefix.
+        - upper (tuple or None): (value, inclusive) upper bound of the indexed column following the prefix.
+
+        Yields:
+        - tuple: (key of the record (bytes), list of column values in the order of the table definition)
+        """
+        schema = self.catalog.get_table(index.table_name)
+        row_codec = schema.row_codec
+        kinds = [row_codec.kinds[schema.column_positions[column]] for column in index.columns]
+        prefix = encode_index_key(kinds, prefix_values)
+        range_kind = kinds[len(prefix_values)] if len(prefix_values) < len(kinds) else None
+        lower_key = encode_sortable_value(range_kind, lower[0]) if lower is not None else b""
+        upper_key = encode_sortable_value(range_kind, upper[0]) if upper is not None else None
+
+        cursor = self.get_secondary_index_db(index).cursor(self.txn)
+        try:
+            record = cursor.pget(prefix + lower_key, db.DB_SET_RANGE)
+            while record:
+                index_key, record_key, record_data = record
+                if not index_key.startswith(prefix):
+                    break # Past the equality prefix
+                suffix = index_key[len(prefix):]
+                if lower is not None and not lower[1] and suffix.startswith(lower_key):
+                    record = cursor.pget(db.DB_NEXT) # Skip values equal to an exclusive lower bound
+                    continue
+                if upper_key is not None:
+                    if suffix.startswith(upper_key):
+                        if not upper[1]:
+                            break # Values equal to an exclusive upper bound
+                    elif suffix > upper_key:
+                        break
+                yield record_key, row_codec.decode(record_data)
+                record = cursor.pget(db.DB_NEXT)
+        finally:
+            cursor.close()
+
+    def iterate_pk_record(self, table_name, pk_values):
+        """
+        Generates the record of a table holding the given primary key values (at most one), found with a
+        single lookup in the primary key index.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - pk_values (list): Values of the primary key columns, in the order of the primary key.
+
+        Yields:
+        - tuple: (key of the record (bytes), list of column values in the order of the table definition)
+        """
+        record_key = self.get_pk_index_db(table_name).get(encode_key_values(pk_values), txn=self.txn)
+        if record_key is not None:
+            yield record_key, self.catalog.get_table(table_name).row_codec.decode(self.get_table_db(table_name).get(record_key, txn=self.txn))
+
     def retrieve_specific_pk_record(self, table_name, query_pk_values_dict):
         """
         Retrieve a specific record from the table corresponding to unique pk.
+        When the queried columns are exactly the primary key of the table, the record is found
+        with a single lookup in the primary key index. Otherwise, the table records are scanned.
 
         Parameters:
         - table_name (str): The name of the table.
         - query_pk_values_dict (dict): The dict containing primary key and value to match.
 
         Returns:
-        - list or None: The list containing the record if found, empty if no record matches.
+        - list: The list containing the record if found, empty if no record matches.
+
+        Raises:
+        - DBError: If the records can not be read (the statement is then rolled back).
         """
+        pk_column_list = self.get_primary_key_columns(table_name)
+        if len(pk_column_list) > 0 and set(pk_column_list) == set(query_pk_values_dict.keys()):
+            # Point lookup through primary key index
+            pk_values = [query_pk_values_dict[pk_column] for pk_column in pk_column_list]
+            record_key = self.get_pk_index_db(table_name).get(encode_key_values(pk_values), txn=self.txn)
+            if record_key is None:
+                return []
+            schema = self.catalog.get_table(table_name)
+            return [self.decode_record(schema, record_key, self.get_table_db(table_name).get(record_key, txn=self.txn))]
+
+        schema = self.catalog.get_table(table_name)
+        matched_records = [] 
+        query_column_list = list(query_pk_values_dict.keys())
+        cursor = self.get_table_db(table_name).cursor(self.txn)
         try:
-            cursor = self.db.cursor()
             record = cursor.first()
-            matched_records = [] 
-            
-            pk_column_list = list(query_pk_values_dict.keys())
             while record:
-                if record[0].decode().startswith(f"{table_name}#"): # Key format is "tablename#primarykey"
-                    record_data = json.loads(record[1].decode())
-                    record_pk_data = {pk_column: record_data[pk_column] for pk_column in pk_column_list}
-                    if record_pk_data ==  query_pk_values_dict:
-                        matched_records.append(record_data) 
+                record_data = self.decode_record(schema, record[0], record[1])
+                record_pk_data = {query_column: record_data[query_column] for query_column in query_column_list}
+                if record_pk_data ==  query_pk_values_dict:
+                    matched_records.append(record_data) 
                 record = cursor.next()
-            
+        finally:
             cursor.close()
-            return matched_records
-        except Exception as e:
-            return None
+        return matched_records
+
+    def retrieve_referencing_record_keys(self, table_name, fk_column_list, referenced_values):
+        """
+        Retrieves the keys of the records whose foreign key holds the given values, using the foreign key index.
+
+        Parameters:
+        - table_name (str): The name of the referencing table.
+        - fk_column_list (list of str): The foreign key column names.
+        - referenced_values (list): The referenced (primary key) values to look up, in the order of fk_column_list.
+
+        Returns:
+        - list of bytes: Keys of the referencing records, empty if the values are not referenced.
+        """
+        record_keys = []
+        cursor = self.get_fk_index_db(table_name, fk_column_list).cursor(self.txn)
+        record = cursor.set(encode_key_values(referenced_values))
+        while record:
+            record_keys.append(record[1])
+            record = cursor.next_dup()
+        cursor.close()
+        return record_keys
+
+def encode_key_values(values):
+    """ 
+    Encodes a tuple of column values (ex. primary key values of a record) into an index key.
+
+    Parameters:
+    - values (list): Column values in the order of the index columns (int, date, str or None).
 
+    Returns:
+    - bytes: Encoded key.
+    """
+    return json.dumps(list(values), default=str).encode('utf-8') # Dates are encoded as "YYYY-MM-DD"
@@ -0,0 +1,464 @@
+import heapq
+import pickle
+import sys
+import tempfile
+from itertools import islice
+
+DEFAULT_SORT_MEMORY = 64 * 1024 * 1024 # Bytes of rows a Sort keeps in memory before spilling sorted runs to disk
+MERGE_FAN_IN = 64     # Maximum number of runs merged at once (each one holds an open file)
+SPILL_CHUNK_ROWS = 1000 # Rows pickled together in a run file
+
+class Operator:
+    """
+    Base class of query execution operators (Volcano-style iterator model).
+
+    Operators form a tree. Iterating an operator pulls rows one at a time from its children,
+    so no intermediate result is materialized unless the operator needs it (ex. hash join build side).
+    Rows are tuples whose values are described by column_names ('table_name.column' for each position).
+    """
+    def __init__(self, column_names, children=()):
+        self.column_names = column_names
+        self.children = list(children)
+        self.estimated_rows = None # Number of rows expected by the planner (None if not estimated)
+
+    def __iter__(self):
+        return self.rows()
+
+    def rows(self):
+        raise NotImplementedError
+
+    def column_position(self, column_name):
+        """ Returns the position of a 'table_name.column' value in the rows of this operator. """
+        return self.column_names.index(column_name)
+
+    def describe(self):
+        """ Returns a one-line description of the operator (shown by EXPLAIN). """
+        return type(self).__name__
+
+class TableScan(Operator):
+    """ Reads the records of a table one at a time from a BerkeleyDB cursor. """
+    def __init__(self, database, table_name):
+        schema = database.catalog.get_table(table_name)
+        super().__init__([f"{table_name}.{column_name}" for column_name in schema.column_names])
+        self.database = database
+        self.table_name = table_name
+
+    def records(self):
+        """ Generates (key of the record, list of column values) for each record of the table. """
+        return self.database.iterate_records(self.table_name)
+
+    def rows(self):
+        for _, values in self.records():
+            yield tuple(values)
+
+    def describe(self):
+        return f"TableScan {self.table_name}"
+
+class PrimaryKeyScan(TableScan):
+    """ Reads the record of a table holding the given primary key values (at most one), with a primary key index lookup. """
+    def __init__(self, database, table_name, pk_values):
+        super().__init__(database, table_name)
+        self.pk_values = pk_values # Values of the primary key columns, in the order of the primary key
+        self.estimated_rows = 1
+
+    def records(self):
+        return self.database.iterate_pk_record(self.table_name, self.pk_values)
+
+    def describe(self):
+        pk_columns = self.database.catalog.get_table(self.table_name).primary_keys
+        return f"PrimaryKeyScan {self.table_name} ({', '.join(f'{column} = {format_literal(value)}' for column, value in zip(pk_columns, self.pk_values))})"
+
+class IndexScan(TableScan):
+    """
+    Reads the records of a table through a secondary index, visiting only the index entries
+    whose key starts with the given equality values and lies in the given range.
+    """
+    def __init__(self, database, table_name, index, prefix_values, lower=None, upper=None):
+        super().__init__(database, table_name)
+        self.index = index                  # Index
+        self.prefix_values = prefix_values  # Values of the first index columns (equality)
+        self.lower = lower                  # (value, inclusive) or None, bound of the next index column
+        self.upper = upper                  # (value, inclusive) or None
+
+    def records(self):
+        return self.database.iterate_index_records(self.index, self.prefix_values, self.lower, self.upper)
+
+    def describe(self):
+        ranges = [f"{column} = {format_literal(value)}" for column, value in zip(self.index.columns, self.prefix_values)]
+        range_column = self.index.columns[len(self.prefix_values)] if len(self.prefix_values) < len(self.index.columns) else None
+        if self.lower is not None:
+            ranges.append(f"{range_column} {'>=' if self.lower[1] else '>'} {format_literal(self.lower[0])}")
+        if self.upper is not None:
+            ranges.append(f"{range_column} {'<=' if self.upper[1] else '<'} {format_literal(self.upper[0])}")
+        return f"IndexScan {self.table_name} using {self.index.name} ({', '.join(ranges)})"
+
+class Filter(Operator):
+    """ Passes through the rows for which the predicate returns True. """
+    def __init__(self, child, predicate, description=None):
+        super().__init__(child.column_names, [child])
+        self.predicate = predicate # Callable taking a row and returning bool
+        self.description = description # Condition checked by the predicate, as text
+
+    def describe(self):
+        return f"Filter ({self.description})" if self.description else "Filter"
+
+    def rows(self):
+        predicate = self.predicate
+        for row in self.children[0]:
+            if predicate(row):
+                yield row
+
+class HashJoin(Operator):
+    """
+    Joins two inputs on equality of key columns.
+    The right input is read once into a hash table (build phase); left rows are then streamed and
+    each one only probes for its matching right rows (probe phase). NULL keys never match.
+    """
+    def __init__(self, left, right, join_keys):
+        super().__init__(left.column_names + right.column_names, [left, right])
+        self.join_keys = join_keys # List of ('table.column' of left input, 'table.column' of right input)
+        self.left_key_positions = [left.column_position(left_key) for left_key, _ in join_keys]
+        self.right_key_positions = [right.column_position(right_key) for _, right_key in join_keys]
+
+    def describe(self):
+        return f"HashJoin ({' and '.join(f'{left_key} = {right_key}' for left_key, right_key in self.join_keys)})"
+
+    def rows(self):
+        left, right = self.children
+
+        # Build phase
+        hash_table = {}
+        for row in right:
+            key = tuple(row[position] for position in self.right_key_positions)
+            if None not in key:
+                hash_table.setdefault(key, []).append(row)
+
+        # Probe phase
+        for row in left:
+            key = tuple(row[position] for position in self.left_key_positions)
+            for matching_row in hash_table.get(key, ()):
+                yield row + matching_row
+
+class NestedLoopJoin(Operator):
+    """ Generates the cartesian product of two inputs. The right input is read once and kept for the inner loop. """
+    def __init__(self, left, right):
+        super().__init__(left.column_names + right.column_names, [left, right])
+
+    def rows(self):
+        left, right = self.children
+        right_rows = None
+        for left_row in left:
+            if right_rows is None:
+                right_rows = list(right) # Read inner input only if the outer input is not empty
+            for right_row in right_rows:
+                yield left_row + right_row
+
+class Project(Operator):
+    """ Keeps the given columns of each row, in the given order. """
+    def __init__(self, child, column_names):
+        positions = [child.column_position(column_name) for column_name in column_names]
+        if isinstance(child, Project):
+            # Projection of a projection: take the values from the input of the child at once
+            positions = [child.positions[position] for position in positions]
+            child = child.children[0]
+        super().__init__(column_names, [child])
+        self.positions = positions
+        self.estimated_rows = child.estimated_rows
+
+    def describe(self):
+        return f"Project ({', '.join(self.column_names)})"
+
+    def rows(self):
+        positions = self.positions
+        for row in self.children[0]:
+            yield tuple(row[position] for position in positions)
+
+class HashAggregate(Operator):
+    """
+    Groups the rows of its input by the values of the group columns and computes aggregate functions per group.
+
+    Input rows are streamed once: each row only updates the running state (count, sum, min or max) of its
+    group in a hash table, so memory holds one entry per group instead of the rows themselves.
+    Without group columns, the whole input is one group and exactly one row is produced (even for an empty input).
+    NULL values are ignored by the aggregate functions, except by COUNT(*).
+    """
+    def __init__(self, child, group_column_names, aggregates):
+        super().__init__(list(group_column_names) + [label for label, _, _ in aggregates], [child])
+        self.group_column_names = list(group_column_names)
+        self.aggregate_labels = [label for label, _, _ in aggregates]
+        self.estimated_rows = child.estimated_rows if len(group_column_names) > 0 else 1 # At most one row per input row
+        self.group_positions = [child.column_position(column_name) for column_name in group_column_names]
+        # (function name, position of its argument or None for COUNT(*)) for each aggregate
+        self.aggregate_functions = [(function, None if argument is None else child.column_position(argument))
+                                    for _, function, argument in aggregates]
+
+    def describe(self):
+        if len(self.group_column_names) == 0:
+            return f"HashAggregate ({', '.join(self.aggregate_labels)})"
+        return f"HashAggregate (group by {', '.join(self.group_column_names)}; {', '.join(self.aggregate_labels)})"
+
+    def rows(self):
+        group_positions = self.group_positions
+        aggregate_functions = self.aggregate_functions
+
+        # Accumulate phase: one list of running states per group (count, or [count, sum], or current min/max)
+        groups = {}
+        for row in self.children[0]:
+            key = tuple(row[position] for position in group_positions)
+            states = groups.get(key)
+            if states is None:
+                states = groups[key] = [initial_state(function) for function, _ in aggregate_functions]
+            for i, (function, position) in enumerate(aggregate_functions):
+                if position is None:
+                    states[i] += 1 # COUNT(*)
+                    continue
+                value = row[position]
+                if value is None:
+                    continue
+                if function == "count":
+                    states[i] += 1
+                elif function == "sum" or function == "avg":
+                    state = states[i]
+                    state[0] += 1
+                    state[1] += value
+                elif function == "min":
+                    if states[i] is None or value < states[i]:
+                        states[i] = value
+                elif states[i] is None or value > states[i]: # max
+                    states[i] = value
+
+        if len(groups) == 0 and len(group_positions) == 0:
+            groups[()] = [initial_state(function) for function, _ in aggregate_functions] # Aggregate of no rows
+
+        # Output phase: one row per group
+        for key, states in groups.items():
+            yield key + tuple(final_value(function, state) for (function, _), state in zip(aggregate_functions, states))
+
+def initial_state(function):
+    """ Returns the running state of an aggregate function before any value. """
+    if function == "count":
+        return 0
+    elif function == "sum" or function == "avg":
+        return [0, 0] # Number of values, sum of values
+    return None # min, max: no value yet
+
+def final_value(function, state):
+    """ Returns the value of an aggregate function given its running state (NULL if there was no value, except for COUNT). """
+    if function == "sum":
+        return state[1] if state[0] > 0 else None
+    elif function == "avg":
+        return state[1] / state[0] if state[0] > 0 else None
+    return state
+
+class Distinct(Operator):
+    """ Passes through the first occurrence of each row. Rows are produced as soon as they are read. """
+    def __init__(self, child):
+        super().__init__(child.column_names, [child])
+        self.estimated_rows = child.estimated_rows
+
+    def rows(self):
+        seen = set()
+        for row in self.children[0]:
+            if row not in seen:
+                seen.add(row)
+                yield row
+
+class Sort(Operator):
+    """
+    Orders the rows of its input by sort keys (external merge sort).
+
+    Rows are sorted in memory up to the memory budget. A larger input is cut into sorted runs written
+    to temporary files, which are then merged (k-way merge reading each run sequentially), so the input
+    may be larger than the memory. NULL is greater than any value: last in ascending order, first in descending order.
+    """
+    def __init__(self, child, sort_keys, memory_budget=DEFAULT_SORT_MEMORY):
+        super().__init__(child.column_names, [child])
+        self.sort_keys = sort_keys # List of ('table_name.column' or aggregate label, descending)
+        self.memory_budget = memory_budget
+        self.estimated_rows = child.estimated_rows
+        self.sort_key = get_sort_key_function([(child.column_position(column_name), descending) for column_name, descending in sort_keys])
+
+    def describe(self):
+        return f"Sort ({format_sort_keys(self.sort_keys)})"
+
+    def rows(self):
+        sort_key = self.sort_key
+        rows = iter(self.children[0])
+        first_rows = list(islice(rows, SPILL_CHUNK_ROWS))
+        if len(first_rows) == 0:
+            return
+        run_rows = max(SPILL_CHUNK_ROWS, self.memory_budget // estimate_row_size(first_rows[0]))
+
+        run = first_rows + list(islice(rows, run_rows - len(first_rows)))
+        run.sort(key=sort_key)
+        if len(run) < run_rows:
+            # The whole input fits in memory
+            yield from run
+            return
+
+        # Spill sorted runs of run_rows rows, then merge them
+        run_files = [write_run(run)]
+        del run
+        while True:
+            run = list(islice(rows, run_rows))
+            if len(run) == 0:
+                break
+            run.sort(key=sort_key)
+            run_files.append(write_run(run))
+            del run
+        try:
+            while len(run_files) > MERGE_FAN_IN:
+                # Too many runs to read at once: merge each group of consecutive runs into a single run.
+                # Runs stay in input order, so rows with equal sort keys keep their input order (as sorted()).
+                merged_files = run_files
+                try:
+                    run_files = [write_run(heapq.merge(*[read_run(file) for file in merged_files[start:start + MERGE_FAN_IN]], key=sort_key))
+                                 for start in range(0, len(merged_files), MERGE_FAN_IN)]
+                finally:
+                    for file in merged_files:
+                        file.close()
+            yield from heapq.merge(*[read_run(file) for file in run_files], key=sort_key)
+        finally:
+            for file in run_files:
+                file.close() # Temporary files are deleted when closed
+
+class TopN(Operator):
+    """
+    Produces the first rows of its input in the order of the sort keys (ORDER BY ... LIMIT).
+    Only the count + offset smallest rows seen so far are kept, in a bounded heap, instead of sorting the whole input.
+    """
+    def __init__(self, child, sort_keys, count, offset=0):
+        super().__init__(child.column_names, [child])
+        self.sort_keys = sort_keys # List of ('table_name.column' or aggregate label, descending)
+        self.count = count
+        self.offset = offset
+        self.sort_key = get_sort_key_function([(child.column_position(column_name), descending) for column_name, descending in sort_keys])
+        self.estimated_rows = estimate_limit_rows(child.estimated_rows, count, offset)
+
+    def describe(self):
+        return f"TopN {self.count} offset {self.offset} ({format_sort_keys(self.sort_keys)})"
+
+    def rows(self):
+        if self.count == 0:
+            return
+        first_rows = heapq.nsmallest(self.offset + self.count, self.children[0], key=self.sort_key) # Stable, as sorted()
+        yield from first_rows[self.offset:]
+
+class Limit(Operator):
+    """
+    Produces at most count rows of its input, after skipping offset rows.
+    The input stops being read once the last row is produced: its iterators are closed, which closes the
+    cursors of its scans without reading their remaining records.
+    """
+    def __init__(self, child, count, offset=0):
+        super().__init__(child.column_names, [child])
+        self.count = count
+        self.offset = offset
+        self.estimated_rows = estimate_limit_rows(child.estimated_rows, count, offset)
+
+    def describe(self):
+        return f"Limit {self.count} offset {self.offset}"
+
+    def rows(self):
+        rows = iter(self.children[0])
+        try:
+            yield from islice(rows, self.offset, self.offset + self.count)
+        finally:
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close() # Generator of the child operator: closes its own children in turn
+
+def estimate_limit_rows(input_rows, count, offset):
+    """ Returns the number of rows expected from LIMIT count OFFSET offset (count if the input is not estimated). """
+    if input_rows is None:
+        return count
+    return min(count, max(0, input_rows - offset))
+
+def format_plan(operator, depth=0, details=None):
+    """
+    Formats an operator tree for EXPLAIN, one line per operator (children indented below their parent).
+
+    Parameters:
+    operator (Operator): The root of the tree.
+    depth (int): The indentation level of the root.
+    details (callable or None): Returns text appended to the line of an operator (ex. measures of EXPLAIN ANALYZE).
+
+    Returns:
+    list of str: Ex. ["Project (a.id) (rows=10)", "  -> TableScan a (rows=10)"].
+    """
+    line = operator.describe()
+    if operator.estimated_rows is not None:
+        line += f" (rows={max(1, round(operator.estimated_rows)) if operator.estimated_rows > 0 else 0})" # A row unless none is expected
+    if details is not None:
+        line += " " + details(operator)
+    lines = [line if depth == 0 else "  " * depth + "-> " + line]
+    for child in operator.children:
+        lines.extend(format_plan(child, depth + 1, details))
+    return lines
+
+def format_sort_keys(sort_keys):
+    return ", ".join(f"{column_name} desc" if descending else column_name for column_name, descending in sort_keys)
+
+def format_literal(value):
+    """ Formats a typed value as a SQL literal (shown by EXPLAIN). """
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return f"'{value}'"
+    return str(value) # int, or date as YYYY-MM-DD
+
+class Descending:
+    """ Sort key wrapper reversing the order of a value (used for DESC keys of any type). """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+def get_sort_key_function(positions):
+    """
+    Returns the function computing the sort key of a row.
+
+    Parameters:
+    - positions (list of tuple): (position of the sorted value in the rows, descending) for each sort key.
+    """
+    def ascending_key(value):
+        return (value is None, value) # NULL after any value; two NULLs are equal (None == None)
+
+    if not any(descending for _, descending in positions):
+        if len(positions) == 1:
+            position = positions[0][0]
+            return lambda row: ascending_key(row[position])
+        return lambda row: tuple([ascending_key(row[position]) for position, _ in positions])
+    return lambda row: tuple([Descending(ascending_key(row[position])) if descending else ascending_key(row[position])
+                              for position, descending in positions])
+
+def estimate_row_size(row):
+    """ Returns an estimate of the memory used by a row and its values, in bytes. """
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+def write_run(rows):
+    """ Writes rows in order to a new temporary file (in chunks of pickled rows) and returns the file. """
+    file = tempfile.TemporaryFile()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, SPILL_CHUNK_ROWS))
+        if len(chunk) == 0:
+            break
+        pickle.dump(chunk, file, pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+def read_run(file):
+    """ Generates the rows of a run file written by write_run, reading one chunk at a time. """
+    while True:
+        try:
+            chunk = pickle.load(file)
+        except EOFError:
+            return
+        yield from chunk
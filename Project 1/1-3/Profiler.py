@@ -0,0 +1,208 @@
+import time
+import tracemalloc
+from Executor import Operator
+
+# Cursor methods reading an entry (each call is a cursor step)
+CURSOR_READ_METHODS = {"first", "last", "next", "prev", "next_dup", "current", "set", "set_range", "get_both", "get", "pget"}
+# Database methods reading an entry (each call is a get)
+DB_READ_METHODS = {"get", "pget", "exists"}
+
+class AccessCounters:
+    """ Accesses to BerkeleyDB made while EXPLAIN ANALYZE runs a statement. """
+    def __init__(self):
+        self.gets = 0           # Lookups of a key (DB.get, DB.pget, DB.exists)
+        self.cursor_steps = 0   # Cursor positionings and moves
+        self.bytes_decoded = 0  # Bytes of the records read from tables (each one is decoded by RowCodec)
+
+    def snapshot(self):
+        return (self.gets, self.cursor_steps, self.bytes_decoded)
+
+    def wrap(self, handle, holds_records):
+        """ Returns a handle counting the accesses to the given database handle (see Database.count_accesses). """
+        return CountingDB(handle, self, holds_records)
+
+    def count_read(self, result, holds_records):
+        """ Adds the record bytes of an entry read from a database (DB.pget and cursor pget return (key, primary key, record)). """
+        if result is None or isinstance(result, bool):
+            return
+        if isinstance(result, tuple):
+            if len(result) == 3:
+                self.bytes_decoded += len(result[2])
+            elif holds_records:
+                self.bytes_decoded += len(result[-1])
+        elif holds_records:
+            self.bytes_decoded += len(result)
+
+class CountingDB:
+    """ Database handle counting its gets and the steps of its cursors. Other methods are those of the wrapped handle. """
+    def __init__(self, handle, counters, holds_records):
+        self.handle = handle
+        self.counters = counters
+        self.holds_records = holds_records # Whether the entries of the database are table records
+
+    def __getattr__(self, name):
+        attribute = getattr(self.handle, name)
+        if name not in DB_READ_METHODS:
+            return attribute
+        def read(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            self.counters.gets += 1
+            self.counters.count_read(result, self.holds_records)
+            return result
+        return read
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self.handle.cursor(*args, **kwargs), self.counters, self.holds_records)
+
+class CountingCursor:
+    """ Cursor counting its steps. Other methods are those of the wrapped cursor. """
+    def __init__(self, cursor, counters, holds_records):
+        self.cursor = cursor
+        self.counters = counters
+        self.holds_records = holds_records
+
+    def __getattr__(self, name):
+        attribute = getattr(self.cursor, name)
+        if name not in CURSOR_READ_METHODS:
+            return attribute
+        def read(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            self.counters.cursor_steps += 1
+            self.counters.count_read(result, self.holds_records)
+            return result
+        return read
+
+class ProfiledOperator(Operator):
+    """
+    Runs an operator of a plan and measures each call producing one of its rows: wall time, BerkeleyDB accesses
+    and peak traced memory. Measures include the calls to the children of the operator (which are profiled as well).
+    """
+    def __init__(self, operator, profiler):
+        super().__init__(operator.column_names, operator.children)
+        self.operator = operator
+        self.profiler = profiler
+        self.estimated_rows = operator.estimated_rows
+        self.rows_out = 0
+        self.time = 0.0                 # Seconds
+        self.accesses = (0, 0, 0)       # (gets, cursor steps, bytes decoded)
+        self.peak_memory = 0            # Bytes
+
+    def describe(self):
+        return self.operator.describe()
+
+    def rows(self):
+        profiler = self.profiler
+        rows = self.operator.rows()
+        try:
+            while True:
+                start = profiler.enter()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    break
+                finally:
+                    self.add_measures(start, profiler.exit())
+                self.rows_out += 1
+                yield row
+        finally:
+            rows.close() # Stopped early (ex. LIMIT): closes the cursors of the children
+
+    def add_measures(self, start, end):
+        start_time, start_accesses = start
+        end_time, end_accesses, peak_memory = end
+        self.time += end_time - start_time
+        self.accesses = tuple(total + end - begin for total, begin, end in zip(self.accesses, start_accesses, end_accesses))
+        self.peak_memory = max(self.peak_memory, peak_memory)
+
+    def format_actuals(self):
+        """ Formats the measures of the operator: its own accesses (without those of its children) and its time including its children. """
+        own_accesses = list(self.accesses)
+        for child in self.children:
+            own_accesses = [own - child_access for own, child_access in zip(own_accesses, child.accesses)]
+        rows_in = f", rows in={sum(child.rows_out for child in self.children)}" if len(self.children) > 0 else ""
+        return format_actuals(self.rows_out, self.time, own_accesses, self.peak_memory, rows_in)
+
+class Profiler:
+    """
+    Measures the execution of a statement for EXPLAIN ANALYZE.
+
+    While the profiler is active (with statement), BerkeleyDB accesses are counted and Python memory allocations
+    are traced by tracemalloc, which slows down execution: times are comparable between operators and statements
+    run with EXPLAIN ANALYZE, not with those of the statement run on its own.
+    """
+    def __init__(self, database):
+        self.database = database
+        self.counters = AccessCounters()
+        self.frames = [] # Peak memory of each profiled call in progress (innermost last)
+        self.started_tracing = False
+        self.time = 0.0
+        self.peak_memory = 0
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        tracemalloc.reset_peak()
+        self.database.access_counters = self.counters
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.time = time.perf_counter() - self.start_time
+        self.database.access_counters = None
+        self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        if self.started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def profile(self, operator):
+        """ Returns the plan whose operators are all profiled (the operators of the plan are modified). """
+        operator.children = [self.profile(child) for child in operator.children]
+        return ProfiledOperator(operator, self)
+
+    def enter(self):
+        """ Starts measuring a call: the peak memory of the statement and of the enclosing call is kept before the peak is reset for this one. """
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        self.peak_memory = max(self.peak_memory, peak_memory)
+        if len(self.frames) > 0:
+            self.frames[-1] = max(self.frames[-1], peak_memory)
+        tracemalloc.reset_peak()
+        self.frames.append(0)
+        return time.perf_counter(), self.counters.snapshot()
+
+    def exit(self):
+        """ Ends measuring a call; returns (time, accesses, peak memory of the call). """
+        end_time = time.perf_counter()
+        peak_memory = max(self.frames.pop(), tracemalloc.get_traced_memory()[1])
+        self.peak_memory = max(self.peak_memory, peak_memory)
+        if len(self.frames) > 0:
+            self.frames[-1] = max(self.frames[-1], peak_memory)
+        return end_time, self.counters.snapshot(), peak_memory
+
+    def format_actuals(self, rows_out):
+        """ Formats the measures of the whole statement. """
+        return format_actuals(rows_out, self.time, self.counters.snapshot(), self.peak_memory)
+
+class DiscardedOutput:
+    """ Output stream counting the characters written to it (EXPLAIN ANALYZE formats the result rows without printing them). """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, text):
+        self.size += len(text)
+
+    def flush(self):
+        pass
+
+def format_actuals(rows_out, seconds, accesses, peak_memory, rows_in=""):
+    gets, cursor_steps, bytes_decoded = accesses
+    return (f"(actual rows={rows_out}{rows_in}, time={seconds * 1000:.3f} ms, gets={gets}, cursor steps={cursor_steps}, "
+            f"bytes decoded={bytes_decoded}, peak memory={format_memory(peak_memory)})")
+
+def format_memory(size):
+    """ Formats a number of bytes (ex. "512 B", "1.5 KiB", "12.0 MiB"). """
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / (1024 * 1024):.1f} MiB"
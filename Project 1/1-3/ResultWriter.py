@@ -0,0 +1,136 @@
+import csv
+import json
+from itertools import islice
+
+NULL = "null"
+
+ROWS_PER_WRITE = 1000   # Rows formatted before each write to the output stream
+ALIGN_SAMPLE_ROWS = 1000 # Rows read to compute the column widths of the aligned table
+
+class ResultWriter:
+    """
+    Writes the rows of a query result to an output stream.
+
+    Rows are formatted in chunks and each chunk is written with a single call, so the cost per row is
+    only its formatting. Rows are consumed as they are produced: a result is never materialized
+    (except the first rows of the aligned table, to compute its column widths).
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, column_names, rows):
+        """
+        Writes a result.
+
+        Parameters:
+        - column_names (list of str): Names of the result columns ('table_name.column').
+        - rows (iterable of tuple): Result rows; values are int, datetime.date, str or None for NULL.
+        """
+        header = self.format_header(column_names)
+        if header:
+            self.stream.write(header)
+        format_row = self.get_row_formatter(column_names)
+        rows = iter(rows)
+        while True:
+            chunk = [format_row(row) for row in islice(rows, ROWS_PER_WRITE)]
+            if len(chunk) == 0:
+                break
+            self.stream.write("".join(chunk))
+        footer = self.format_footer(column_names)
+        if footer:
+            self.stream.write(footer)
+        self.stream.flush()
+
+    def format_header(self, column_names):
+        return ""
+
+    def format_footer(self, column_names):
+        return ""
+
+    def get_row_formatter(self, column_names):
+        """ Returns the function formatting a row into a line of output (ending with a newline). """
+        raise NotImplementedError
+
+class TableWriter(ResultWriter):
+    """ Default output: a tab separated table between horizontal lines. """
+    LINE = "+--------------------------------------+\n"
+
+    def format_header(self, column_names):
+        return self.LINE + "|" + "\t|".join(column_names) + "\t|\n" + self.LINE
+
+    def format_footer(self, column_names):
+        return self.LINE
+
+    def get_row_formatter(self, column_names):
+        return lambda row: "|" + "\t|".join([format_value(value) for value in row]) + "\t|\n"
+
+class AlignedWriter(ResultWriter):
+    """
+    Table whose columns are padded to the width of their values.
+    Widths are computed from the header and the first rows; longer values of later rows widen their cell only.
+    """
+    def write(self, column_names, rows):
+        rows = iter(rows)
+        sample = list(islice(rows, ALIGN_SAMPLE_ROWS))
+        self.widths = [len(column_name) for column_name in column_names]
+        for row in sample:
+            for position, value in enumerate(row):
+                self.widths[position] = max(self.widths[position], len(format_value(value)))
+        super().write(column_names, self.chain(sample, rows))
+
+    def chain(self, sample, rows):
+        yield from sample
+        yield from rows
+
+    def format_line(self):
+        return "+" + "+".join("-" * (width + 2) for width in self.widths) + "+\n"
+
+    def format_header(self, column_names):
+        cells = [column_name.ljust(width) for column_name, width in zip(column_names, self.widths)]
+        return self.format_line() + "| " + " | ".join(cells) + " |\n" + self.format_line()
+
+    def format_footer(self, column_names):
+        return self.format_line()
+
+    def get_row_formatter(self, column_names):
+        widths = self.widths
+        def format_row(row):
+            cells = []
+            for value, width in zip(row, widths):
+                text = format_value(value)
+                cells.append(text.rjust(width) if isinstance(value, int) else text.ljust(width)) # Numbers are right aligned
+            return "| " + " | ".join(cells) + " |\n"
+        return format_row
+
+class CsvWriter(ResultWriter):
+    """ Comma separated values with a header line. NULL is an empty field (as read by LOAD). """
+    def write(self, column_names, rows):
+        writer = csv.writer(self.stream, lineterminator="\n")
+        writer.writerow(column_names)
+        rows = iter(rows)
+        while True:
+            chunk = [["" if value is None else value for value in row] for row in islice(rows, ROWS_PER_WRITE)]
+            if len(chunk) == 0:
+                break
+            writer.writerows(chunk) # Dates are written as YYYY-MM-DD by str()
+        self.stream.flush()
+
+class JsonLinesWriter(ResultWriter):
+    """ One JSON object per row (key: column name). NULL is null and dates are "YYYY-MM-DD" strings. """
+    def get_row_formatter(self, column_names):
+        encoder = json.JSONEncoder(default=str, ensure_ascii=False)
+        return lambda row: encoder.encode(dict(zip(column_names, row))) + "\n"
+
+# Output formats selectable with --output
+RESULT_WRITERS = {
+    "table": TableWriter,
+    "aligned": AlignedWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonLinesWriter,
+}
+
+def format_value(value):
+    """ Formats a typed record value for printing (NULL as "null", dates as YYYY-MM-DD). """
+    if value is None:
+        return NULL
+    return str(value)
@@ -0,0 +1,156 @@
+import struct
+from datetime import date
+
+ROW_FORMAT_VERSION = 1 # First byte of every binary row (rows of older versions are JSON and start with "{")
+
+# Field kinds
+INT_FIELD = 0
+DATE_FIELD = 1
+CHAR_FIELD = 2
+
+INT_STRUCT = struct.Struct("<q")    # 8-byte signed integer
+DATE_STRUCT = struct.Struct("<i")   # Day ordinal (date.toordinal())
+LENGTH_STRUCT = struct.Struct("<I") # Length prefix of char values (in bytes)
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+class RowCodec:
+    """
+    Schema-driven binary encoding of table rows.
+
+    Row layout: version byte | null bitmap (1 bit per column) | non-null fields in column order
+    - int: 8-byte signed integer
+    - date: 4-byte day ordinal
+    - char(n): 4-byte length prefix followed by the utf-8 encoded value
+
+    Values are Python objects: int, datetime.date, str, or None for NULL.
+    """
+    def __init__(self, schema):
+        self.kinds = []
+        for column in schema.columns:
+            if column.data_type == "int":
+                self.kinds.append(INT_FIELD)
+            elif column.data_type == "date":
+                self.kinds.append(DATE_FIELD)
+            else:
+                self.kinds.append(CHAR_FIELD)
+        self.column_count = len(self.kinds)
+        self.bitmap_size = (self.column_count + 7) // 8
+
+    def encode(self, values):
+        """
+        Encodes a row into bytes.
+
+        Parameters:
+        - values (list): Column values in the order of the table definition (None for NULL).
+
+        Returns:
+        - bytes: Encoded row.
+        """
+        null_bitmap = bytearray(self.bitmap_size)
+        fields = []
+        for position, (kind, value) in enumerate(zip(self.kinds, values)):
+            if value is None:
+                null_bitmap[position >> 3] |= 1 << (position & 7)
+            elif kind == INT_FIELD:
+                fields.append(INT_STRUCT.pack(value))
+            elif kind == DATE_FIELD:
+                fields.append(DATE_STRUCT.pack(value.toordinal()))
+            else:
+                encoded = value.encode('utf-8')
+                fields.append(LENGTH_STRUCT.pack(len(encoded)))
+                fields.append(encoded)
+        return bytes([ROW_FORMAT_VERSION]) + bytes(null_bitmap) + b"".join(fields)
+
+    def decode(self, data, positions=None):
+        """
+        Decodes a row from bytes.
+
+        Parameters:
+        - data (bytes): Encoded row.
+        - positions (set of int or None): Column positions to decode. Other columns are skipped without
+          being converted (left as None). All columns are decoded if None.
+
+        Returns:
+        - list: Column values in the order of the table definition (None for NULL).
+        """
+        values = [None] * self.column_count
+        last_position = self.column_count - 1 if positions is None else max(positions, default=-1)
+        offset = 1 + self.bitmap_size
+        for position in range(last_position + 1):
+            if data[1 + (position >> 3)] & (1 << (position & 7)):
+                continue # NULL value (no field stored)
+            kind = self.kinds[position]
+            wanted = positions is None or position in positions
+            if kind == INT_FIELD:
+                if wanted:
+                    values[position] = INT_STRUCT.unpack_from(data, offset)[0]
+                offset += 8
+            elif kind == DATE_FIELD:
+                if wanted:
+                    values[position] = date.fromordinal(DATE_STRUCT.unpack_from(data, offset)[0])
+                offset += 4
+            else:
+                length = LENGTH_STRUCT.unpack_from(data, offset)[0]
+                offset += 4
+                if wanted:
+                    values[position] = data[offset:offset + length].decode('utf-8')
+                offset += length
+        return values
+
+    def convert_legacy_values(self, schema, record_data):
+        """
+        Converts a JSON row of older versions (all values stored as strings, NULL as "null") into typed values.
+
+        Parameters:
+        - schema (TableSchema): The schema of the table.
+        - record_data (dict): Decoded JSON row (key: column name).
+
+        Returns:
+        - list: Column values in the order of the table definition (None for NULL).
+        """
+        values = []
+        for kind, column_name in zip(self.kinds, schema.column_names):
+            value = record_data.get(column_name, "null")
+            if value == "null":
+                values.append(None)
+            elif kind == INT_FIELD:
+                values.append(int(value))
+            elif kind == DATE_FIELD:
+                try:
+                    values.append(date.fromisoformat(value))
+                except ValueError:
+                    values.append(None) # Older versions accepted invalid dates such as 2024-13-01
+            else:
+                values.append(value)
+        return values
+
+# Order-preserving encoding of index keys: byte-wise comparison of encoded keys (BerkeleyDB BTREE default)
+# gives the same order as comparing the values column by column.
+SORTABLE_INT_STRUCT = struct.Struct(">Q")  # Big-endian, sign bit flipped (value + 2^63)
+SORTABLE_DATE_STRUCT = struct.Struct(">I") # Big-endian day ordinal
+
+def encode_sortable_value(kind, value):
+    """
+    Encodes a non-NULL value so that encodings sort like the values.
+    Encodings are prefix-free (an encoded value is never the start of another), so values of
+    several columns can be concatenated into one key.
+
+    Parameters:
+    - kind (int): INT_FIELD, DATE_FIELD or CHAR_FIELD.
+    - value (int, date or str): The value to encode.
+
+    Returns:
+    - bytes: Encoded value.
+    """
+    if kind == INT_FIELD:
+        return SORTABLE_INT_STRUCT.pack(value - INT_MIN)
+    elif kind == DATE_FIELD:
+        return SORTABLE_DATE_STRUCT.pack(value.toordinal())
+    # char: 0x00 bytes escaped as 0x00 0xFF, terminated by 0x00 0x00 (sorts before any longer string)
+    return value.encode('utf-8').replace(b"\x00", b"\x00\xff") + b"\x00\x00"
+
+def encode_index_key(kinds, values):
+    """ Encodes the values of the indexed columns (none of them NULL) into an index key. """
+    return b"".join(encode_sortable_value(kind, value) for kind, value in zip(kinds, values))
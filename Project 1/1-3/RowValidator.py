@@ -0,0 +1,112 @@
+import re
+from datetime import date
+from RowCodec import INT_MIN, INT_MAX
+from CustomException import *
+
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+class RowValidator:
+    """
+    Converts the values given for the columns of an INSERT, LOAD or UPDATE into a typed table row.
+
+    The conversion function and constraints of each column are looked up once per statement,
+    so each row is only converted value by value.
+    """
+    def __init__(self, schema, column_names, type_mismatch_message=Message.INSERT_TYPE_MISMATCH_ERROR,
+                 non_nullable_message=Message.INSERT_COLUMN_NON_NULLABLE_ERROR):
+        """
+        Parameters:
+        - schema (TableSchema): The schema of the table.
+        - column_names (list of str): The columns receiving the values of each row, in the order of the values.
+          Other columns are set to NULL.
+        - type_mismatch_message (str): Error message for a value not matching the column type (or count of values).
+        - non_nullable_message (str): Error message for NULL given to a non-nullable column ('{}' is the column name).
+        """
+        self.type_mismatch_message = type_mismatch_message
+        self.non_nullable_message = non_nullable_message
+        self.column_names = column_names
+        self.column_count = len(schema.columns)
+        self.positions = [schema.column_positions[column_name] for column_name in column_names]
+        self.columns = [schema.get_column(column_name) for column_name in column_names]
+        self.literal_converters = [self.get_literal_converter(column) for column in self.columns]
+        self.field_converters = [self.get_field_converter(column) for column in self.columns]
+
+    def convert_literals(self, literals):
+        """
+        Converts the values of an INSERT ... VALUES list.
+
+        Parameters:
+        - literals (list of str or None): Lowercased value literals as written in the query (ex. "12", "'abc'",
+          "2024-01-01"), None for NULL.
+
+        Returns:
+        - list: Column values in the order of the table definition (None for NULL).
+        """
+        return self.convert(literals, self.literal_converters, lambda literal: literal is None)
+
+    def convert_fields(self, fields):
+        """
+        Converts the fields of a line of a delimited file (LOAD). Empty fields and "null" are NULL.
+
+        Parameters:
+        - fields (list of str): Field texts, unquoted.
+
+        Returns:
+        - list: Column values in the order of the table definition (None for NULL).
+        """
+        return self.convert(fields, self.field_converters, lambda field: field == "" or field.lower() == "null")
+
+    def convert(self, texts, converters, is_null):
+        # Check whether number of columns and inserted values match before proceeding
+        if len(texts) != len(self.columns):
+            raise CustomException(Message.get_message(self.type_mismatch_message))
+
+        row = [None] * self.column_count
+        for position, column, converter, text in zip(self.positions, self.columns, converters, texts):
+            if is_null(text):
+                if not column.is_nullable():
+                    raise CustomException(Message.get_message(self.non_nullable_message, column.name))
+            else:
+                try:
+                    row[position] = converter(text)
+                except ValueError:
+                    raise CustomException(Message.get_message(self.type_mismatch_message))
+        return row
+
+    def get_literal_converter(self, column):
+        """ Returns the function converting a query literal into a value of the column type. """
+        if column.data_type == "int":
+            return convert_int
+        elif column.data_type == "date":
+            return convert_date
+
+        max_length = column.char_length()
+        def convert_char(literal):
+            # Only string literals can be inserted into char columns; truncate to max length
+            if (literal.startswith("'") and literal.endswith("'")) or (literal.startswith('"') and literal.endswith('"')):
+                return literal.strip('\'"')[:max_length]
+            raise ValueError(literal)
+        return convert_char
+
+    def get_field_converter(self, column):
+        """ Returns the function converting a field of a delimited file into a value of the column type. """
+        if column.data_type == "int":
+            return lambda field: convert_int(field.strip())
+        elif column.data_type == "date":
+            return lambda field: convert_date(field.strip())
+
+        max_length = column.char_length()
+        return lambda field: field.lower()[:max_length] # Char values are stored lowercased, as in INSERT
+
+def convert_int(text):
+    """ Converts text into an int value (stored as 8-byte integer). Raises ValueError if it is not one. """
+    value = int(text)
+    if not INT_MIN <= value <= INT_MAX:
+        raise ValueError(text)
+    return value
+
+def convert_date(text):
+    """ Converts YYYY-MM-DD text into a date value. Raises ValueError if it is not a valid date. """
+    if not DATE_PATTERN.match(text):
+        raise ValueError(text)
+    return date.fromisoformat(text)
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from lark import Tree, Token
+from lark.lexer import LexerThread
+
+# Terminals holding literal values, lifted out of statements as parameters
+LITERAL_TOKEN_TYPES = {"INT", "STR", "DATE"}
+
+DEFAULT_CAPACITY = 256 # Number of distinct statement shapes kept
+
+class Statement:
+    """ A parsed statement and the resolved state its execution may reuse (see StatementCache). """
+    def __init__(self, tree, plan):
+        self.tree = tree  # Parse tree of the statement
+        self.plan = plan  # dict shared by all statements of the same shape (ex. resolved column names)
+
+class StatementCache:
+    """
+    LRU cache of parsed statements keyed by normalized statement text.
+
+    Statements are normalized by their token sequence: whitespace is dropped and the values of
+    literal tokens (INT, STR, DATE) are lifted out as parameters. As the parser only looks at the
+    type of literal tokens, statements of the same shape have the same parse tree up to their literals
+    (ex. "insert into t values (1, 'a')" and "insert into t values (2,'b')" differ only by literals).
+    A repeated shape is then only lexed, and its cached tree is bound to the new literals.
+
+    Each entry also holds a plan dict where statement execution keeps resolved state (ex. column
+    positions of an INSERT). Entries are dropped once the catalog changes (tables or indexes created,
+    dropped or rolled back), since that state depends on the table schemas.
+    """
+    def __init__(self, parser, capacity=DEFAULT_CAPACITY):
+        self.parser = parser      # Lark parser with a basic (context-free) lexer
+        self.lexer = parser.parser.lexer # Lexer of the parser (Lark.lex would build a new one on each call with LALR)
+        self.capacity = capacity
+        self.entries = OrderedDict() # key: normalized token sequence, value: (parse tree, plan, catalog version)
+
+    def get(self, query, catalog_version):
+        """
+        Parses a statement, reusing the cached parse tree of a statement of the same shape.
+
+        Parameters:
+        - query (str): The statement text.
+        - catalog_version (int): The current version of the catalog (see Catalog.version).
+
+        Returns:
+        - Statement: The parse tree and plan of the statement.
+
+        Raises:
+        - lark.exceptions.UnexpectedInput: If the statement has a syntax error (never cached).
+        """
+        tokens = list(LexerThread.from_text(self.lexer, query).lex(None))
+        literals = [token for token in tokens if token.type in LITERAL_TOKEN_TYPES]
+        key = tuple(token.type if token.type in LITERAL_TOKEN_TYPES else (token.type, token.value) for token in tokens)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] == catalog_version:
+            self.entries.move_to_end(key)
+            return Statement(bind_literals(entry[0], iter(literals)), entry[1])
+
+        tree = self.parser.parse(query)
+        if count_literals(tree) == len(literals): # Every literal token is kept in the tree
+            self.entries[key] = (tree, {}, catalog_version)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False) # Evict the least recently used shape
+            return Statement(tree, self.entries[key][1])
+        return Statement(tree, {})
+
+    def clear(self):
+        self.entries.clear()
+
+def bind_literals(node, literals):
+    """ Returns a copy of a parse tree whose literal tokens are replaced, in order, by the given tokens. """
+    if isinstance(node, Tree):
+        return Tree(node.data, [bind_literals(child, literals) for child in node.children])
+    if isinstance(node, Token) and node.type in LITERAL_TOKEN_TYPES:
+        return next(literals)
+    return node # Other tokens (same as in the statement) and None placeholders are shared
+
+def count_literals(node):
+    """ Returns the number of literal tokens in a parse tree. """
+    if isinstance(node, Tree):
+        return sum(count_literals(child) for child in node.children)
+    return 1 if isinstance(node, Token) and node.type in LITERAL_TOKEN_TYPES else 0
@@ -0,0 +1,86 @@
+import re
+
+# Characters changing the state of the splitter: statement separator, quotes and escape character
+SPECIAL_CHARACTERS = re.compile(r"[;'\"\\]")
+
+class StatementSplitter:
+    """
+    Splits SQL text into statements ending with ";".
+
+    A ";" inside a string literal ('...' or "...", where a quote preceded by a backslash does not
+    end the literal, as in grammar.lark) does not end a statement. Text can be fed in pieces of any
+    size (lines of interactive input, chunks of a script file): a statement or a string literal may
+    span several pieces.
+    """
+    def __init__(self):
+        self.pending = []     # Pieces of text of the statement not ended yet
+        self.quote = None     # Quote character of the string literal being read, or None
+        self.escaped = False  # Whether the previous character was a backslash inside a string literal
+
+    def feed(self, text):
+        """
+        Adds text to split.
+
+        Parameters:
+        - text (str): The next piece of text.
+
+        Returns:
+        - list of str: The statements ended in this piece, each including its ";".
+        """
+        statements = []
+        start = 0     # Start of the statement text not added to pending yet
+        position = 0
+        while position < len(text):
+            if self.escaped:
+                self.escaped = False
+                position += 1 # Escaped character is part of the string literal
+                continue
+            match = SPECIAL_CHARACTERS.search(text, position)
+            if match is None:
+                break
+            character = match.group()
+            position = match.end()
+            if self.quote is not None:
+                if character == "\\":
+                    self.escaped = True
+                elif character == self.quote:
+                    self.quote = None # End of string literal
+            elif character in "'\"":
+                self.quote = character # Start of string literal
+            elif character == ";":
+                self.pending.append(text[start:position])
+                statements.append("".join(self.pending))
+                self.pending = []
+                start = position
+        self.pending.append(text[start:])
+        return statements
+
+    def flush(self):
+        """ Returns the text following the last statement (without ";", empty if only whitespace) and clears it. """
+        rest = "".join(self.pending).strip()
+        self.clear()
+        return rest
+
+    def clear(self):
+        """ Drops the text following the last statement. """
+        self.pending = []
+        self.quote = None
+        self.escaped = False
+
+def split_statements(file, chunk_size=65536):
+    """
+    Generates the statements of a SQL script one at a time, reading the file in chunks.
+
+    Parameters:
+    - file (file object): The script, opened in text mode.
+    - chunk_size (int): Number of characters read at once.
+
+    Yields:
+    - str: Each statement, including its ";". Text after the last ";" is yielded last (without ";").
+    """
+    splitter = StatementSplitter()
+    for chunk in iter(lambda: file.read(chunk_size), ""):
+        yield from splitter.feed(chunk)
+    rest = splitter.flush()
+    if rest:
+        yield rest
@@ -0,0 +1,155 @@
+import hashlib
+import heapq
+import json
+import random
+from datetime import date
+
+HISTOGRAM_BUCKETS = 20   # Buckets of the equi-depth histogram of a column
+SAMPLE_SIZE = 10000      # Values of a column sampled to build its histogram
+DISTINCT_SKETCH_SIZE = 1024 # Smallest hashes kept to estimate the number of distinct values (KMV sketch)
+HASH_RANGE = 2 ** 64
+
+class ColumnStatistics:
+    """ Statistics of the values of a column, collected by ANALYZE. """
+    def __init__(self, null_fraction, distinct_count, min_value, max_value, histogram):
+        self.null_fraction = null_fraction    # Fraction of the records holding NULL
+        self.distinct_count = distinct_count  # Estimated number of distinct non-NULL values
+        self.min_value = min_value            # Smallest non-NULL value (None if the column only holds NULL)
+        self.max_value = max_value
+        self.histogram = histogram            # Equi-depth bucket bounds: each bucket holds about the same number of values
+
+    def encode(self):
+        return {"null_fraction": self.null_fraction, "distinct_count": self.distinct_count,
+                "min": encode_value(self.min_value), "max": encode_value(self.max_value),
+                "histogram": [encode_value(value) for value in self.histogram]}
+
+    @classmethod
+    def parse(cls, column_dict, data_type):
+        decode = lambda value: decode_value(value, data_type)
+        return cls(column_dict["null_fraction"], column_dict["distinct_count"], decode(column_dict["min"]),
+                   decode(column_dict["max"]), [decode(value) for value in column_dict["histogram"]])
+
+class TableStatistics:
+    """
+    Statistics of a table: its number of records and the statistics of its columns.
+
+    Stored in the catalog as JSON (ex. '{"row_count": 3, "columns": {"id": {...}}}'). The row count is kept
+    up to date by INSERT, LOAD and DELETE; column statistics are only collected by ANALYZE (empty before).
+    """
+    def __init__(self, row_count, columns=None):
+        self.row_count = row_count        # int
+        self.columns = columns or {}      # key: column name, value: ColumnStatistics
+
+    def encode(self):
+        return json.dumps({"row_count": self.row_count,
+                           "columns": {column_name: column.encode() for column_name, column in self.columns.items()}})
+
+    @classmethod
+    def parse(cls, statistics_str, schema):
+        """
+        Parses a statistics string into a TableStatistics.
+
+        Parameters:
+        - statistics_str (str): The encoded statistics stored in the database.
+        - schema (TableSchema): The schema of the table (types of the column values).
+        """
+        statistics = json.loads(statistics_str)
+        columns = {}
+        for column_name, column_dict in statistics["columns"].items():
+            if schema.has_column(column_name):
+                columns[column_name] = ColumnStatistics.parse(column_dict, schema.get_column_data_type(column_name))
+        return cls(statistics["row_count"], columns)
+
+    def get_column(self, column_name):
+        """ Returns the statistics of the column, or None if the table was not analyzed. """
+        return self.columns.get(column_name)
+
+class StatisticsCollector:
+    """
+    Collects the statistics of a table in a single pass over its records (see add).
+
+    Memory does not grow with the table: distinct values are estimated from the smallest hashes of the values
+    (KMV sketch) and the histograms are built from a fixed-size random sample of each column (reservoir sampling).
+    """
+    def __init__(self, schema):
+        self.column_names = schema.column_names
+        column_count = len(self.column_names)
+        self.row_count = 0
+        self.null_counts = [0] * column_count
+        self.min_values = [None] * column_count
+        self.max_values = [None] * column_count
+        self.value_counts = [0] * column_count    # Non-NULL values seen
+        self.samples = [[] for _ in range(column_count)]
+        self.sketches = [[] for _ in range(column_count)]  # Heaps of the negated smallest hashes
+        self.sketch_hashes = [set() for _ in range(column_count)]
+        self.random = random.Random(0) # Same sample for the same records
+
+    def add(self, values):
+        """ Adds the column values of a record. """
+        self.row_count += 1
+        for position, value in enumerate(values):
+            if value is None:
+                self.null_counts[position] += 1
+                continue
+            if self.min_values[position] is None or value < self.min_values[position]:
+                self.min_values[position] = value
+            if self.max_values[position] is None or value > self.max_values[position]:
+                self.max_values[position] = value
+
+            # Reservoir sampling: each value is kept with probability SAMPLE_SIZE / number of values seen
+            self.value_counts[position] += 1
+            sample = self.samples[position]
+            if len(sample) < SAMPLE_SIZE:
+                sample.append(value)
+            else:
+                slot = self.random.randrange(self.value_counts[position])
+                if slot < SAMPLE_SIZE:
+                    sample[slot] = value
+
+            self.add_to_sketch(position, value)
+
+    def add_to_sketch(self, position, value):
+        """ Keeps the value hash if it is one of the DISTINCT_SKETCH_SIZE smallest distinct hashes seen. """
+        value_hash = int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), "big")
+        sketch, hashes = self.sketches[position], self.sketch_hashes[position]
+        if value_hash in hashes:
+            return
+        if len(sketch) < DISTINCT_SKETCH_SIZE:
+            heapq.heappush(sketch, -value_hash)
+            hashes.add(value_hash)
+        elif value_hash < -sketch[0]:
+            hashes.discard(-heapq.heapreplace(sketch, -value_hash))
+            hashes.add(value_hash)
+
+    def estimate_distinct_count(self, position):
+        sketch = self.sketches[position]
+        if len(sketch) < DISTINCT_SKETCH_SIZE:
+            return len(sketch) # Every distinct value was kept
+        # The k-th smallest of n uniform hashes is about k / n of the hash range
+        estimate = (DISTINCT_SKETCH_SIZE - 1) * HASH_RANGE // -sketch[0]
+        return min(estimate, self.value_counts[position])
+
+    def get_statistics(self):
+        """ Returns the collected TableStatistics. """
+        columns = {}
+        for position, column_name in enumerate(self.column_names):
+            sample = sorted(self.samples[position])
+            histogram = []
+            if len(sample) > 0:
+                bucket_count = min(HISTOGRAM_BUCKETS, len(sample))
+                histogram = [sample[len(sample) * bucket // bucket_count] for bucket in range(bucket_count)]
+                histogram.append(self.max_values[position])
+            null_fraction = self.null_counts[position] / self.row_count if self.row_count > 0 else 0.0
+            columns[column_name] = ColumnStatistics(null_fraction, self.estimate_distinct_count(position),
+                                                    self.min_values[position], self.max_values[position], histogram)
+        return TableStatistics(self.row_count, columns)
+
+def encode_value(value):
+    """ Encodes a column value for JSON (dates as "YYYY-MM-DD"). """
+    return value.isoformat() if isinstance(value, date) else value
+
+def decode_value(value, data_type):
+    """ Decodes a column value encoded by encode_value, given the column data type. """
+    if value is not None and data_type == "date":
+        return date.fromisoformat(value)
+    return value
@@ -0,0 +1,88 @@
+import argparse
+import time
+from lark import Lark
+from StatementCache import StatementCache
+
+# Statements parsed by the throughput benchmark (one of each kind handled by run.py)
+STATEMENTS = [
+    "create table students (id char(10) not null, name char(20), birth date, primary key (id));",
+    "insert into students values ('2020-12345', 'kim', 2001-02-03);",
+    "insert into students (id, name) values ('2020-00001', 'lee'), ('2020-00002', 'park');",
+    "select * from students;",
+    "select s.name, l.title from students as s, lectures as l where s.id = l.s_id and (l.credit > 3 or not l.title = 'db');",
+    "select l.s_id, count(*), avg(l.credit) from lectures as l group by l.s_id having count(*) > 2;",
+    "delete from students where name is null;",
+    "load 'students.csv' into students (id, name) delimiter ';';",
+    "explain students;",
+    "show tables;",
+    "begin transaction;",
+    "commit;",
+]
+
+def read_grammar():
+    with open('grammar.lark') as file:
+        return file.read()
+
+def measure_startup(grammar, repeat):
+    """
+    Measures the construction time of the parser, as done on each start of run.py.
+
+    Returns:
+    - list of tuple: (configuration, seconds per construction)
+    """
+    configurations = [
+        ("earley", dict(lexer="basic")),
+        ("lalr", dict(parser="lalr", lexer="basic")),
+        ("lalr, cache=True", dict(parser="lalr", lexer="basic", cache=True)),
+    ]
+    results = []
+    for name, options in configurations:
+        Lark(grammar, start="command", **options) # Warm up (writes the grammar cache)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            Lark(grammar, start="command", **options)
+        results.append((name, (time.perf_counter() - start) / repeat))
+    return results
+
+def measure_parsing(grammar, count):
+    """
+    Measures the parsing throughput of the statements of STATEMENTS.
+
+    Returns:
+    - list of tuple: (configuration, statements per second)
+    """
+    earley_parser = Lark(grammar, start="command", lexer="basic")
+    lalr_parser = Lark(grammar, start="command", parser="lalr", lexer="basic", cache=True)
+    statement_cache = StatementCache(lalr_parser)
+
+    configurations = [
+        ("earley", earley_parser.parse),
+        ("lalr", lalr_parser.parse),
+        ("lalr + statement cache", lambda query: statement_cache.get(query, 0).tree),
+    ]
+    results = []
+    for name, parse in configurations:
+        start = time.perf_counter()
+        for i in range(count):
+            parse(STATEMENTS[i % len(STATEMENTS)])
+        results.append((name, count / (time.perf_counter() - start)))
+    return results
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Parser startup and throughput benchmark (run from this directory)")
+    arg_parser.add_argument("-n", "--count", type=int, default=5000, help="number of statements to parse (default: 5000)")
+    arg_parser.add_argument("-r", "--repeat", type=int, default=5, help="number of parser constructions (default: 5)")
+    args = arg_parser.parse_args()
+
+    grammar = read_grammar()
+
+    print("Startup (parser construction)")
+    for name, seconds in measure_startup(grammar, args.repeat):
+        print(f"  {name:<24}{seconds * 1000:10.1f} ms")
+
+    print(f"Parsing ({args.count} statements)")
+    for name, throughput in measure_parsing(grammar, args.count):
+        print(f"  {name:<24}{throughput:10.0f} statements/s")
+
+if __name__ == "__main__":
+    main()
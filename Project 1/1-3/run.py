@@ -1,9 +1,23 @@
-from lark import Lark, Transformer, exceptions, Tree
+from lark import Lark, Transformer, exceptions, Tree, Token
 from berkeleydb import db
+from berkeleydb.db import DBError
 from Database import *
+from Catalog import *
+from Executor import *
+from RowValidator import RowValidator
+from StatementCache import StatementCache
+from StatementSplitter import StatementSplitter, split_statements
+from Profiler import Profiler, DiscardedOutput, format_memory
+from ResultWriter import RESULT_WRITERS, TableWriter
+from RowCodec import INT_MIN, INT_MAX
 from CustomException import *
 import re
-from datetime import datetime
+import bisect
+import operator
+import argparse
+import csv
+import sys
+from datetime import datetime, date
 
 # Input Prompt
 PROMPT = "DB_2020-16634> "
@@ -17,6 +31,7 @@ NULL = "null"
 # LOGIC OPERATORS
 AND = "and"
 OR = "or"
+NOT = "not"
 
 # COMPARISON OPERATORS
 GREATER_THAN = ">"
@@ -26,16 +41,45 @@ NOT_EQUAL = "!="
 GREATER_OR_EQUAL = ">="
 LESS_OR_EQUAL = "<="
 
+# Python functions implementing each comparison operator
+COMPARISON_FUNCTIONS = {
+    GREATER_THAN: operator.gt,
+    LESS_THAN: operator.lt,
+    EQUAL: operator.eq,
+    NOT_EQUAL: operator.ne,
+    GREATER_OR_EQUAL: operator.ge,
+    LESS_OR_EQUAL: operator.le,
+}
+
+# Operator giving the same result when the operands are swapped (value < column is column > value)
+FLIPPED_COMPARISON_OPERATORS = {
+    GREATER_THAN: LESS_THAN,
+    LESS_THAN: GREATER_THAN,
+    EQUAL: EQUAL,
+    GREATER_OR_EQUAL: LESS_OR_EQUAL,
+    LESS_OR_EQUAL: GREATER_OR_EQUAL,
+}
+
+# Cardinality estimation (used when statistics are missing, see ANALYZE)
+MAX_DP_TABLES = 8                    # Up to this many tables, the join order is chosen by dynamic programming
+DEFAULT_TABLE_ROWS = 1000            # Records of a table without statistics
+DEFAULT_EQUALITY_SELECTIVITY = 0.1   # Fraction of rows where a column equals a value
+DEFAULT_RANGE_SELECTIVITY = 1 / 3    # Fraction of rows meeting any other comparison
+DEFAULT_NULL_FRACTION = 0.1          # Fraction of rows where a column is NULL
+
 # Declaring Transformer class and transform methods
 class MyTransformer(Transformer):
-    def __init__(self, database):
+    def __init__(self, database, plan=None, result_writer=None, sort_memory=DEFAULT_SORT_MEMORY):
         super().__init__()
         self.db = database
+        self.plan = plan if plan is not None else {} # Resolved state shared by statements of the same shape (see StatementCache)
+        self.result_writer = result_writer if result_writer is not None else TableWriter(sys.stdout) # Output of SELECT results
+        self.sort_memory = sort_memory # Bytes of rows sorted in memory by ORDER BY before spilling to disk
 
     # Helper Functions Handling table_name
     def table_name_exists(self, table_name):
         """
-        Checks if a given table name exists in the database by verifying the presence of its key.
+        Checks if a given table name exists in the database by looking it up in the catalog.
 
         Parameters:
         - table_name (str): The name of the table to check for existence.
@@ -44,36 +88,28 @@ class MyTransformer(Transformer):
         - bool: Returns True if the table exists in the database, 
                 False otherwise.
         """
-        table_key = SCHEMA_KEY_PREFIX + table_name
-        if self.db.key_exists(table_key):
+        if self.get_table_schema(table_name) is not None:
             return True
         else:
             return False
 
     def get_table_schema(self, table_name):
         """
-        Retrieves the schema string for a specified table from the database.
+        Retrieves the parsed schema for a specified table from the catalog.
 
         Parameters:
         - table_name (str): The name of the table whose schema is to be retrieved.
 
         Returns:
-        - str or None: The schema string of the specified table if it exists, or None if the table does not exist or no schema is found. #FIX: integrate with table_name_exists() and table exists error
+        - TableSchema or None: The schema of the specified table if it exists, or None if the table does not exist.
         """
-        table_key = SCHEMA_KEY_PREFIX + table_name
-        schema_str = self.db.get_table_schema(table_key)
-        return schema_str  
+        return self.db.catalog.get_table(table_name)
 
     def get_table_column_names(self, table_name):
         schema = self.get_table_schema(table_name)
         
         # Collect column names from schema 
-        column_names = []
-        for column_def in schema.split("|")[0].split(';'):
-            column_name = column_def.split(":")[0]
-            column_names.append(column_name)
-        
-        return column_names
+        return list(schema.column_names)
 
     # Helper Functions Handling column_name
     def column_exists_in_schema(self, column_name, schema):
@@ -110,11 +146,9 @@ class MyTransformer(Transformer):
         Usage:
         - CREATE: before full schema string is created.
         """
-        schema_str = self.get_table_schema(table_name)
+        schema = self.get_table_schema(table_name)
         
-        column_definitions = schema_str.split("|")[0].split(";")
-        column_names = [col_def.split(":")[0] for col_def in column_definitions]
-        if column_name in column_names:
+        if schema.has_column(column_name):
             return True
         else:
             return False
@@ -134,24 +168,19 @@ class MyTransformer(Transformer):
             if not self.column_exists_in_table_name(column_name, table_name):
                 raise CustomException(Message.get_message(Message.INSERT_COLUMN_EXISTENCE_ERROR, column_name))
 
-    def get_column_data_type(self, schema_str, column_name):
+    def get_column_data_type(self, schema, column_name):
         """
-        Retrieves the data type of a specified column from a schema string.
+        Retrieves the data type of a specified column from a table schema.
 
         Parameters:
-        - schema_str (str): The schema string of the table.
+        - schema (TableSchema): The schema of the table.
         - column_name (str): The name of the column whose data type is to be retrieved.
 
         Returns:
-        - str or None: The data type of the specified column if it is found in the schema string (ie. int, char(#), data)
+        - str or None: The data type of the specified column if it is found in the schema (ie. int, char(#), data)
                         or None if the column does not exist.
         """
-        column_definitions = schema_str.split("|")[0].split(";")
-        for col_def in column_definitions:
-            col_name, col_type, _, _ = col_def.split(":")
-            if col_name == column_name:
-                return col_type
-        return None
+        return schema.get_column_data_type(column_name)
 
     # Helper Functions Handling Primary and Foreign Keys 
     def get_primary_keys(self, table_name):
@@ -163,37 +192,23 @@ class MyTransformer(Transformer):
 
         Returns:
         - list of str: A list of string representing the primary keys of the table.
-
-        Note:
-        This function assumes that the schema string for the table is correctly formatted and includes a section for primary keys prefixed with 'PK:'.
         """
-        schema_str = self.get_table_schema(table_name)
-        
-        primary_keys = schema_str.split("|")[1].lstrip("PK:").split(',')
-
-        if primary_keys == ['']:
-            return []
-        return primary_keys
+        schema = self.get_table_schema(table_name)
+        return list(schema.primary_keys)
     
     # Helper Functions Handling Primary and Foreign Keys 
     def get_foreign_keys(self, table_name):
         """
-        Retrieves the list of foreign key column names for a specified table from the database schema.
+        Retrieves the list of foreign keys for a specified table from the database schema.
 
         Parameters:
         - table_name (str): The name of the table whose foreign keys are to be retrieved.
 
         Returns:
-        - list of str: A list of string representing the foreign keys of the table.
-
-        Note:
-        This function assumes that the schema string for the table is correctly formatted and includes a section for foreign keys prefixed with 'FK:'.
+        - list of ForeignKey: A list of the foreign keys (columns, referenced table and referenced columns) of the table.
         """
-        schema_str = self.get_table_schema(table_name)
-        foreign_keys = schema_str.split("|")[2].lstrip("FK:").split(";")
-        if foreign_keys == ['']:
-            return []
-        return foreign_keys
+        schema = self.get_table_schema(table_name)
+        return list(schema.foreign_keys)
     
     def foreign_key_is_valid(self, foreign_key, foreign_key_definition_list):
         """
@@ -223,21 +238,10 @@ class MyTransformer(Transformer):
         Returns:
         - list of str: A list containing the names of all tables that reference the specified table through foreign keys.
 
-        Note:
-        - Assumed that the schema of each table is properly formatted and includes a section for foreign keys prefixed with 'FK:' 
-        - Assumed that the 'FK:' section contains foreign key details in the format 'key_name:ref_table_name:key_columns'.
         """
         referencing_tables = []
-        for potential_referrer in self.db.get_tables():  # Assume this returns a list of all table names
-            schema_str = self.get_table_schema(potential_referrer)
-            if schema_str:
-                foreign_keys = schema_str.split("|")[2].lstrip("FK:").split(";")
-                for fk in foreign_keys:
-                    # Safely unpack the foreign key information assuming it's well-formed
-                    if fk.count(':') == 2:  # Check that the foreign key string is in the expected format
-                        _, ref_table_name, _ = fk.split(":")
-                        if ref_table_name == table_name: 
-                            referencing_tables.append(potential_referrer)
+        for referencing_table, _ in self.db.catalog.get_referencing_foreign_keys(table_name):
+            referencing_tables.append(referencing_table)
         return referencing_tables
 
     # SQL QUERY FUNCTIONS
@@ -314,7 +318,7 @@ class MyTransformer(Transformer):
                 raise CustomException(Message.get_message(Message.REFERENCE_TABLE_EXISTENCE_ERROR))
 
             # Retrieve schema for the referenced table
-            referenced_schema_str = self.get_table_schema(referenced_table_name)
+            referenced_schema = self.get_table_schema(referenced_table_name)
 
             #Initialize lists to store foreign key and referenced key names
             foreign_key_list = []
@@ -344,7 +348,7 @@ class MyTransformer(Transformer):
             # For each foreign key, check the data type matches with the corresponding primary key in the referenced table
             for fk_column, ref_column in zip(foreign_key_list, referenced_key_list):
                 fk_type = next((col['type'] for col in schema if col['name'] == fk_column), None)
-                ref_type = self.get_column_data_type(referenced_schema_str, ref_column)
+                ref_type = self.get_column_data_type(referenced_schema, ref_column)
                 if fk_type != ref_type:
                     raise CustomException(Message.get_message(Message.REFERENCE_TYPE_ERROR))
 
@@ -405,8 +409,53 @@ class MyTransformer(Transformer):
 
         
     def explain_query(self, items):
-        """ EXPLAIN """
-        self.describe_query(items)
+        """
+        EXPLAIN: describes a table, or prints the plan of a SELECT or DELETE without executing it.
+        EXPLAIN ANALYZE executes the SELECT or DELETE and adds the measures of its execution to the plan (see Profiler).
+        """
+        statement = items[-1]
+        if statement.data == "table_name":
+            self.describe_query(items)
+            return
+        analyze = items[1] is not None
+
+        if statement.data == "select_statement":
+            printed_names, plan = self.build_select_plan(statement.children)
+            if not analyze:
+                plan_lines = format_plan(plan)
+            else:
+                # Result rows are formatted as for printing, but discarded
+                output = DiscardedOutput()
+                with Profiler(self.db) as profiler:
+                    plan = profiler.profile(plan)
+                    type(self.result_writer)(output).write(printed_names, plan)
+                plan_lines = format_plan(plan, details=lambda operator: operator.format_actuals())
+                plan_lines.append(f"Output: {plan.rows_out} row(s), {output.size} character(s) formatted in "
+                                  f"{(profiler.time - plan.time) * 1000:.3f} ms")
+                plan_lines.append(f"Execution time: {profiler.time * 1000:.3f} ms, peak memory: {format_memory(profiler.peak_memory)}")
+        else:
+            table_name, conditions = self.resolve_delete(statement.children)
+            referenced = len(self.db.catalog.get_referencing_foreign_keys(table_name)) > 0
+            if self.delete_truncates(table_name, conditions):
+                # All records are deleted at once, without reading them
+                root_line = f"Delete on {table_name} (truncate) (rows={round(self.estimate_table_rows(table_name))})"
+                plan_lines = []
+            else:
+                table_filters = {} if conditions is None else {table_name: self.split_conjuncts(conditions)}
+                plan = self.scan_table(table_name, table_filters)
+                root_line = f"Delete on {table_name}" + (" (check referencing tables)" if referenced else "")
+                plan_lines = format_plan(plan, 1)
+            if analyze:
+                # Records are read and deleted by the storage layer in a single pass: the statement is measured as a whole
+                with Profiler(self.db) as profiler:
+                    deleted_count = self.execute_delete(table_name, conditions)
+                root_line += " " + profiler.format_actuals(deleted_count)
+            plan_lines.insert(0, root_line)
+
+        print("-------------------------------------------------")
+        for line in plan_lines:
+            print(line)
+        print("-------------------------------------------------")
 
     def desc_query(self, items):
         """ DESC """
@@ -420,254 +469,928 @@ class MyTransformer(Transformer):
         if not self.table_name_exists(table_name):
             raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
 
-        # Receive table data from database
-        schema_str = self.get_table_schema(table_name)
+        # Receive table data from catalog
+        schema = self.get_table_schema(table_name)
 
         # Print 
         print("-------------------------------------------------")
         print(f"table_name [{table_name}]")
         print("column_name\ttype\tnull\tkey")
-        column_definitions = [column_def.split(":") for column_def in schema_str.split("|")[0].split(';')]
-        for column_unpacked in column_definitions:
-            column_name, column_type, is_nullable, key_type = column_unpacked
-            print(f"{column_name}\t{column_type}\t{is_nullable}\t{key_type}")
+        for column in schema.columns:
+            print(f"{column.name}\t{column.data_type}\t{column.nullable}\t{column.key}")
         print("-------------------------------------------------")
 
 
-    def select_query(self, items):
-        """ SELECT """
-    
+    def resolve_select_list(self, select_list, table_expression):
+        """
+        Resolves the tables of the FROM clause and the columns and aggregates of the select list of a SELECT.
+
+        Returns:
+        tuple: (table names of the FROM clause,
+                list of (column name in the plan, printed column name) for each element of the select list (empty for SELECT *),
+                list of resolved aggregates of the select list (see resolve_aggregate)).
+        A column is named 'table_name.column' both in the plan and when printed; an aggregate is named
+        by its label in the plan, and printed with its alias if it has one.
+
+        Raises:
+        CustomException: If a table does not exist or a column cannot be resolved.
+        """
         # Extract table names from FROM clause
-        from_table_names =[table_name.children[0].lower() for table_name in items[2].children[0].find_data("table_name")] 
+        from_table_names =[table_name.children[0].lower() for table_name in table_expression.children[0].find_data("table_name")] 
         
         for table_name in from_table_names:
             # Check if table exists before proceeding
             if not self.table_name_exists(table_name):
                 raise CustomException(Message.get_message(Message.SELECT_TABLE_EXISTENCE_ERROR, table_name))
         
-        # Get column details from SELECT clause
-        select_list = items[1]  # Assuming this holds the select list
-        select_list_columns = []  # Holds tuples of (column_name, table_name if specified)
-        select_list_tables = [] # Holds all table names appearing in select list (SELECT lectures.id, student.name -> ['lectures', 'student'])
-        for selected_column in select_list.find_data("selected_column"):
-            table_name = selected_column.children[0].children[0].value.lower() if isinstance(selected_column.children[0], Tree) else None
-            column_name = selected_column.children[1].children[0].value.lower()
-            select_list_columns.append((table_name, column_name))
-
-        # Map columns to tables and check for ambiguity
-        select_column_table_map = []
-        for specified_table, column in select_list_columns:
-            if specified_table:
-                # Check if table name exists
-                if not self.table_name_exists(specified_table):
-                    raise CustomException(Message.get_message(Message.SELECT_TABLE_EXISTENCE_ERROR, specified_table))
-                
-                # Direct mapping if table is specified
-                if not self.column_exists_in_table_name(column, specified_table):
-                    raise CustomException(Message.get_message(Message.SELECT_COLUMN_RESOLVE_ERROR, column))
-                
-                select_column_table_map.append((column, specified_table))
-                select_list_tables.append(specified_table)
-
+        # Map each element of the select list to its column (or aggregate) and check for ambiguity
+        selected_columns = []
+        aggregates = []
+        for select_element in select_list.children:
+            if select_element.data == "aggregate_column":
+                aggregate = self.resolve_aggregate(select_element.children[0], from_table_names)
+                alias = select_element.children[2]
+                aggregates.append(aggregate)
+                selected_columns.append((aggregate["label"], aggregate["label"] if alias is None else alias.children[0].value.lower()))
             else:
-                # Find all tables that contain the column if no table is specified
-                found_tables = [table for table in from_table_names if self.column_exists_in_table_name(column, table)]
-                if len(found_tables) > 1:
-                   raise CustomException(Message.get_message(Message.SELECT_COLUMN_RESOLVE_ERROR, column))
-                elif not found_tables:
-                    raise CustomException(Message.get_message(Message.SELECT_COLUMN_RESOLVE_ERROR, column))
-                select_column_table_map.append((column, found_tables[0]))
+                table_name = select_element.children[0].children[0].value.lower() if isinstance(select_element.children[0], Tree) else None
+                column_name = select_element.children[1].children[0].value.lower()
+                table_name = self.resolve_column_table(table_name, column_name, from_table_names)
+                selected_columns.append((f"{table_name}.{column_name}", f"{table_name}.{column_name}"))
+
+        return from_table_names, selected_columns, aggregates
+
+    def resolve_column_table(self, specified_table, column, from_table_names):
+        """
+        Resolves the table of a column referenced in a select list, an aggregate or a GROUP BY clause.
+
+        Parameters:
+        specified_table (str or None): The table name given before the column name, if any.
+        column (str): The column name.
+        from_table_names (list of str): Table names of the FROM clause.
+
+        Returns:
+        str: The name of the table containing the column.
+
+        Raises:
+        CustomException: If the table does not exist (or is not in the FROM clause), or the column cannot be resolved.
+        """
+        if specified_table:
+            # Check if table name exists
+            if not self.table_name_exists(specified_table):
+                raise CustomException(Message.get_message(Message.SELECT_TABLE_EXISTENCE_ERROR, specified_table))
             
-        # Perform cartesian product from table in FROM clause
-        initial_records, all_column_names = self.cartesian_product(from_table_names)
+            # Direct mapping if table is specified
+            if not self.column_exists_in_table_name(column, specified_table):
+                raise CustomException(Message.get_message(Message.SELECT_COLUMN_RESOLVE_ERROR, column))
+
+            # Raise error if table doesn't exist in FROM clause
+            if specified_table not in from_table_names:
+                raise CustomException(Message.get_message(Message.SELECT_TABLE_EXISTENCE_ERROR, specified_table))
+            return specified_table
+
+        # Find all tables that contain the column if no table is specified
+        found_tables = [table for table in from_table_names if self.column_exists_in_table_name(column, table)]
+        if len(found_tables) != 1:
+            raise CustomException(Message.get_message(Message.SELECT_COLUMN_RESOLVE_ERROR, column))
+        return found_tables[0]
+
+    def resolve_aggregate(self, aggregate_call, from_table_names):
+        """
+        Resolves an aggregate function call of a select list or HAVING clause.
 
-        if len(select_list_columns) == 0:
-            # Select list non provided (SELECT *)
-            column_names = all_column_names
-        else:
-            # Select list provided
-            column_names = [f"{table}.{column}" for column, table in select_column_table_map]
+        Parameters:
+        aggregate_call (Tree): The parsed aggregate_call node.
+        from_table_names (list of str): Table names of the FROM clause.
+
+        Returns:
+        dict: {"function": "count"/"sum"/"avg"/"min"/"max", "argument": 'table_name.column' or None for *,
+               "data_type": type of the result, "label": name of the result column (ex. 'count(*)', 'sum(lecture.credit)')}.
+
+        Raises:
+        CustomException: If the argument cannot be resolved, or SUM/AVG is applied to a non-integer column.
+        """
+        function = aggregate_call.children[0].children[0].value.lower()
+        argument_node = aggregate_call.children[2]
+
+        if len(argument_node.children) == 0:
+            # Aggregate of *: only COUNT(*) counts rows without reading a column
+            if function != "count":
+                raise CustomException(Message.get_message(Message.SELECT_AGGREGATE_TYPE_ERROR, function))
+            return {"function": function, "argument": None, "data_type": INT, "label": "count(*)"}
+
+        table_name = argument_node.children[0].children[0].value.lower() if isinstance(argument_node.children[0], Tree) else None
+        column_name = argument_node.children[1].children[0].value.lower()
+        table_name = self.resolve_column_table(table_name, column_name, from_table_names)
+        data_type = self.get_column_data_type(self.get_table_schema(table_name), column_name)
+
+        if function in ("sum", "avg") and data_type != INT:
+            raise CustomException(Message.get_message(Message.SELECT_AGGREGATE_TYPE_ERROR, function))
+        if function == "count":
+            data_type = INT
+        argument = f"{table_name}.{column_name}"
+        return {"function": function, "argument": argument, "data_type": data_type, "label": f"{function}({argument})"}
+
+    def resolve_grouping(self, table_expression, from_table_names, selected_columns, aggregates, sort_column_names=()):
+        """
+        Resolves the GROUP BY clause of a SELECT, and checks that every selected (or sorted) column is a group column.
+
+        Returns:
+        list of str or None: The 'table_name.column' names of the group columns (empty if the select list only has
+        aggregates), or None if the rows are not grouped (no GROUP BY, HAVING nor aggregates).
+
+        Raises:
+        CustomException: If a group column cannot be resolved, or a selected column is not a group column.
+        """
+        group_by_clause, having_clause = table_expression.children[2], table_expression.children[3]
+        if group_by_clause is None and having_clause is None and len(aggregates) == 0:
+            return None
+
+        group_column_names = []
+        if group_by_clause is not None:
+            for column_reference in [child for child in group_by_clause.children if isinstance(child, Tree)]:
+                table_name = column_reference.children[0].children[0].value.lower() if isinstance(column_reference.children[0], Tree) else None
+                column_name = column_reference.children[1].children[0].value.lower()
+                group_column_name = f"{self.resolve_column_table(table_name, column_name, from_table_names)}.{column_name}"
+                if group_column_name not in group_column_names:
+                    group_column_names.append(group_column_name)
+
+        # Every selected column (all columns for SELECT *) has a single value per group only if it is a group column
+        aggregate_labels = [aggregate["label"] for aggregate in aggregates]
+        if len(selected_columns) == 0:
+            selected_columns = [(f"{table}.{column}", f"{table}.{column}") for table in from_table_names for column in self.get_table_column_names(table)]
+        for column_name, printed_name in selected_columns:
+            if column_name not in aggregate_labels and column_name not in group_column_names:
+                raise CustomException(Message.get_message(Message.SELECT_GROUP_BY_ERROR, printed_name))
+        for column_name in sort_column_names:
+            if column_name not in aggregate_labels and column_name not in group_column_names:
+                raise CustomException(Message.get_message(Message.SELECT_GROUP_BY_ERROR, column_name))
+
+        return group_column_names
+
+    def resolve_order_by(self, order_by_clause, from_table_names, selected_columns):
+        """
+        Resolves the sort keys of the ORDER BY clause of a SELECT.
 
-        # Raise error if table in select list doesn't exist in FROM clause
-        unexisting_tables = set(select_list_tables) - set(from_table_names)
-        if len(unexisting_tables) > 0:
-            raise CustomException(Message.get_message(Message.SELECT_TABLE_EXISTENCE_ERROR, list(unexisting_tables)[0]))
+        A sort key is a column, an aggregate, or the alias of an aggregate of the select list.
+
+        Returns:
+        tuple: (list of (column name in the plan, descending) for each sort key,
+                list of resolved aggregates used as sort keys (see resolve_aggregate)).
+
+        Raises:
+        CustomException: If a sort key cannot be resolved.
+        """
+        sort_keys = []
+        aggregates = []
+        if order_by_clause is None:
+            return sort_keys, aggregates
+
+        aliases = {printed_name: column_name for column_name, printed_name in selected_columns if column_name != printed_name}
+        for sort_key in [child for child in order_by_clause.children if isinstance(child, Tree)]:
+            sort_expression, direction = sort_key.children
+            descending = direction is not None and direction.type == "DESC"
+            if sort_expression.data == "aggregate_call":
+                aggregate = self.resolve_aggregate(sort_expression, from_table_names)
+                aggregates.append(aggregate)
+                sort_keys.append((aggregate["label"], descending))
+                continue
+
+            table_name = sort_expression.children[0].children[0].value.lower() if isinstance(sort_expression.children[0], Tree) else None
+            column_name = sort_expression.children[1].children[0].value.lower()
+            if table_name is None and column_name in aliases:
+                sort_keys.append((aliases[column_name], descending)) # Alias of an aggregate
+            else:
+                sort_keys.append((f"{self.resolve_column_table(table_name, column_name, from_table_names)}.{column_name}", descending))
+        return sort_keys, aggregates
+
+    def select_query(self, items):
+        """ SELECT """
+        printed_names, plan = self.build_select_plan(items[0].children)
+        self.print_select_results(printed_names, plan)
+
+    def build_select_plan(self, statement_items):
+        """
+        Builds the operator tree of a SELECT statement (shared by SELECT and EXPLAIN SELECT).
+
+        Parameters:
+        statement_items (list): The children of the select_statement node.
+
+        Returns:
+        tuple: (printed column names, root Operator of the plan). No record is read until the plan is iterated.
+        """
+        distinct, select_list, table_expression, order_by_clause, limit_clause = statement_items[1:6]
+
+        # The select list, GROUP BY and ORDER BY clauses are resolved once per statement shape (until the catalog changes)
+        if "select_list" not in self.plan:
+            from_table_names, selected_columns, aggregates = self.resolve_select_list(select_list, table_expression)
+            sort_keys, sort_aggregates = self.resolve_order_by(order_by_clause, from_table_names, selected_columns)
+            aggregates = aggregates + sort_aggregates
+            group_column_names = self.resolve_grouping(table_expression, from_table_names, selected_columns, aggregates,
+                                                       [column_name for column_name, _ in sort_keys])
+            self.plan["order_by"] = sort_keys
+            self.plan["group_by"] = group_column_names
+            self.plan["select_list"] = (from_table_names, selected_columns, aggregates)
+        from_table_names, selected_columns, aggregates = self.plan["select_list"]
+        group_column_names = self.plan["group_by"]
+        sort_keys = self.plan["order_by"]
 
         # # Check if there's a WHERE clause
-        where_clause = items[2].children[1]
+        where_clause = table_expression.children[1]
         if where_clause is None:
-            # No WHERE clause provided, select all records
-            self.print_select_results(column_names, initial_records)
+            # No WHERE clause provided, select all records of the cartesian product
+            plan = self.join_tables(from_table_names, [], {})
         else:
             conditions = self.extract_conditions(where_clause)
-            
-            for condition in [conditions[0], conditions[2]]:
-                if condition is not None:
-                    self.validate_condition(condition, from_table_names)
+            self.validate_conditions(conditions, from_table_names)
+
+            # Classify the conditions that must all hold (conjuncts)
+            table_filters = {} # Conjuncts referencing a single table, applied while scanning that table
+            join_predicates = [] # column = column conjuncts between two tables, used as hash join keys
+            remaining_conditions = [] # Other conjuncts, checked on joined rows
+            for conjunct in self.split_conjuncts(conditions):
+                conjunct_tables = self.get_condition_table_names(conjunct)
+                join_predicate = self.get_equi_join_predicate(conjunct)
+                if len(conjunct_tables) == 1:
+                    table_filters.setdefault(conjunct_tables.pop(), []).append(conjunct)
+                elif join_predicate is not None:
+                    join_predicates.append(join_predicate)
+                else:
+                    remaining_conditions.append(conjunct)
+
+            # Join tables in FROM clause (with filters pushed down to their scans, and the remaining conditions to the joins)
+            plan = self.join_tables(from_table_names, join_predicates, table_filters, remaining_conditions)
+
+        # Group the selected records, keeping one row of group values and aggregates per group
+        if group_column_names is not None:
+            if len(selected_columns) == 0:
+                selected_columns = [(column_name, column_name) for column_name in plan.column_names] # SELECT * (all group columns)
+            plan = self.aggregate_rows(plan, table_expression.children[3], from_table_names, group_column_names, aggregates)
+
+        # Number of rows to skip and to produce (LIMIT count OFFSET offset)
+        limit = None if limit_clause is None else self.extract_limit(limit_clause)
+
+        # Order the rows (before the projection, so that sort keys need not be selected)
+        if len(sort_keys) > 0:
+            if limit is not None and distinct is None:
+                plan = TopN(plan, sort_keys, *limit) # Keeps only the first rows instead of sorting all of them
+                limit = None
+            else:
+                plan = Sort(plan, sort_keys, self.sort_memory)
+
+        # Keep selected columns; rows stream from the table cursors to the output one at a time
+        if len(selected_columns) == 0:
+            # Select list non provided (SELECT *)
+            printed_names = plan.column_names
+        else:
+            plan = Project(plan, [column_name for column_name, _ in selected_columns])
+            printed_names = [printed_name for _, printed_name in selected_columns]
+        if distinct is not None:
+            plan = Distinct(plan)
+        if limit is not None:
+            plan = Limit(plan, *limit) # Stops reading the tables once the last row is printed
+        return printed_names, plan
+
+    def extract_limit(self, limit_clause):
+        """
+        Extracts the LIMIT clause of a SELECT.
+
+        Returns:
+        tuple: (count, offset) with offset 0 if not given.
+
+        Raises:
+        CustomException: If count or offset is negative.
+        """
+        count = int(limit_clause.children[1].value)
+        offset = 0 if limit_clause.children[3] is None else int(limit_clause.children[3].value)
+        if count < 0 or offset < 0:
+            raise CustomException(Message.get_message(Message.SELECT_LIMIT_ERROR))
+        return count, offset
+
+    def aggregate_rows(self, plan, having_clause, from_table_names, group_column_names, aggregates):
+        """
+        Adds a HashAggregate operator grouping the rows of plan, followed by a Filter for the HAVING clause.
+        Aggregates only appearing in the HAVING clause are computed as well (and dropped by the final projection).
+
+        Raises:
+        CustomException: If the HAVING clause is invalid, or references a column which is not a group column.
+        """
+        having_conditions = None
+        if having_clause is not None:
+            having_conditions = self.extract_boolean_expr(having_clause.children[1])
+            self.validate_conditions(having_conditions, from_table_names, allow_aggregates=True)
+
+            for predicate_condition in self.get_predicate_conditions(having_conditions):
+                for operand_key in ["left_operand", "right_operand"]:
+                    operand = predicate_condition["predicate"].get(operand_key)
+                    if operand is None:
+                        continue
+                    if operand["operand_type"] == "aggregate":
+                        aggregates = aggregates + [operand]
+                    elif operand["operand_type"] == "column_reference":
+                        if f"{operand['resolved_table_name']}.{operand['column_name']}" not in group_column_names:
+                            raise CustomException(Message.get_message(Message.SELECT_GROUP_BY_ERROR, operand["column_name"]))
+
+        # Each distinct aggregate is computed once
+        aggregate_columns = {}
+        for aggregate in aggregates:
+            aggregate_columns.setdefault(aggregate["label"], (aggregate["label"], aggregate["function"], aggregate["argument"]))
+        plan = HashAggregate(plan, group_column_names, list(aggregate_columns.values()))
+
+        if having_conditions is not None:
+            plan = self.filter_rows(plan, [having_conditions])
+        return plan
+
+    def split_conjuncts(self, condition):
+        """
+        Splits the condition tree of a WHERE clause into conjuncts (conditions that must all hold).
+
+        Parameters:
+        condition (dict): The condition tree extracted from the WHERE clause.
+
+        Returns:
+        list of dict: The operands of the top-level AND (nested ANDs are flattened).
+        Any other condition (predicate, OR, NOT) is kept as a single conjunct.
+        """
+        if condition["type"] == AND:
+            return [conjunct for operand in condition["operands"] for conjunct in self.split_conjuncts(operand)]
+        return [condition]
+
+    def get_condition_table_names(self, condition):
+        """ Returns the set of (resolved) table names referenced by the column references of a validated condition tree. """
+        table_names = set()
+        for predicate_condition in self.get_predicate_conditions(condition):
+            for operand_key in ["left_operand", "right_operand"]:
+                operand = predicate_condition["predicate"].get(operand_key)
+                if operand is not None and operand.get("operand_type") == "column_reference":
+                    table_names.add(operand["resolved_table_name"])
+        return table_names
+
+    def get_predicate_conditions(self, condition):
+        """ Returns the predicates (leaves) of a condition tree, from left to right. """
+        if condition["type"] in (AND, OR):
+            return [predicate for operand in condition["operands"] for predicate in self.get_predicate_conditions(operand)]
+        elif condition["type"] == NOT:
+            return self.get_predicate_conditions(condition["operand"])
+        return [condition]
+
+    def get_equi_join_predicate(self, condition):
+        """
+        Checks whether a conjunct is a column = column predicate between two different tables, usable as a join key.
+        Negated predicates are not join keys.
 
-            # Select records matching the conditions
-            selected_records = []
-            for record in initial_records:
-                if self.evaluate_conditions(record, conditions):
-                    selected_records.append(record)
+        Parameters:
+        condition (dict): A validated conjunct.
+
+        Returns:
+        tuple or None: ((table_name, column_name), (table_name, column_name)), or None if the conjunct is not an equi-join predicate.
+        """
+        if condition["type"] != "comparison_predicate" or condition["is_not"]:
+            return None
+        left_operand = condition["predicate"]["left_operand"]
+        right_operand = condition["predicate"]["right_operand"]
+        if condition["predicate"]["comp_op"] != EQUAL:
+            return None
+        if left_operand["operand_type"] != "column_reference" or right_operand["operand_type"] != "column_reference":
+            return None
+        if left_operand["resolved_table_name"] == right_operand["resolved_table_name"]:
+            return None
+        return ((left_operand["resolved_table_name"], left_operand["column_name"]), 
+                (right_operand["resolved_table_name"], right_operand["column_name"]))
+
+    def filter_rows(self, plan, conditions_list):
+        """ Adds a Filter operator keeping the rows of plan that satisfy all given conditions. """
+        if len(conditions_list) == 1:
+            condition = conditions_list[0]
+        else:
+            condition = {"type": AND, "operands": conditions_list}
+        filter_operator = Filter(plan, self.compile_condition(condition, plan.column_names), self.format_condition(condition))
+        if plan.estimated_rows is not None:
+            filter_operator.estimated_rows = plan.estimated_rows * self.estimate_selectivity(condition)
+        return filter_operator
+
+    def format_condition(self, condition):
+        """ Formats a validated condition tree as text for EXPLAIN (ex. "(a.id = 1 or a.id > 5) and not b.name is null"). """
+        if condition["type"] in (AND, OR):
+            operands = []
+            for operand in condition["operands"]:
+                text = self.format_condition(operand)
+                operands.append(f"({text})" if operand["type"] in (AND, OR) else text)
+            return f" {condition['type']} ".join(operands)
+        elif condition["type"] == NOT:
+            return f"not ({self.format_condition(condition['operand'])})"
+
+        predicate = condition["predicate"]
+        if condition["type"] == "comparison_predicate":
+            text = f"{self.format_operand(predicate['left_operand'])} {predicate['comp_op']} {self.format_operand(predicate['right_operand'])}"
+        else:
+            text = f"{self.format_operand(predicate['left_operand'])} {predicate['comp_op']}"
+        return f"not {text}" if condition["is_not"] else text
 
-            self.print_select_results(column_names, selected_records)
+    def format_operand(self, operand):
+        """ Formats an operand of a validated predicate: 'table_name.column', the literal as written or the aggregate label. """
+        if operand["operand_type"] == "column_reference":
+            return f"{operand['resolved_table_name']}.{operand['column_name']}"
+        elif operand["operand_type"] == "aggregate":
+            return operand["label"]
+        return operand["comparable_value"]
 
-    def cartesian_product(self, table_names):
+    def join_tables(self, table_names, join_predicates, table_filters, join_conditions=()):
         """
-        Generate the Cartesian product of multiple tables.
+        Builds the operator tree joining the records of multiple tables.
 
-        This function takes a list of table names and returns the Cartesian product of the records
-        in these tables. It combines each record from the first table with each record from the 
-        subsequent tables, creating a new set of combined records.
+        Tables are joined in the order of least estimated cost (see choose_join_order), one at a time
+        (left-deep tree). When equi-join predicates link the next table to the tables joined so far, a
+        HashJoin is used, with its hash table built on the input estimated to be smaller; otherwise, the
+        cartesian product with the next table is generated (NestedLoopJoin).
+        Single-table conditions are applied right after scanning their table, below the joins, and other
+        conditions right after the join of the last table they reference.
 
         Parameters:
-        table_names (list of str): A list of table names for which the Cartesian product is to be generated.
+        table_names (list of str): A list of table names to join.
+        join_predicates (list of tuple): Equi-join predicates ((table_name, column_name), (table_name, column_name)).
+        table_filters (dict): Conditions to apply while scanning each table (key: table_name, value: list of conditions).
+        join_conditions (list of dict): Other conditions, referencing several tables.
 
         Returns:
-        tuple:
-            - result (list of dict): A list of dictionaries where each dictionary represents a combined 
-            record from the Cartesian product of the input tables. The keys in the dictionary are 
-            formatted as 'table_name.column_name' to avoid any naming conflicts.
-            - column_names (list of str): A list of column names for the resulting records, each prefixed 
-            with the table name to maintain uniqueness (formatted as 'table_name.column').
+        Operator: The root of the join tree. Its rows hold the values of every column of the joined tables
+        in the order of the FROM clause, described by its column_names (formatted as 'table_name.column').
         """
+        scans = [self.scan_table(table, table_filters) for table in table_names]
+        join_order = self.choose_join_order(table_names, join_predicates, [scan.estimated_rows for scan in scans])
 
         # Start with the records from the first table
-        result = [{f"{table_names[0]}.{key}": value for key, value in record.items()} for record in self.db.retrieve_records(table_names[0])]
-        
-        # Collect column names from schema 
-        column_names = [f"{table_names[0]}.{column}" for column in self.get_table_column_names(table_names[0])]
-
-        # Loop through the other tables and form the product
-        for table in table_names[1:]:
-            new_result = []
-            additional_column_names = [f"{table}.{column}" for column in self.get_table_column_names(table)]
-            column_names.extend(additional_column_names)
-            for record1 in result:
-                for record2 in self.db.retrieve_records(table):
-                    prefixed_record2 = {f"{table}.{key}": value for key, value in record2.items()}
-                    new_result.append({**record1, **prefixed_record2})  # Merge dictionaries
-            result = new_result
-        
-        return result, column_names
+        plan = scans[join_order[0]]
+        joined_tables = [table_names[join_order[0]]]
+        pending_conditions = list(join_conditions)
+
+        # Loop through the other tables and join them
+        for position in join_order[1:]:
+            table, scan = table_names[position], scans[position]
+
+            # Join keys linking the joined tables (left) with the next table (right)
+            join_keys = []
+            selectivity = 1.0
+            for left_column, right_column in join_predicates:
+                if left_column[0] == table and right_column[0] in joined_tables:
+                    left_column, right_column = right_column, left_column
+                if left_column[0] in joined_tables and right_column[0] == table:
+                    join_keys.append((f"{left_column[0]}.{left_column[1]}", f"{right_column[0]}.{right_column[1]}"))
+                    selectivity *= self.estimate_join_selectivity(left_column, right_column)
+            estimated_rows = plan.estimated_rows * scan.estimated_rows * selectivity
+
+            if len(join_keys) > 0:
+                if plan.estimated_rows < scan.estimated_rows:
+                    # Build the hash table on the joined rows, and stream the records of the next table
+                    plan = HashJoin(scan, plan, [(right_key, left_key) for left_key, right_key in join_keys])
+                else:
+                    plan = HashJoin(plan, scan, join_keys)
+            elif plan.estimated_rows < scan.estimated_rows:
+                # Keep the joined rows in memory for the inner loop, and stream the records of the next table
+                plan = NestedLoopJoin(scan, plan)
+            else:
+                plan = NestedLoopJoin(plan, scan)
+            plan.estimated_rows = estimated_rows
+            joined_tables.append(table)
+
+            # Select joined records matching the conditions whose tables are all joined
+            ready_conditions = [condition for condition in pending_conditions if self.get_condition_table_names(condition) <= set(joined_tables)]
+            if len(ready_conditions) > 0:
+                plan = self.filter_rows(plan, ready_conditions)
+                pending_conditions = [condition for condition in pending_conditions if condition not in ready_conditions]
+
+        if len(pending_conditions) > 0:
+            plan = self.filter_rows(plan, pending_conditions) # Single table with conditions not referencing it
+
+        # Columns in the order of the FROM clause
+        column_names = [column_name for scan in scans for column_name in scan.column_names]
+        if plan.column_names != column_names:
+            plan = Project(plan, column_names)
+        return plan
+
+    def choose_join_order(self, table_names, join_predicates, table_rows):
+        """
+        Chooses the order in which to join tables, minimizing the estimated cost of the joins.
 
-    def print_select_results(self, column_names, records):
-        # Print header
-        print("+--------------------------------------+") 
-        column_name_formatted = "\t|".join([column for column in column_names if '#' not in column])
-        print("|" + column_name_formatted + "\t|")
-        print("+--------------------------------------+") 
+        The cost of joining a table is the work of the join algorithm (rows of both inputs for a hash join,
+        product of their rows plus the rows kept in memory for a cartesian product) plus the rows it produces. Up to MAX_DP_TABLES tables,
+        the best order is found by dynamic programming over the subsets of tables: the best plan of a subset
+        extends the best plan of the subset without one of its tables. Beyond, the cheapest table is joined next.
 
-        # Print each record
-        for record in records:
-            record_formatted = "\t|".join([record[column] for column in column_names if '#' not in record[column]]) 
-            print("|" + record_formatted + "\t|")
+        Parameters:
+        table_names (list of str): Tables of the FROM clause.
+        join_predicates (list of tuple): Equi-join predicates ((table_name, column_name), (table_name, column_name)).
+        table_rows (list of float): Estimated number of rows of each table after its filters.
 
-        # Print footer
-        print("+--------------------------------------+")
+        Returns:
+        list of int: The positions of the tables in table_names, in join order (FROM order on ties).
+        """
+        table_count = len(table_names)
+        if table_count == 1 or len(set(table_names)) < table_count:
+            return list(range(table_count)) # Duplicate table names cannot be told apart by join predicates
+
+        # Selectivity of the equi-join predicates between each pair of tables (key: pair of positions)
+        pair_selectivities = {}
+        for left_column, right_column in join_predicates:
+            pair = frozenset((table_names.index(left_column[0]), table_names.index(right_column[0])))
+            pair_selectivities[pair] = pair_selectivities.get(pair, 1.0) * self.estimate_join_selectivity(left_column, right_column)
+
+        def extend(joined, joined_rows, position):
+            """ Returns (cost of the join, rows produced) for joining the table at position to the joined tables. """
+            selectivity = 1.0
+            linked = False
+            for other in joined:
+                pair = frozenset((other, position))
+                if pair in pair_selectivities:
+                    selectivity *= pair_selectivities[pair]
+                    linked = True
+            rows = joined_rows * table_rows[position] * selectivity
+            if linked:
+                work = joined_rows + table_rows[position] # Hash table built on one input, probed by the other
+            else:
+                work = joined_rows * table_rows[position] + table_rows[position] # The inner input is kept in memory
+            return work + rows, rows
+
+        if table_count > MAX_DP_TABLES:
+            # Greedy: start with the smallest table, then join the table of least cost
+            order = [min(range(table_count), key=lambda position: table_rows[position])]
+            rows = table_rows[order[0]]
+            while len(order) < table_count:
+                candidates = [(extend(order, rows, position), position) for position in range(table_count) if position not in order]
+                (_, rows), position = min(candidates, key=lambda candidate: candidate[0][0])
+                order.append(position)
+            return order
+
+        # best[subset] = (cost, rows, order), subsets of positions being bit masks
+        best = {1 << position: (0.0, table_rows[position], [position]) for position in range(table_count)}
+        for subset in range(1, 1 << table_count):
+            if subset in best:
+                continue
+            for position in reversed(range(table_count)): # On ties, the last table of the FROM clause is joined last
+                rest = subset & ~(1 << position)
+                if rest == subset or rest not in best:
+                    continue
+                rest_cost, rest_rows, rest_order = best[rest]
+                join_cost, rows = extend(rest_order, rest_rows, position)
+                if subset not in best or rest_cost + join_cost < best[subset][0]:
+                    best[subset] = (rest_cost + join_cost, rows, rest_order + [position])
+        return best[(1 << table_count) - 1][2]
+
+    def estimate_join_selectivity(self, left_column, right_column):
+        """
+        Estimates the fraction of the pairs of records of two tables matching an equi-join predicate:
+        1 / the larger number of distinct values of the two columns (each value of the column with fewer
+        distinct values is assumed to match a value of the other column).
+        """
+        distinct_counts = []
+        for table_name, column_name in (left_column, right_column):
+            column_statistics = self.get_column_statistics(table_name, column_name)
+            if column_statistics is not None:
+                distinct_counts.append(column_statistics.distinct_count)
+            else:
+                distinct_counts.append(self.estimate_table_rows(table_name)) # Assume a key column
+        return 1.0 / max(1, *distinct_counts)
+
+    def scan_table(self, table_name, table_filters):
+        """
+        Returns a scan of the table, followed by a Filter if conditions were pushed down to the table.
+        The table is read through a secondary index when the conditions restrict an indexed column (IndexScan),
+        otherwise all its records are read (TableScan). The Filter still checks every condition.
+        """
+        plan = self.choose_index_scan(table_name, table_filters.get(table_name, []))
+        if plan is None:
+            plan = TableScan(self.db, table_name)
+            plan.estimated_rows = self.estimate_table_rows(table_name)
+            if table_name in table_filters:
+                plan = self.filter_rows(plan, table_filters[table_name])
+        elif table_name in table_filters:
+            # The estimate of an index scan already accounts for the conditions of the table
+            scan_rows = plan.estimated_rows
+            plan = self.filter_rows(plan, table_filters[table_name])
+            plan.estimated_rows = min(scan_rows, self.estimate_table_rows(table_name) * self.estimate_selectivity(
+                {"type": AND, "operands": table_filters[table_name]}))
+        return plan
+
+    def estimate_table_rows(self, table_name):
+        """ Returns the number of records of the table from its statistics (DEFAULT_TABLE_ROWS if unknown). """
+        row_count = self.db.get_row_count(table_name)
+        return row_count if row_count is not None else DEFAULT_TABLE_ROWS
+
+    def get_column_statistics(self, table_name, column_name):
+        """ Returns the statistics of a column collected by ANALYZE (ColumnStatistics), or None if there are none. """
+        statistics = self.db.catalog.get_statistics(table_name)
+        return statistics.get_column(column_name) if statistics is not None else None
+
+    def estimate_selectivity(self, condition):
+        """
+        Estimates the fraction of rows meeting a validated condition tree, from the statistics of its columns.
+        Predicates are assumed independent; columns without statistics use default selectivities.
+        """
+        condition_type = condition["type"]
+        if condition_type == AND:
+            selectivity = 1.0
+            for operand in condition["operands"]:
+                selectivity *= self.estimate_selectivity(operand)
+            return selectivity
+        if condition_type == OR:
+            selectivity = 0.0
+            for operand in condition["operands"]:
+                operand_selectivity = self.estimate_selectivity(operand)
+                selectivity = selectivity + operand_selectivity - selectivity * operand_selectivity
+            return selectivity
+        if condition_type == NOT:
+            return 1.0 - self.estimate_selectivity(condition["operand"])
+
+        selectivity = self.estimate_predicate_selectivity(condition)
+        return 1.0 - selectivity if condition["is_not"] else selectivity
+
+    def estimate_predicate_selectivity(self, condition):
+        """ Estimates the fraction of rows meeting a single comparison or null predicate (ignoring its NOT). """
+        left_operand = condition["predicate"]["left_operand"]
+        comp_op = condition["predicate"]["comp_op"]
+
+        if condition["type"] == "null_predicate":
+            column_statistics = self.get_column_statistics(left_operand["resolved_table_name"], left_operand["column_name"])
+            null_fraction = column_statistics.null_fraction if column_statistics is not None else DEFAULT_NULL_FRACTION
+            return null_fraction if comp_op == "is null" else 1.0 - null_fraction
+
+        right_operand = condition["predicate"]["right_operand"]
+        if left_operand["operand_type"] == "comparable_value" and right_operand["operand_type"] == "column_reference":
+            left_operand, right_operand = right_operand, left_operand
+            comp_op = FLIPPED_COMPARISON_OPERATORS.get(comp_op, comp_op)
+        if left_operand["operand_type"] != "column_reference" or right_operand["operand_type"] != "comparable_value":
+            # Two columns (or two values)
+            return DEFAULT_EQUALITY_SELECTIVITY if comp_op == EQUAL else DEFAULT_RANGE_SELECTIVITY
+
+        column_statistics = self.get_column_statistics(left_operand["resolved_table_name"], left_operand["column_name"])
+        if column_statistics is None or column_statistics.distinct_count == 0:
+            if comp_op in (EQUAL, NOT_EQUAL):
+                return DEFAULT_EQUALITY_SELECTIVITY if comp_op == EQUAL else 1.0 - DEFAULT_EQUALITY_SELECTIVITY
+            return DEFAULT_RANGE_SELECTIVITY
+
+        non_null_fraction = 1.0 - column_statistics.null_fraction
+        try:
+            value = self.convert_comparable_value(right_operand)
+            if comp_op in (EQUAL, NOT_EQUAL):
+                if value < column_statistics.min_value or value > column_statistics.max_value:
+                    equal_fraction = 0.0
+                else:
+                    equal_fraction = non_null_fraction / column_statistics.distinct_count
+                return equal_fraction if comp_op == EQUAL else non_null_fraction - equal_fraction
+            below_fraction = self.estimate_fraction_below(column_statistics.histogram, value)
+        except (CustomException, TypeError):
+            return DEFAULT_RANGE_SELECTIVITY # Value not comparable with the statistics (ex. invalid date)
+        if comp_op in (LESS_THAN, LESS_OR_EQUAL):
+            return non_null_fraction * below_fraction
+        return non_null_fraction * (1.0 - below_fraction)
+
+    def estimate_fraction_below(self, histogram, value):
+        """
+        Estimates the fraction of the non-NULL values of a column that are smaller than a value, from the bounds
+        of its equi-depth histogram (each bucket holds the same fraction of the values). Within a bucket,
+        int and date values are assumed evenly spread.
+        """
+        if len(histogram) < 2 or value <= histogram[0]:
+            return 0.0
+        if value > histogram[-1]:
+            return 1.0
+        bucket = bisect.bisect_left(histogram, value) - 1 # histogram[bucket] < value <= histogram[bucket + 1]
+        lower, upper = histogram[bucket], histogram[bucket + 1]
+        within_fraction = 0.5
+        if isinstance(value, (int, date)):
+            to_number = (lambda v: v.toordinal()) if isinstance(value, date) else (lambda v: v)
+            within_fraction = (to_number(value) - to_number(lower)) / (to_number(upper) - to_number(lower))
+        return (bucket + within_fraction) / (len(histogram) - 1)
+
+    def choose_index_scan(self, table_name, conditions):
+        """
+        Chooses the index of the table that restricts the records to read the most.
+
+        When every primary key column is compared for equality, the record is found with a single
+        primary key index lookup. Otherwise, the conditions of a secondary index are equalities on its
+        first columns, optionally followed by a range (lower and/or upper bound) on the next column.
+        An index is preferred over another for each equality column first, then for each bound.
+
+        Parameters:
+        table_name (str): The name of the table.
+        conditions (list of dict): Validated conjuncts holding for every selected record of the table.
+
+        Returns:
+        PrimaryKeyScan, IndexScan or None: The scan through the chosen index, or None if no index can be used.
+        """
+        index_predicates = self.get_index_predicates(table_name, conditions)
+        if len(index_predicates) == 0:
+            return None
+
+        pk_column_list = self.db.get_primary_key_columns(table_name)
+        pk_values = []
+        for pk_column in pk_column_list:
+            equal_values = [value for comp_op, value in index_predicates.get(pk_column, []) if comp_op == EQUAL]
+            if len(equal_values) == 0:
+                break
+            pk_values.append(equal_values[0]) # Other equalities are checked by the Filter
+        if len(pk_column_list) > 0 and len(pk_values) == len(pk_column_list):
+            return PrimaryKeyScan(self.db, table_name, pk_values)
+
+        best_scan = None
+        best_score = 0
+        for index in self.db.catalog.get_indexes(table_name):
+            prefix_values = []
+            lower = upper = None
+            for column_name in index.columns:
+                comparisons = index_predicates.get(column_name, [])
+                equal_values = [value for comp_op, value in comparisons if comp_op == EQUAL]
+                if len(equal_values) > 0:
+                    prefix_values.append(equal_values[0]) # Other equalities are checked by the Filter
+                    continue
+                for comp_op, value in comparisons:
+                    if comp_op in (GREATER_THAN, GREATER_OR_EQUAL) and lower is None:
+                        lower = (value, comp_op == GREATER_OR_EQUAL)
+                    elif comp_op in (LESS_THAN, LESS_OR_EQUAL) and upper is None:
+                        upper = (value, comp_op == LESS_OR_EQUAL)
+                break
 
+            score = 2 * len(prefix_values) + (lower is not None) + (upper is not None)
+            if score > best_score:
+                best_scan = IndexScan(self.db, table_name, index, prefix_values, lower, upper)
+                best_score = score
+        if best_scan is not None:
+            # Records visited in the index (upper bound: the records meeting all the conditions of the table)
+            best_scan.estimated_rows = self.estimate_table_rows(table_name) * self.estimate_selectivity({"type": AND, "operands": conditions})
+        return best_scan
+
+    def get_index_predicates(self, table_name, conditions):
+        """
+        Collects the comparisons between a column of the table and a value, which can be searched in an index.
+
+        Returns:
+        dict: key: column name, value: list of (comparison operator with the column on the left, typed value).
+        """
+        index_predicates = {}
+        for condition in conditions:
+            if condition["type"] != "comparison_predicate" or condition["is_not"]:
+                continue
+            left_operand = condition["predicate"]["left_operand"]
+            right_operand = condition["predicate"]["right_operand"]
+            comp_op = condition["predicate"]["comp_op"]
+            left_is_column = left_operand["operand_type"] == "column_reference"
+            right_is_column = right_operand["operand_type"] == "column_reference"
+
+            if left_is_column and not right_is_column:
+                column_operand, value_operand = left_operand, right_operand
+            elif right_is_column and not left_is_column:
+                column_operand, value_operand = right_operand, left_operand
+                comp_op = FLIPPED_COMPARISON_OPERATORS.get(comp_op)
+            else:
+                continue
+            if comp_op not in FLIPPED_COMPARISON_OPERATORS or column_operand["resolved_table_name"] != table_name:
+                continue # != can not be searched in an index
+
+            value = self.convert_comparable_value(value_operand)
+            if isinstance(value, int) and not INT_MIN <= value <= INT_MAX:
+                continue # No stored value is out of range: left to the Filter
+            index_predicates.setdefault(column_operand["column_name"], []).append((comp_op, value))
+        return index_predicates
+
+    def print_select_results(self, column_names, rows):
+        """ Writes the result rows with the selected output format (see ResultWriter), as they are produced. """
+        self.result_writer.write(column_names, rows)
 
     def show_tables_query(self, items): 
         """ SHOW TABLES """
         tables = self.db.get_tables()
         print("------------------------")
         for table in tables:
-            print(table)
+            row_count = self.db.get_row_count(table) # From the table statistics (no scan)
+            print(table if row_count is None else f"{table}\t{row_count} row(s)")
         print("------------------------")
     
-    def delete_query(self, items):
-        """ DELETE """
-        table_name = items[2].children[0].lower()
+    def resolve_delete(self, statement_items):
+        """
+        Resolves the table and the conditions of a DELETE statement (shared by DELETE and EXPLAIN DELETE).
+
+        Parameters:
+        statement_items (list): The children of the delete_statement node.
+
+        Returns:
+        tuple: (table name, validated condition tree of the WHERE clause or None if there is no WHERE clause).
+
+        Raises:
+        CustomException: If the table does not exist or the WHERE clause is invalid.
+        """
+        table_name = statement_items[2].children[0].lower()
 
         # Check existance of table before proceeding
         if not self.table_name_exists(table_name):
             raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
 
-        # Retrieve all records from the table
-        initial_records = [{f"{table_name}.{key}": value for key, value in record.items()} for record in self.db.retrieve_records(table_name)]
-        records_to_delete = []
-        deleted_count = 0
-
         # Check if there's a WHERE clause
-        where_clause = items[3]
+        where_clause = statement_items[3]
         if where_clause is None:
             # No WHERE clause provided, delete all records
-            records_to_delete = initial_records
-            deleted_count = len(initial_records)  # All records will be deleted
-        else:
-            # WHERE clause provided
-            # Extract conditions from WHERE clause
-            conditions = self.extract_conditions(where_clause)
-            
-            # Validate conditions
-            for condition in [conditions[0], conditions[2]]:
-                if condition is not None:
-                    self.validate_condition(condition, [table_name]) 
-
-            # Evaluate conditions and Delete records matching the conditions
-            for record in initial_records:
-                if self.evaluate_conditions(record, conditions):
-                    records_to_delete.append(record)
-                    deleted_count += 1
-
-        # Check if any record to delete is referenced as foreign key in another table
-        foreign_key_referencing_records = self.get_foreign_key_referencing_records(table_name, records_to_delete)
-        if len(foreign_key_referencing_records) > 0:
-            raise CustomException(Message.get_message(Message.DELETE_REFERENTIAL_INTEGRITY_PASSED, deleted_count))
+            return table_name, None
+        # WHERE clause provided: extract and validate its conditions
+        conditions = self.extract_conditions(where_clause)
+        self.validate_conditions(conditions, [table_name])
+        return table_name, conditions
 
-        # Proceed with deletion if all checks passed
-        for record in records_to_delete:
-            self.db.delete_record(table_name, record)
-        
+    def delete_query(self, items):
+        """ DELETE """
+        table_name, conditions = self.resolve_delete(items[0].children)
+        deleted_count = self.execute_delete(table_name, conditions)
         print(f"{PROMPT}{deleted_count} row(s) deleted") # DeleteResult(#count)
 
-    def extract_conditions(self, where_node):
+    def delete_truncates(self, table_name, conditions):
+        """
+        Returns whether a DELETE clears the table by truncating it, without reading its records
+        (shared by DELETE and EXPLAIN DELETE): there is no WHERE clause, no other table references the table
+        and the table can be truncated (see Database.can_truncate). Otherwise its records are deleted one by one.
         """
-        Extracts conditions from a WHERE clause.
+        return (conditions is None and len(self.db.catalog.get_referencing_foreign_keys(table_name)) == 0
+                and self.db.can_truncate(table_name))
 
-        This function processes the WHERE clause of a SQL query and extracts the conditions, 
-        which can be either a single condition or a combination of conditions connected by 
-        AND/OR operators.
+    def execute_delete(self, table_name, conditions):
+        """
+        Deletes the records of the table satisfying the conditions (shared by DELETE and EXPLAIN ANALYZE DELETE).
 
         Parameters:
-        where_node (Tree): The parsed WHERE clause node from the SQL query.
+        table_name (str): The name of the table.
+        conditions (dict or None): The validated condition tree of the WHERE clause (all records if None).
 
         Returns:
-        tuple: A tuple representing the conditions extracted from the WHERE clause. The structure 
-            of the tuple is (condition1, operator, condition2) where operator can be AND/OR/None.
-        """
-        bool_expr = where_node.children[1]
-        boolean_terms = list(bool_expr.find_data("boolean_term"))
-        boolean_terms_cnt = len(boolean_terms)
-        boolean_factors = []
-        condition_cnt = 0
-
-        if boolean_terms_cnt == 1:
-            # 1 condition / 2 conditions AND
-            for boolean_factor in bool_expr.find_data("boolean_factor"):
-                condition = self.extract_boolean_factor(boolean_factor)
-                boolean_factors.append(condition)
-                condition_cnt = condition_cnt + 1
-            
-            if condition_cnt == 1:
-                # 1 condition
-                conditions = (boolean_factors[0], None, None) 
-            else:
-                # 2 conditions AND
-                conditions = (boolean_factors[0], AND, boolean_factors[1])
+        int: The number of deleted records.
+
+        Raises:
+        CustomException: If a deleted record is referenced by a foreign key (the statement is then rolled back).
+        """
+        column_names = [f"{table_name}.{column_name}" for column_name in self.get_table_column_names(table_name)]
+
+        scan = None
+        if conditions is None:
+            predicate = None
         else:
-            # 2 conditions OR
-            for boolean_factor in bool_expr.find_data("boolean_factor"):
-                condition = self.extract_boolean_factor(boolean_factor)
-                boolean_factors.append(condition)
-                condition_cnt = condition_cnt + 1
-            
-            conditions = (boolean_factors[0], OR, boolean_factors[1])
+            # Compile the conditions once for all records
+            predicate = self.compile_condition(conditions, column_names)
+            scan = self.choose_index_scan(table_name, self.split_conjuncts(conditions))
+
+        # Key values of the deleted records that other tables may reference (only collected if the table is referenced)
+        referenced_values, collect_referenced_values = self.get_referenced_values_collector(table_name)
+
+        # Records are deleted as they are found; if any of them turns out to be referenced,
+        # the statement is rolled back and no record is deleted
+        if self.delete_truncates(table_name, conditions):
+            deleted_count = self.db.delete_all_table_records(table_name)
+        elif scan is not None:
+            # Records found through a secondary index are collected first, as deleting them changes the index being read
+            records_to_delete = [(key, values) for key, values in scan.records() if predicate(values)]
+            for key, values in records_to_delete:
+                collect_referenced_values(values)
+                self.db.delete_record(table_name, key, values)
+            deleted_count = len(records_to_delete)
+        else:
+            deleted_count = self.db.delete_records(table_name, predicate, collect_referenced_values if referenced_values else None)
+
+        # Check if any deleted record is referenced as foreign key in another table (once per distinct key value)
+        if self.referenced_values_exist(referenced_values):
+            raise CustomException(Message.get_message(Message.DELETE_REFERENTIAL_INTEGRITY_PASSED, deleted_count))
+        return deleted_count
+
+    def extract_conditions(self, where_node):
+        """
+        Extracts the conditions of a WHERE clause into a condition tree.
+
+        AND, OR, NOT and parenthesized expressions may be nested to any depth. Inner nodes of the tree are
+        {"type": AND/OR, "operands": [...]} and {"type": NOT, "operand": ...}; leaves are the comparison
+        and null predicates extracted by extract_boolean_factor.
 
-        return conditions
+        Parameters:
+        where_node (Tree): The parsed WHERE clause node from the SQL query.
 
-    def validate_condition(self, condition, table_names):
+        Returns:
+        dict: The root of the condition tree.
+        """
+        return self.extract_boolean_expr(where_node.children[1])
+
+    def extract_boolean_expr(self, boolean_expr_node):
+        """ Extracts the condition tree of a boolean_expr node (boolean terms connected by OR). """
+        boolean_terms = [self.extract_boolean_term(child) for child in boolean_expr_node.children if isinstance(child, Tree)]
+        if len(boolean_terms) == 1:
+            return boolean_terms[0]
+        return {"type": OR, "operands": boolean_terms}
+
+    def extract_boolean_term(self, boolean_term_node):
+        """ Extracts the condition tree of a boolean_term node (boolean factors connected by AND). """
+        boolean_factors = [self.extract_boolean_factor(child) for child in boolean_term_node.children if isinstance(child, Tree)]
+        if len(boolean_factors) == 1:
+            return boolean_factors[0]
+        return {"type": AND, "operands": boolean_factors}
+
+    def validate_conditions(self, condition, table_names, allow_aggregates=False):
+        """ Validates every predicate of a condition tree (see validate_condition). """
+        for predicate_condition in self.get_predicate_conditions(condition):
+            self.validate_condition(predicate_condition, table_names, allow_aggregates)
+
+    def validate_condition(self, condition, table_names, allow_aggregates=False):
         """
         Validates a condition in a WHERE clause.
 
@@ -677,6 +1400,7 @@ class MyTransformer(Transformer):
         Parameters:
         condition (dict): The condition to validate.
         table_names (list of str): List of table names referenced in the query.
+        allow_aggregates (bool): Whether aggregate operands are allowed (HAVING clause).
 
         Raises:
         CustomException: If there is an error with the table/column references or the comparison.
@@ -688,15 +1412,24 @@ class MyTransformer(Transformer):
             left_operand = condition["predicate"]["left_operand"]
             right_operand = condition["predicate"]["right_operand"]
             operands = [left_operand, right_operand]
-            operator = condition["predicate"]["comp_op"]
+            comp_op = condition["predicate"]["comp_op"]
 
-            column_reference_operands = [operand for operand in operands if len(operand) >= 2]
-            comparable_value_operands = [operand for operand in operands if operand not in column_reference_operands]
+            column_reference_operands = [operand for operand in operands if "column_name" in operand]
+            aggregate_operands = [operand for operand in operands if "aggregate" in operand]
+            comparable_value_operands = [operand for operand in operands if "comparable_value" in operand]
         else:
             # Null predicate
             left_operand = condition["predicate"]["left_operand"]
-            operator = condition["predicate"]["comp_op"]
+            comp_op = condition["predicate"]["comp_op"]
             column_reference_operands = [left_operand]
+            aggregate_operands = []
+
+        # Resolve aggregate function calls (HAVING clause only)
+        for aggregate_operand in aggregate_operands:
+            if not allow_aggregates:
+                raise CustomException(Message.get_message(Message.WHERE_AGGREGATE_ERROR))
+            aggregate_operand.update(self.resolve_aggregate(aggregate_operand["aggregate"], table_names))
+            aggregate_operand["operand_type"] = "aggregate"
 
         # Check whether referrenced table name appears in FROM clause
         for column_reference_operand in column_reference_operands:
@@ -711,13 +1444,14 @@ class MyTransformer(Transformer):
 
             # Validate column name exists in one of the tables.
             tables_containing_column = [table for table in table_names if self.column_exists_in_table_name(predicate_column_name, table)]
-            if len(tables_containing_column) == 0:
-                # No tables containing column_name
+            if len(tables_containing_column) == 0 or (predicate_table_name is not None and predicate_table_name not in tables_containing_column):
+                # No tables containing column_name (or the specified table does not contain it)
                 raise CustomException(Message.get_message(Message.WHERE_COLUMN_NOT_EXIST))
             elif len(tables_containing_column) == 1:
                 # Exactly one table containing column_name
                 table_schema = self.get_table_schema(tables_containing_column[0])
                 column_reference_operand["data_type"] = self.get_column_data_type(table_schema, predicate_column_name)
+                column_reference_operand["resolved_table_name"] = predicate_table_name or tables_containing_column[0]
             else:
                 # If more than one table contains the column name, predicate table_name must be given
                 if predicate_table_name is None:
@@ -726,6 +1460,7 @@ class MyTransformer(Transformer):
                     # Get column data type from the specified table_name
                     table_schema = self.get_table_schema(predicate_table_name)
                     column_reference_operand["data_type"] = self.get_column_data_type(table_schema, predicate_column_name)
+                    column_reference_operand["resolved_table_name"] = predicate_table_name
 
         # Perform operands validation for comparison_predicate conditions
         if predicate_condition_type == "comparison_predicate":
@@ -737,7 +1472,7 @@ class MyTransformer(Transformer):
             # Validate operation data types
             if not self.data_type_matches(left_operand["data_type"], right_operand["data_type"]):
                 raise CustomException(Message.get_message(Message.WHERE_INCOMPARABLE_ERROR))
-            elif not self.valid_operator(operator, left_operand["data_type"]):
+            elif not self.valid_operator(comp_op, left_operand["data_type"]):
                 raise CustomException(Message.get_message(Message.WHERE_INCOMPARABLE_ERROR))
 
     def data_type_matches(self, left_operand_data_type, right_operand_data_type):
@@ -755,8 +1490,8 @@ class MyTransformer(Transformer):
         """
         Extracts a boolean factor from a parsed WHERE clause node.
 
-        This function processes a boolean factor node and extracts the condition, 
-        which can be either a comparison or null predicate.
+        This function processes a boolean factor node and extracts the condition,
+        which can be either a comparison or null predicate, or a parenthesized boolean expression.
 
         Parameters:
         boolean_factor_node (Tree): The parsed boolean factor node from the WHERE clause.
@@ -766,9 +1501,18 @@ class MyTransformer(Transformer):
         """
         condition = dict()
 
-        condition["is_not"] = False if boolean_factor_node.children[0] is None else True
-        
-        predicate = boolean_factor_node.children[1].children[0].children[0] 
+        is_not = False if boolean_factor_node.children[0] is None else True
+        boolean_test = boolean_factor_node.children[1].children[0]
+
+        if boolean_test.data == "parenthesized_boolean_expr":
+            # ( boolean_expr ): extract the nested condition tree
+            boolean_expr_node = next(child for child in boolean_test.children if isinstance(child, Tree))
+            nested_condition = self.extract_boolean_expr(boolean_expr_node)
+            return {"type": NOT, "operand": nested_condition} if is_not else nested_condition
+
+        condition["is_not"] = is_not
+
+        predicate = boolean_test.children[0]
 
         condition["predicate"] = dict()
         if predicate.data == "comparison_predicate":
@@ -793,7 +1537,7 @@ class MyTransformer(Transformer):
         Extracts an operand from a parsed comparison predicate node.
 
         This function processes a comparison operand node and extracts the operand, 
-        which can be either a column reference or a comparable value.
+        which can be either a column reference, a comparable value or an aggregate function call.
 
         Parameters:
         comp_operand_node (Tree): The parsed comparison operand node.
@@ -802,7 +1546,10 @@ class MyTransformer(Transformer):
         dict: A dictionary representing the extracted operand.
         """
         comp_operand = dict()
-        if len(comp_operand_node.children) == 2:
+        if isinstance(comp_operand_node.children[0], Tree) and comp_operand_node.children[0].data == "aggregate_call":
+            # Case 3: aggregate_call (resolved by validate_condition)
+            comp_operand["aggregate"] = comp_operand_node.children[0]
+        elif len(comp_operand_node.children) == 2:
             # Case 1: [table_name "."] column_name
             comp_operand["table_name"] = comp_operand_node.children[0].children[0].value.lower() if isinstance(comp_operand_node.children[0], Tree) else None
             comp_operand["column_name"] = comp_operand_node.children[1].children[0].value.lower()
@@ -823,270 +1570,297 @@ class MyTransformer(Transformer):
                     (comparable_value.startswith('"') and comparable_value.endswith('"')) ):
                 return CHAR
 
-    def evaluate_conditions(self, record, condition):
+    def compile_condition(self, condition, column_names):
         """
-        Evaluates conditions against a record.
+        Compiles a validated condition tree into a predicate function over rows.
 
-        This function checks if a record meets the conditions specified in the WHERE clause.
+        Column references are resolved to row positions and literals are converted to typed values once,
+        so evaluating a row only compares values. AND/OR stop at the first operand deciding the result.
 
         Parameters:
-        record (dict): The record to evaluate.
-        condition (tuple): The conditions extracted from the WHERE clause.
+        condition (dict): The validated condition tree.
+        column_names (list of str): The 'table_name.column' names describing the rows to evaluate.
 
         Returns:
-        bool: True if the record meets all the conditions, False otherwise.
-        """
-        results = []  
-        # for condition in conditions:
-        if condition[1] is None:
-            # Single condition evaluation
-            results.append(self.evaluate_single_condition(record, condition[0]))
-        elif condition[1].lower() in [AND, OR]:
-            # Evaluate the two conditions
-            cond1_result = self.evaluate_single_condition(record, condition[0])
-            cond2_result = self.evaluate_single_condition(record, condition[2])
-            if condition[1].lower() == AND:
-                results.append(cond1_result and cond2_result)
-            elif condition[1].lower() == OR:
-                results.append(cond1_result or cond2_result)
-        return all(results)
-    
-    def evaluate_single_condition(self, record, condition):
+        function: Takes a row (tuple of values) and returns True if the row meets the condition, False otherwise.
         """
-        Evaluates a single condition against a record.
-
-        This function checks if a record meets a single condition from the WHERE clause.
-
-        Parameters:
-        record (dict): The record to evaluate.
-        condition (dict): The single condition to evaluate.
-
-        Returns:
-        bool: True if the record meets the condition, False otherwise.
-        """    
-        # Extract column, operator and value from WHERE condition
-        condition_negation = condition["is_not"]
         condition_type = condition["type"]
 
-        left_operand_value = ""
-        right_operand_value = ""
-
-        if condition_type == "comparison_predicate":
-            # Comparison predicate
-            left_operand_value = self.extract_record_value(record, condition["predicate"]["left_operand"])
-            right_operand_value = self.extract_record_value(record, condition["predicate"]["right_operand"])
-            
-            operator = condition["predicate"]["comp_op"]
-        else:
-            # Null predicate
-            left_operand_value = self.extract_record_value(record, condition["predicate"]["left_operand"])
-            
-            operator = condition["predicate"]["comp_op"]
-
-        # Evaluate comparison based on the operator
-        if condition_type == "comparison_predicate":
-            if NULL in [left_operand_value, right_operand_value]:
-                # Any comparison with NULL is UNKNOWN, thus returns False
-                result = False
-            elif operator == '=':
-                result = left_operand_value == right_operand_value
-            elif operator == '!=':
-                result = left_operand_value != right_operand_value
-            elif operator == '>':
-                result = left_operand_value > right_operand_value
-            elif operator == '<':
-                result = left_operand_value < right_operand_value
-            elif operator == '>=':
-                result = left_operand_value >= right_operand_value
-            elif operator == '<=':
-                result = left_operand_value <= right_operand_value
+        if condition_type == AND or condition_type == OR:
+            operand_predicates = [self.compile_condition(operand, column_names) for operand in condition["operands"]]
+            if len(operand_predicates) == 2:
+                first_predicate, second_predicate = operand_predicates
+                if condition_type == AND:
+                    return lambda row: first_predicate(row) and second_predicate(row)
+                return lambda row: first_predicate(row) or second_predicate(row)
+            if condition_type == AND:
+                return lambda row: all(predicate(row) for predicate in operand_predicates)
+            return lambda row: any(predicate(row) for predicate in operand_predicates)
+
+        if condition_type == NOT:
+            operand_predicate = self.compile_condition(condition["operand"], column_names)
+            return lambda row: not operand_predicate(row)
+
+        predicate = self.compile_predicate(condition, column_names)
+        if condition["is_not"]:
+            return lambda row: not predicate(row)
+        return predicate
+
+    def compile_predicate(self, condition, column_names):
+        """
+        Compiles a single comparison or null predicate (ignoring its NOT) into a predicate function over rows.
+        Any comparison with NULL is UNKNOWN, thus returns False.
+        """
+        left_operand = condition["predicate"]["left_operand"]
+        comp_op = condition["predicate"]["comp_op"]
+
+        if condition["type"] == "null_predicate":
+            position = self.get_operand_position(left_operand, column_names)
+            if comp_op == "is null":
+                return lambda row: row[position] is None
+            return lambda row: row[position] is not None
+
+        right_operand = condition["predicate"]["right_operand"]
+        compare = COMPARISON_FUNCTIONS[comp_op]
+        left_is_column = left_operand["operand_type"] != "comparable_value" # Column reference or aggregate
+        right_is_column = right_operand["operand_type"] != "comparable_value"
+
+        if left_is_column and right_is_column:
+            left_position = self.get_operand_position(left_operand, column_names)
+            right_position = self.get_operand_position(right_operand, column_names)
+            def predicate(row):
+                left_value = row[left_position]
+                right_value = row[right_position]
+                return left_value is not None and right_value is not None and compare(left_value, right_value)
+        elif left_is_column:
+            left_position = self.get_operand_position(left_operand, column_names)
+            right_value = self.convert_comparable_value(right_operand)
+            def predicate(row):
+                left_value = row[left_position]
+                return left_value is not None and compare(left_value, right_value)
+        elif right_is_column:
+            left_value = self.convert_comparable_value(left_operand)
+            right_position = self.get_operand_position(right_operand, column_names)
+            def predicate(row):
+                right_value = row[right_position]
+                return right_value is not None and compare(left_value, right_value)
         else:
-            if operator == "is null":
-                result = left_operand_value == NULL
-            elif operator == "is not null":
-                result = left_operand_value != NULL
-        
-        if condition_negation:
-            return not result
-        return result
-
-    def extract_record_value(self, record, operand):
+            # Two comparable values: the result is the same for every row
+            result = compare(self.convert_comparable_value(left_operand), self.convert_comparable_value(right_operand))
+            def predicate(row):
+                return result
+        return predicate
+
+    def get_operand_position(self, operand, column_names):
+        """ Returns the position of a validated column reference (or aggregate) operand in rows described by column_names. """
+        if operand["operand_type"] == "aggregate":
+            return column_names.index(operand["label"])
+        return column_names.index(f"{operand['resolved_table_name']}.{operand['column_name']}")
+
+    def convert_comparable_value(self, operand):
         """
-        Extracts the value of an operand from a record.
-
-        This function retrieves the value of an operand, which can be either a column reference 
-        or a comparable value, from the given record.
-
-        Parameters:
-        record (dict): The record from which to extract the value.
-        operand (dict): The operand to extract.
+        Converts a validated comparable value operand into a typed value (int, date or str).
 
-        Returns:
-        any: The extracted value, with appropriate type conversion.
+        Raises:
+        CustomException: If a date value is not a valid calendar date (ex. 2024-13-01).
         """
-        # Handle cases where table name is provided and when it is not.
-        if operand["operand_type"] == "column_reference":
-            # Column reference value
-            table_name = operand["table_name"]
-            column_name = operand["column_name"]
-            if table_name:
-                # Table name is provided, use it directly.
-                column_key = f"{table_name}.{column_name}".lower()
-            else:
-                # Table name not provided, find any matching key.
-                column_key = next((key for key in record if key.endswith(f".{column_name}")), None) # Assumes that column name is unique when table name isn't specified.
+        value = operand["comparable_value"].strip('\'"').lower()
 
-            # Retrieve the record value using the constructed or found key.
-            record_value = record.get(column_key)
-        else:
-            # Comparable value
-            record_value = operand["comparable_value"].strip('\'"').lower()
-
-        # Type conversion (if null, return null)
         data_type = operand["data_type"]
-        if record_value == NULL:
-            pass
-        elif data_type == INT:
-            record_value = int(record_value)
+        if data_type == INT:
+            return int(value)
         elif data_type == DATE:
-            record_value = datetime.strptime(record_value, '%Y-%m-%d').date()
-
-        return record_value
+            try:
+                return datetime.strptime(value, '%Y-%m-%d').date()
+            except ValueError:
+                raise CustomException(Message.get_message(Message.WHERE_INCOMPARABLE_ERROR))
+        return value
 
-    def get_foreign_key_referencing_records(self, table_name, records):
+    def get_referenced_values_collector(self, table_name):
         """
-        Checks if the record is referenced by any foreign key in other tables.
+        Prepares the collection of the key values of records that foreign keys of other tables may reference.
 
-        This function checks if any of the records in the given table are referenced 
-        by foreign keys in other tables.
+        Parameters:
+        table_name (str): The name of the table whose records are deleted.
+
+        Returns:
+        tuple: (dict of collected values (key: (referencing table name, ForeignKey), value: set of tuple of referenced values),
+        function adding the referenced values of a record given its column values). The dict is empty if no table references the table.
+        """
+        schema = self.get_table_schema(table_name)
+        referenced_values = {}
+        referenced_positions = [] # (set of collected values, positions of the referenced columns)
+        for referencing_table, foreign_key in self.db.catalog.get_referencing_foreign_keys(table_name):
+            referenced_values[(referencing_table, foreign_key)] = set()
+            referenced_positions.append((referenced_values[(referencing_table, foreign_key)],
+                                         [schema.column_positions[column] for column in foreign_key.referenced_columns]))
+
+        def collect_referenced_values(values):
+            for values_set, positions in referenced_positions:
+                values_set.add(tuple(values[position] for position in positions)) # Ex. ("2020-12345",)
+        return referenced_values, collect_referenced_values
+
+    def referenced_values_exist(self, referenced_values):
+        """
+        Checks if any of the given key values is referenced by a foreign key in another table.
+        Each distinct value costs a single foreign key index probe.
 
         Parameters:
-        table_name (str): The name of the table containing the records to check.
-        records (list of dict): The records to check for foreign key references.
+        referenced_values (dict): key: (referencing table name, ForeignKey), value: set of tuple of referenced values.
 
         Returns:
-        list of dict: A list of records that reference the given records via foreign keys.
+        bool: True if a record of a referencing table holds one of the values.
         """
-        referencing_tables = self.find_referencing_tables(table_name)
-        foreign_key_referencing_records = []
-        for record in records:
-            record_to_check = {key.split('.')[-1]: value for key, value in record.items()}
-            for referencing_table in referencing_tables:
-                foreign_keys = self.get_foreign_keys(referencing_table)
-                for fk in foreign_keys:
-                    fk_column, referenced_table_name, referenced_column = fk.split(":")
-                    if referenced_table_name == table_name:
-                        query = {fk_column: record_to_check[referenced_column]}
-                        referencing_record = self.db.retrieve_specific_pk_record(referencing_table, query)
-                        foreign_key_referencing_records.extend(referencing_record)
-
-        return foreign_key_referencing_records
+        for (referencing_table, foreign_key), values_set in referenced_values.items():
+            for values in values_set:
+                if len(self.db.retrieve_referencing_record_keys(referencing_table, foreign_key.columns, values)) > 0:
+                    return True
+        return False
 
     def insert_query(self, items):
-        """ INSERT """
+        """ INSERT (one or more VALUES lists) """
         table_name = items[2].children[0].lower()
 
+        # Column names are resolved once per statement shape (until the catalog changes)
+        validator = self.plan.get("validator")
+        if validator is None:
+            # Check existance of table before proceeding
+            if not self.table_name_exists(table_name):
+                raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
+
+            schema = self.get_table_schema(table_name)
+            validator = RowValidator(schema, self.get_insert_column_names(table_name, items[3]))
+            self.plan["validator"] = validator
+
+        # Convert each VALUES list into a typed row (ungiven columns are null)
+        rows = (validator.convert_literals(self.extract_insert_literals(values_list)) for values_list in items[5:])
+
+        inserted_count = self.insert_rows(table_name, rows)
+        self.print_insert_result(inserted_count)
+
+    def load_query(self, items):
+        """ LOAD 'file' INTO table_name [(column, ...)] [DELIMITER 'c'] """
+        strings = [item for item in items if isinstance(item, Token) and item.type == "STR"]
+        file_name = strings[0][1:-1]
+        delimiter = strings[1][1:-1].encode().decode('unicode_escape') if len(strings) > 1 else "," # Ex. '\t' for tab separated files
+        table_name = next(item for item in items if isinstance(item, Tree) and item.data == "table_name").children[0].lower()
+        column_name_list = next((item for item in items if isinstance(item, Tree) and item.data == "column_name_list"), None)
+
         # Check existance of table before proceeding
         if not self.table_name_exists(table_name):
             raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
+        if len(delimiter) != 1:
+            raise CustomException(Message.get_message(Message.LOAD_DELIMITER_ERROR))
 
-        # Get data type constraints from table schema
-        schema_str = self.get_table_schema(table_name)
-        schema = schema_str.split("|")[0].split(';')
-        column_info = {col.split(":")[0]: [col.split(":")[1], col.split(":")[2]] for col in schema} # Creates dictionary with key: column, value: [data_type, nullable]
+        schema = self.get_table_schema(table_name)
+        validator = RowValidator(schema, self.get_insert_column_names(table_name, column_name_list))
 
-        # Extract column list if specified in query
-        column_names_query = []
-        if items[3] is not None:
-            column_name_iter = items[3].find_data("column_name")
-            column_names_query = [col.children[0].lower() for col in column_name_iter]
+        try:
+            with open(file_name, newline="") as file:
+                # Rows are read, converted and inserted one line at a time
+                rows = (validator.convert_fields(fields) for fields in csv.reader(file, delimiter=delimiter) if len(fields) > 0)
+                inserted_count = self.insert_rows(table_name, rows)
+        except OSError:
+            raise CustomException(Message.get_message(Message.LOAD_FILE_ERROR, file_name))
 
-            # Validate the column names
-            try:
-                self.validate_column_names(column_names_query, table_name)
-            except CustomException:
-                raise 
-
-            # Check if number of column names and number of values to be inserted match
-            if len(column_names_query) != len(set(column_names_query)):
-                raise CustomException(Message.get_message(Message.INSERT_TABLE_DUPLICATE_COLUMN_ERROR))
-
-            # Check if all Primary Keys are included in the column list
-            primary_keys_set = set(self.get_primary_keys(table_name))
-            unincluded_pks_set = primary_keys_set - set(column_names_query)
-            if len(unincluded_pks_set) > 0:
-                raise CustomException(Message.get_message(Message.INSERT_COLUMN_NON_NULLABLE_ERROR, list(unincluded_pks_set)[0]))
-        else:
+        self.print_insert_result(inserted_count)
+
+    def get_insert_column_names(self, table_name, column_name_list):
+        """
+        Returns the columns receiving the inserted values, in the order of the values.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - column_name_list (Tree or None): The column list of the query, or None to insert into all columns.
+
+        Raises:
+        - CustomException: If a column does not exist or is duplicated, or a primary key column is not given.
+        """
+        if column_name_list is None:
             # If column list isn't specified in query, extract from schema
-            column_names_query = [col.split(":")[0] for col in schema]
+            return self.get_table_column_names(table_name)
 
-        # Initialize values with null (fills in ungiven values with null)
-        row_values  = {col.split(":")[0]: "null" for col in schema}
-        
-        # Collect values
-        values_list_iter = items[5].find_data("value")
-        inserted_values_enum = enumerate(values_list_iter)
-        inserted_values_list = list(inserted_values_enum)
-
-        # Check whether number of columns and inserted values match before proceeding
-        if len(column_names_query) != len(list(inserted_values_list)):
-            raise CustomException(Message.get_message(Message.INSERT_TYPE_MISMATCH_ERROR))
-
-        for idx, value in inserted_values_list:
-            # Get corresponding column name and data type (needed for comparison)
-            column_name = column_names_query[idx]
-            column_data_type = column_info[column_name][0]
-            column_is_nullable = column_info[column_name][1]
-
-            # Check if the first child is a string and perform a case-insensitive match for "null"
-            if isinstance(value.children[0], str) and value.children[0].lower() == "null":
-                data_value = "null"
-                if column_is_nullable != "Y":
-                    raise CustomException(Message.get_message(Message.INSERT_COLUMN_NON_NULLABLE_ERROR, column_name))
-           
-            # Handle the case where the child is a Tree (ie. comparable value)
-            elif isinstance(value.children[0], Tree):
-                data_value = value.children[0].children[0].lower()
-
-                # Validate data type between column an value to be inserted
-                if column_data_type == "int":
-                    try:
-                        value_int_convert = int(data_value)
-                    except ValueError:
-                        raise CustomException(Message.get_message(Message.INSERT_TYPE_MISMATCH_ERROR))
-
-                elif column_data_type == "date":
-                    if not re.match(r'^\d{4}-\d{2}-\d{2}$', data_value):
-                        raise CustomException(Message.get_message(Message.INSERT_TYPE_MISMATCH_ERROR))
-
-                elif column_data_type.startswith('char'):
-                    # Extract max length from the data type definition such as 'char(10)'
-                    match = re.match(r'char\((\d+)\)', column_data_type)
-                    max_length = int(match.group(1))
-
-                    # If inserted value is string, truncate to max length
-                    if (data_value.startswith("'") and data_value.endswith("'")) or \
-                        (data_value.startswith('"') and data_value.endswith('"')):
-                        data_value = data_value.strip('\'"')[:max_length] 
-                    else:
-                        raise CustomException(Message.get_message(Message.INSERT_TYPE_MISMATCH_ERROR))
-
-            # Store inserted value for corresponding column name
-            row_values[column_name] = data_value
-        
-        # Check for Primary Key Duplication (Optional)
-        pk_column_list = self.get_primary_keys(table_name)
-        if len(pk_column_list) > 0: # Skip if table doesn't have a Primary Key
-            insert_pk_value_dict = {pk_column_name: row_values[pk_column_name] for pk_column_name in pk_column_list}
-            if self.pk_value_exists(table_name, insert_pk_value_dict):
-                raise CustomException(Message.get_message(Message.INSERT_DUPLICATE_PRIMARY_KEY_ERROR))
-
-        # Verify foreign key constraints (Optional)
-        self.verify_foreign_keys(table_name, row_values)
-
-        # # Insert the row into the database
-        self.db.insert_row(table_name, row_values)
-        print(f"{PROMPT}1 row inserted") # InsertResult
+        column_names_query = [col.children[0].lower() for col in column_name_list.find_data("column_name")]
+
+        # Validate the column names
+        self.validate_column_names(column_names_query, table_name)
+
+        # Check if number of column names and number of values to be inserted match
+        if len(column_names_query) != len(set(column_names_query)):
+            raise CustomException(Message.get_message(Message.INSERT_TABLE_DUPLICATE_COLUMN_ERROR))
+
+        # Check if all Primary Keys are included in the column list
+        primary_keys_set = set(self.get_primary_keys(table_name))
+        unincluded_pks_set = primary_keys_set - set(column_names_query)
+        if len(unincluded_pks_set) > 0:
+            raise CustomException(Message.get_message(Message.INSERT_COLUMN_NON_NULLABLE_ERROR, list(unincluded_pks_set)[0]))
+
+        return column_names_query
+
+    def extract_insert_literals(self, values_list):
+        """ Returns the lowercased literals of a VALUES list (None for NULL). """
+        return [self.extract_value_literal(value) for value in values_list.children if isinstance(value, Tree)] # Skip parenthesis
+
+    def extract_value_literal(self, value):
+        """ Returns the lowercased literal of a value node (None for NULL). """
+        if isinstance(value.children[0], Tree):
+            return value.children[0].children[0].lower() # comparable_value
+        return None # NULL
+
+    def insert_rows(self, table_name, rows):
+        """
+        Checks the constraints of rows and inserts them, in a single pass over the rows.
+
+        Each row is inserted as soon as it is checked, within the transaction of the statement, so
+        a primary key duplicated inside the batch is found by the same index lookup as a key already stored.
+        Foreign key values are looked up once per distinct value in the referenced table.
+        If any row fails, the statement is rolled back and no row is inserted.
+
+        Parameters:
+        - table_name (str): The name of the table.
+        - rows (iterable of list): Typed rows in the order of the table definition.
+
+        Returns:
+        - int: The number of inserted rows.
+
+        Raises:
+        - CustomException: On primary key duplication or referential integrity violation.
+        """
+        schema = self.get_table_schema(table_name)
+        pk_column_list = schema.primary_keys
+        pk_positions = [schema.column_positions[pk_column] for pk_column in pk_column_list]
+
+        # (foreign key, positions of its columns, set of values known to exist in the referenced table)
+        foreign_key_checks = [(foreign_key, [schema.column_positions[fk_column] for fk_column in foreign_key.columns], set()) 
+                              for foreign_key in schema.foreign_keys]
+
+        inserted_count = 0
+        for row in rows:
+            # Check for Primary Key Duplication (stored rows and rows inserted by this statement)
+            if len(pk_positions) > 0:
+                insert_pk_value_dict = {pk_column: row[position] for pk_column, position in zip(pk_column_list, pk_positions)}
+                if self.pk_value_exists(table_name, insert_pk_value_dict):
+                    raise CustomException(Message.get_message(Message.INSERT_DUPLICATE_PRIMARY_KEY_ERROR))
+
+            # Verify foreign key constraints
+            for foreign_key, fk_positions, existing_values in foreign_key_checks:
+                fk_values = tuple(row[position] for position in fk_positions)
+                if fk_values not in existing_values:
+                    query_fk_values_dict = dict(zip(foreign_key.referenced_columns, fk_values))
+                    if not self.pk_value_exists(foreign_key.referenced_table, query_fk_values_dict):
+                        raise CustomException(Message.get_message(Message.INSERT_REFERENTIAL_INTEGRITY_ERROR))
+                    existing_values.add(fk_values)
+
+            # Insert the row into the database
+            self.db.insert_row(table_name, row)
+            inserted_count += 1
+        return inserted_count
+
+    def print_insert_result(self, inserted_count):
+        if inserted_count == 1:
+            print(PROMPT + Message.get_message(Message.INSERT_RESULT)) # InsertResult
+        else:
+            print(PROMPT + Message.get_message(Message.INSERT_ROWS_RESULT, count=inserted_count)) # InsertResult(#count)
     
     def pk_value_exists(self, table_name, query_pk_values_dict):
         """
@@ -1102,55 +1876,198 @@ class MyTransformer(Transformer):
         existing_value = self.db.retrieve_specific_pk_record(table_name, query_pk_values_dict)
         return len(existing_value) != 0
 
-    def verify_foreign_keys(self, table_name, row_values):
+    def update_query(self, items):
+        """ UPDATE table_name SET column = value, ... [WHERE ...] """
+        table_name = items[1].children[0].lower()
+
+        # Check existance of table before proceeding
+        if not self.table_name_exists(table_name):
+            raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
+        schema = self.get_table_schema(table_name)
+
+        # Convert the assigned values once for all records
+        set_clauses = [item for item in items if isinstance(item, Tree) and item.data == "set_clause"]
+        column_names = [set_clause.children[0].children[0].lower() for set_clause in set_clauses]
+        for column_name in column_names:
+            if not schema.has_column(column_name):
+                raise CustomException(Message.get_message(Message.UPDATE_COLUMN_EXISTENCE_ERROR, column_name))
+        if len(column_names) != len(set(column_names)):
+            raise CustomException(Message.get_message(Message.UPDATE_DUPLICATE_COLUMN_ERROR))
+        validator = RowValidator(schema, column_names, Message.UPDATE_TYPE_MISMATCH_ERROR, Message.UPDATE_COLUMN_NON_NULLABLE_ERROR)
+        set_values = validator.convert_literals([self.extract_value_literal(set_clause.children[2]) for set_clause in set_clauses])
+        assignments = [(position, set_values[position]) for position in validator.positions]
+
+        # Compile the WHERE clause once for all records
+        where_clause = items[-1]
+        predicate = None
+        if where_clause is not None:
+            conditions = self.extract_conditions(where_clause)
+            self.validate_conditions(conditions, [table_name])
+            predicate = self.compile_condition(conditions, [f"{table_name}.{column_name}" for column_name in schema.column_names])
+
+        # Constraints are checked while rewriting the records; referenced keys that changed are checked once at the end
+        check_row, referenced_values = self.get_update_constraint_check(table_name, set(validator.positions))
+        updated_count = self.db.update_records(table_name, assignments, predicate, check_row)
+
+        if self.referenced_values_exist(referenced_values):
+            raise CustomException(Message.get_message(Message.UPDATE_REFERENTIAL_INTEGRITY_ERROR))
+
+        print(f"{PROMPT}{Message.get_message(Message.UPDATE_RESULT, count=updated_count)}") # UpdateResult(#count)
+
+    def get_update_constraint_check(self, table_name, updated_positions):
         """
-        Verifies that foreign key values exist as primary keys in their respective referenced tables.
+        Builds the constraint check of the records rewritten by an UPDATE.
+
+        Only the constraints involving updated columns are checked:
+        - the new primary key must not be held by another record (records updated before by the same statement included);
+        - new foreign key values must exist in the referenced table (looked up once per distinct value);
+        - primary key values referenced by other tables must not change (the old values are collected
+          in the returned dict, to be looked up once per distinct value after all records are rewritten).
 
         Parameters:
-        - table_name (str): The name of the table.
-        - row_values (dict): The dictionary containing column names and their corresponding values.
+        - table_name (str): The name of the updated table.
+        - updated_positions (set of int): Positions of the updated columns.
 
-        Raises:
-        - CustomException: If a foreign key value does not exist as a primary key in the referenced table.
+        Returns:
+        - tuple: (check function taking the old and new values of a record,
+          dict of old referenced values (key: (referencing table name, ForeignKey), value: set of tuple))
         """
-        
-        # Return details about foreign keys and their referenced tables
-        foreign_keys_info_list = self.get_foreign_keys(table_name)  
+        schema = self.get_table_schema(table_name)
+        pk_column_list = schema.primary_keys
+        pk_positions = [schema.column_positions[pk_column] for pk_column in pk_column_list]
+        check_pk = not updated_positions.isdisjoint(pk_positions)
+
+        # (foreign key, positions of its columns, set of values known to exist in the referenced table)
+        foreign_key_checks = []
+        for foreign_key in schema.foreign_keys:
+            fk_positions = [schema.column_positions[fk_column] for fk_column in foreign_key.columns]
+            if not updated_positions.isdisjoint(fk_positions):
+                foreign_key_checks.append((foreign_key, fk_positions, set()))
+
+        # (set of old referenced values, positions of the referenced columns)
+        referenced_checks = []
+        referenced_values = {}
+        for referencing_table, foreign_key in self.db.catalog.get_referencing_foreign_keys(table_name):
+            referenced_positions = [schema.column_positions[column] for column in foreign_key.referenced_columns]
+            referenced_values[(referencing_table, foreign_key)] = set()
+            if not updated_positions.isdisjoint(referenced_positions):
+                referenced_checks.append((referenced_values[(referencing_table, foreign_key)], referenced_positions))
+
+        def check_row(old_values, new_values):
+            if check_pk:
+                new_pk_values = [new_values[position] for position in pk_positions]
+                if new_pk_values != [old_values[position] for position in pk_positions]:
+                    if self.pk_value_exists(table_name, dict(zip(pk_column_list, new_pk_values))):
+                        raise CustomException(Message.get_message(Message.UPDATE_DUPLICATE_PRIMARY_KEY_ERROR))
+
+            for foreign_key, fk_positions, existing_values in foreign_key_checks:
+                fk_values = tuple(new_values[position] for position in fk_positions)
+                if fk_values not in existing_values:
+                    if not self.pk_value_exists(foreign_key.referenced_table, dict(zip(foreign_key.referenced_columns, fk_values))):
+                        raise CustomException(Message.get_message(Message.UPDATE_REFERENTIAL_INTEGRITY_ERROR))
+                    existing_values.add(fk_values)
+
+            for values_set, referenced_positions in referenced_checks:
+                old_referenced_values = tuple(old_values[position] for position in referenced_positions)
+                if old_referenced_values != tuple(new_values[position] for position in referenced_positions):
+                    values_set.add(old_referenced_values)
+        return check_row, referenced_values
+
+    def begin_query(self, items):
+        """ BEGIN: following statements are committed together by COMMIT (or undone by ROLLBACK). """
+        if self.db.in_transaction():
+            raise CustomException(Message.get_message(Message.TRANSACTION_IN_PROGRESS_ERROR))
+        self.db.begin_transaction()
+        print(PROMPT + Message.get_message(Message.BEGIN_RESULT)) # BeginResult
+
+    def commit_query(self, items):
+        """ COMMIT """
+        if not self.db.in_transaction():
+            raise CustomException(Message.get_message(Message.NO_TRANSACTION_ERROR, "COMMIT"))
+        self.db.commit_transaction()
+        print(PROMPT + Message.get_message(Message.COMMIT_RESULT)) # CommitResult
+
+    def rollback_query(self, items):
+        """ ROLLBACK """
+        if not self.db.in_transaction():
+            raise CustomException(Message.get_message(Message.NO_TRANSACTION_ERROR, "ROLLBACK"))
+        self.db.rollback_transaction()
+        print(PROMPT + Message.get_message(Message.ROLLBACK_RESULT)) # RollbackResult
+
+    def create_index_query(self, items):
+        """ CREATE INDEX index_name ON table_name (column, ...) """
+        index_name = items[2].children[0].lower()
+        table_name = items[4].children[0].lower()
+        column_names = [col.children[0].lower() for col in items[5].find_data("column_name")]
 
-        if len(foreign_keys_info_list) == 0:
-            # Skip verification if table doesn't have any Foreign Keys
-            return 
-        
-        for foreign_key_info in foreign_keys_info_list:
-            fk_column_name, ref_table_name, ref_column_name = foreign_key_info.split(":") # foreign_key_info format: "id:lectures:id"
-            fk_value = row_values[fk_column_name]
-            query_fk_values_dict = {ref_column_name: fk_value}
-            if len(self.db.retrieve_specific_pk_record(ref_table_name, query_fk_values_dict)) == 0:
-                raise CustomException(Message.get_message(Message.INSERT_REFERENTIAL_INTEGRITY_ERROR))
+        if not self.table_name_exists(table_name):
+            raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
+        if self.db.catalog.get_index(index_name) is not None:
+            raise CustomException(Message.get_message(Message.INDEX_EXISTENCE_ERROR))
+        schema = self.get_table_schema(table_name)
+        for column_name in column_names:
+            if not schema.has_column(column_name):
+                raise CustomException(Message.get_message(Message.INDEX_COLUMN_EXISTENCE_ERROR, column_name))
+        if len(column_names) != len(set(column_names)):
+            raise CustomException(Message.get_message(Message.INDEX_DUPLICATE_COLUMN_ERROR))
 
-    def update_query(self, items):
-        print(PROMPT + "\'UPDATE\' requested")
+        # Store the index definition and build the index from the existing records
+        self.db.insert_index(Index(index_name, table_name, column_names))
+
+        print(f"{PROMPT}{Message.get_message(Message.CREATE_INDEX_SUCCESS, index_name)}") # CreateIndexSuccess(#indexName)
+
+    def drop_index_query(self, items):
+        """ DROP INDEX index_name """
+        index_name = items[2].children[0].lower()
+
+        index = self.db.catalog.get_index(index_name)
+        if index is None:
+            raise CustomException(Message.get_message(Message.NO_SUCH_INDEX))
+        self.db.drop_index(index)
+
+        print(f"{PROMPT}{Message.get_message(Message.DROP_INDEX_SUCCESS, index_name)}") # DropIndexSuccess(#indexName)
+
+    def analyze_query(self, items):
+        """ ANALYZE [table_name]: collects the statistics of the table (of every table if no table is given). """
+        if items[1] is None:
+            table_names = self.db.catalog.get_table_names()
+        else:
+            table_names = [items[1].children[0].lower()]
+            if not self.table_name_exists(table_names[0]):
+                raise CustomException(Message.get_message(Message.NO_SUCH_TABLE))
+
+        for table_name in table_names:
+            self.db.analyze_table(table_name)
+            print(f"{PROMPT}{Message.get_message(Message.ANALYZE_SUCCESS, table_name)}") # AnalyzeSuccess(#tableName)
     
     def EXIT(self, items):
         exit()
 
 # Open and read grammar from grammar.lark 
 with open('grammar.lark') as file:
-    sql_parser = Lark(file.read(), start="command", lexer="basic")
+    sql_parser = Lark(file.read(), start="command", parser="lalr", lexer="basic", cache=True)
+
+# Parsed statements, reused by statements differing only by their literal values
+statement_cache = StatementCache(sql_parser)
 
 # Function to parse each individual query
-def parse_query(query, db):
+def parse_query(query, db, transformer=None):
     try:
-        output = sql_parser.parse(query)
-        myTransformer = MyTransformer(db)
-        myTransformer.transform(output)
+        statement = statement_cache.get(query, db.catalog.version)
+        myTransformer = transformer if transformer is not None else MyTransformer(db)
+        myTransformer.plan = statement.plan
+        myTransformer.transform(statement.tree)
+        db.end_statement(True) # Commit the statement (outside BEGIN ... COMMIT)
         return True # Parsing was successful
     except exceptions.UnexpectedInput:
         print(PROMPT + "Syntax error") # Syntax Error
         return False # Parsing failed
     except exceptions.VisitError as e:
+        db.end_statement(False) # Roll back the changes of the failed statement
         if isinstance(e.orig_exc, CustomException):
             print(PROMPT + e.orig_exc.message) # Handle custom error
+        elif isinstance(e.orig_exc, DBError):
+            print(PROMPT + Message.get_message(Message.STORAGE_ERROR, e.orig_exc)) # Ex. deadlock or lock table full
         else:
             raise e           
 
@@ -1169,37 +2086,61 @@ def debug(input):
     print("QUERIES COUNT: " + str(queries_count))
     print("-------------------------------")   
 
-# Main Function
-def main():
-
-    # Create and open database
-    myDB = Database('myDB.db')
-
-    # Main loop for receiving user input           
+def run_interactive(db, transformer):
+    """ Main loop for receiving user input: statements are read from the prompt until 'exit;'. """
+    splitter = StatementSplitter()
     while True:
         # Receive initial input from user (either query sequence or first line of multiline query input)
-        user_input = input(PROMPT) # "DB_2020-16634> "
-
-        # Receive multiline input from user if initial input doesn't contain ";"
-        multiline_user_input = [user_input]
-        while not user_input.__contains__(";"):
-            line = input()
-            multiline_user_input.append(line)
-            if line.__contains__(";"):
-                break
-        user_input = "\n".join(multiline_user_input) # Combine all input lines into a single string
-        
-        # Separate input string into list of queries based on ";" separator
-        queries = user_input.split(";")
+        queries = splitter.feed(input(PROMPT) + "\n") # "DB_2020-16634> "
+
+        # Receive multiline input from user until a statement is ended by ";" (outside string literals)
+        while len(queries) == 0:
+            queries = splitter.feed(input() + "\n")
+        splitter.clear() # Text after the last ";" is ignored
 
         # Iterate through each individual query and process it through the lark parser
-        for q in queries[:-1]:
-            success = parse_query(q + ";", myDB)  # Add ";" back for parsing, deleted from split function, pass database with query to parse
+        for q in queries:
+            success = parse_query(q, db, transformer)
             if not success:
                 break # Stop processing queries after a syntax error
 
-    # Close database
-    myDB.close()
+def run_script(file, db, transformer):
+    """
+    Executes the statements of a SQL script (ex. a dump) one at a time as they are read, without prompting.
+    A failing statement is reported and the script continues with the next statement.
+    """
+    for statement in split_statements(file):
+        parse_query(statement, db, transformer)
+
+# Main Function
+def main():
+    # Command line options
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--durability", choices=list(DURABILITY_FLAGS), default="sync",
+                            help="flushing of committed transactions to disk (default: sync)")
+    arg_parser.add_argument("-f", "--file", type=argparse.FileType("r"),
+                            help="execute the statements of a SQL script without prompting (also done when stdin is not a terminal)")
+    arg_parser.add_argument("--output", choices=list(RESULT_WRITERS), default="table",
+                            help="format of SELECT results (default: table)")
+    arg_parser.add_argument("--sort-memory", type=int, default=DEFAULT_SORT_MEMORY // (1024 * 1024), metavar="MB",
+                            help="memory used by ORDER BY before spilling sorted runs to disk (default: %(default)s MB)")
+    args = arg_parser.parse_args()
+
+    # Create and open database
+    myDB = Database('myDB.db', durability=args.durability)
+    transformer = MyTransformer(myDB, result_writer=RESULT_WRITERS[args.output](sys.stdout), 
+                                sort_memory=args.sort_memory * 1024 * 1024) # Shared by all statements
+
+    try:
+        if args.file is not None:
+            run_script(args.file, myDB, transformer)
+        elif not sys.stdin.isatty():
+            run_script(sys.stdin, myDB, transformer) # Piped input (ex. python run.py < dump.sql)
+        else:
+            run_interactive(myDB, transformer)
+    finally:
+        # Close database (flushes cached pages of the environment, also on 'exit;')
+        myDB.close()
 
 if __name__ == "__main__":
 	main()
\ No newline at end of file
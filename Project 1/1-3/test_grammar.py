@@ -0,0 +1,79 @@
+import unittest
+from lark import Lark
+
+with open("grammar.lark") as file:
+    sql_parser = Lark(file.read(), start="command", parser="lalr", lexer="basic")
+
+def parse(query):
+    return sql_parser.parse(query)
+
+def find_values(tree, rule):
+    """ Returns the names held by the nodes of the given rule (ex. "column_name"), in order. """
+    return [node.children[0].value for node in tree.iter_subtrees_topdown() if node.data == rule]
+
+class SoftKeywordTest(unittest.TestCase):
+    """ Names accepted by the first version of the grammar stay valid after keywords are added. """
+
+    def assert_names(self, names):
+        column_definitions = ", ".join(f"{name} int" for name in names)
+        tree = parse(f"create table {names[0]} ({column_definitions}, primary key ({names[0]}));")
+        self.assertEqual(find_values(tree, "table_name"), [names[0]])
+        self.assertEqual(find_values(tree, "column_name"), names + [names[0]])
+
+        tree = parse(f"select {', '.join(names)} from {names[0]} where {names[0]}.{names[-1]} = 1;")
+        self.assertEqual(find_values(tree, "column_name"), names + [names[-1]])
+        parse(f"insert into {names[0]} ({', '.join(names)}) values ({', '.join('1' for _ in names)});")
+        parse(f"delete from {names[0]} where {names[-1]} is not null;")
+        parse(f"update {names[0]} set {names[-1]} = 2 where {names[0]} = 1;")
+        parse(f"drop table {names[0]};")
+
+    def test_index_keywords(self):
+        self.assert_names(["index", "on"])
+        tree = parse("create index index on on (index);")
+        self.assertEqual(find_values(tree, "index_name"), ["index"])
+        self.assertEqual(find_values(tree, "table_name"), ["on"])
+        parse("drop index on;")
+
+    def test_aggregate_keywords(self):
+        self.assert_names(["count", "sum", "avg", "min", "max"])
+        self.assert_names(["group", "by", "having", "distinct"])
+        tree = parse("select distinct distinct, count(count), max(max) as min from group "
+                     "group by distinct having sum(sum) > 1;")
+        self.assertEqual(find_values(tree, "column_name"), ["distinct", "count", "max", "min", "distinct", "sum"])
+        self.assertEqual(next(tree.find_data("select_statement")).children[1].type, "DISTINCT") # Keyword, then column
+        tree = parse("select count from count where count > 1;")
+        self.assertEqual(list(tree.find_data("aggregate_call")), [])
+
+    def test_order_keywords(self):
+        self.assert_names(["order", "asc"])
+        tree = parse("select order from asc order by order asc, asc.asc desc;")
+        self.assertEqual(find_values(tree, "column_name"), ["order", "order", "asc"])
+        self.assertEqual([sort_key.children[1].type for sort_key in tree.find_data("sort_key")], ["ASC", "DESC"])
+
+    def test_limit_keywords(self):
+        self.assert_names(["limit", "offset"])
+        tree = parse("select limit from offset where offset > 1 limit 2 offset 3;")
+        self.assertEqual(find_values(tree, "column_name"), ["limit", "offset"])
+        self.assertEqual(len(list(tree.find_data("limit_clause"))), 1)
+
+    def test_analyze_keyword(self):
+        self.assert_names(["analyze"])
+        tree = parse("analyze analyze;")
+        self.assertEqual(find_values(tree, "table_name"), ["analyze"])
+        tree = parse("explain analyze;")
+        self.assertEqual(find_values(tree, "table_name"), ["analyze"])
+        tree = parse("explain analyze select analyze from analyze;")
+        self.assertEqual(next(tree.find_data("explain_query")).children[1].type, "ANALYZE")
+
+    def test_transaction_keywords(self):
+        self.assert_names(["begin", "commit", "rollback", "transaction"])
+        parse("begin transaction;")
+        parse("commit;")
+
+    def test_load_keywords(self):
+        self.assert_names(["load", "delimiter"])
+        tree = parse("load 'rows.csv' into load (delimiter) delimiter ',';")
+        self.assertEqual(find_values(tree, "column_name"), ["delimiter"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+from Catalog import TableSchema
+from RowCodec import INT_MIN, INT_MAX
+
+PEOPLE_SCHEMA = "id:int:N:PRI;name:char(20):Y:;birth:date:Y:;score:int:Y:;nickname:char(5):Y:|PK:id|FK:"
+WIDE_SCHEMA = ";".join(f"c{position}:int:Y:" for position in range(10)) + "|PK:|FK:" # 10 columns: 2-byte null bitmap
+
+class RowCodecTest(unittest.TestCase):
+    """ Rows decode to the values they were encoded from. """
+
+    def setUp(self):
+        self.schema = TableSchema.parse("people", PEOPLE_SCHEMA)
+        self.codec = self.schema.row_codec
+
+    def assert_round_trip(self, codec, values):
+        data = codec.encode(values)
+        self.assertEqual(codec.decode(data), values)
+        return data
+
+    def test_values(self):
+        self.assert_round_trip(self.codec, [1, "kim", date(2000, 2, 29), -7, "k"])
+        self.assert_round_trip(self.codec, [2, "", date(1, 1, 1), 0, ""])
+        self.assert_round_trip(self.codec, [3, "x", date(9999, 12, 31), 1, "xyzzy"])
+
+    def test_int_bounds(self):
+        self.assert_round_trip(self.codec, [INT_MIN, "min", None, INT_MAX, None])
+        self.assert_round_trip(self.codec, [INT_MAX, "max", None, INT_MIN, None])
+
+    def test_multibyte_chars(self):
+        data = self.assert_round_trip(self.codec, [1, "김민수 é 😀", None, None, "ü"])
+        self.assertIn("김민수 é 😀".encode('utf-8'), data) # Length prefix counts bytes, not characters
+
+    def test_null_bitmap(self):
+        data = self.assert_round_trip(self.codec, [1, None, None, None, None])
+        self.assertEqual(data[1], 0b11110) # One bit per NULL column, no field stored for them
+        self.assertEqual(len(data), 1 + 1 + 8)
+        self.assert_round_trip(self.codec, [1, None, date(2024, 1, 1), None, "a"])
+
+        wide_codec = TableSchema.parse("wide", WIDE_SCHEMA).row_codec
+        for null_position in range(10):
+            values = [None if position == null_position else position for position in range(10)]
+            self.assert_round_trip(wide_codec, values)
+        self.assert_round_trip(wide_codec, [None] * 10)
+
+    def test_partial_decode(self):
+        values = [5, "lee", date(1999, 12, 31), None, "ab"]
+        data = self.codec.encode(values)
+        for positions in [{0}, {1}, {2}, {3}, {4}, {1, 4}, {0, 2, 4}, set()]:
+            decoded = self.codec.decode(data, positions)
+            self.assertEqual(decoded, [value if position in positions else None for position, value in enumerate(values)])
+
+class LegacyRowTest(unittest.TestCase):
+    """ JSON rows of storage version 1 are converted into typed values and re-encoded. """
+
+    def setUp(self):
+        self.schema = TableSchema.parse("people", PEOPLE_SCHEMA)
+
+    def test_convert_legacy_values(self):
+        record_data = {"id": "7", "name": "park", "birth": "2001-03-04", "score": "-12", "nickname": "null"}
+        self.assertEqual(self.schema.row_codec.convert_legacy_values(self.schema, record_data),
+                         [7, "park", date(2001, 3, 4), -12, None])
+
+    def test_convert_invalid_and_missing_values(self):
+        record_data = {"id": "8", "name": "null", "birth": "2024-13-01"} # Invalid date, columns missing
+        self.assertEqual(self.schema.row_codec.convert_legacy_values(self.schema, record_data),
+                         [8, None, None, None, None])
+
+    def test_migrate_storage(self):
+        from Database import Database, VERSION_KEY, encode_key_values
+
+        rows = [
+            {"id": "1", "name": "kim", "birth": "2000-01-02", "score": "90", "nickname": "null"},
+            {"id": "2", "name": "null", "birth": "null", "score": str(INT_MIN), "nickname": "é"},
+        ]
+        with tempfile.TemporaryDirectory() as home:
+            database = Database(os.path.join(home, "myDB.db"))
+            try:
+                database.insert_table("people", PEOPLE_SCHEMA)
+                for number, row in enumerate(rows):
+                    database.get_table_db("people").put(f"people#{number}".encode(), json.dumps(row).encode(), txn=database.txn)
+                # Primary key index of version 1 (keys built from string values)
+                database.get_pk_index_db("people").put(json.dumps(["1"]).encode(), b"people#0", txn=database.txn)
+                database.db.put(VERSION_KEY.encode(), b"1", txn=database.txn)
+                database.end_statement(True)
+
+                database.migrate_storage()
+                database.end_statement(True)
+
+                records = sorted(values for _, values in database.iterate_records("people"))
+                self.assertEqual(records, [[1, "kim", date(2000, 1, 2), 90, None], [2, None, None, INT_MIN, "é"]])
+                self.assertEqual(list(database.iterate_pk_record("people", [2])),
+                                 [(b"people#1", [2, None, None, INT_MIN, "é"])])
+                self.assertIsNone(database.get_pk_index_db("people").get(json.dumps(["1"]).encode(), txn=database.txn))
+                self.assertIsNotNone(database.get_pk_index_db("people").get(encode_key_values([1]), txn=database.txn))
+                self.assertEqual(database.get_row_count("people"), 2)
+            finally:
+                database.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+from unittest import mock
+import Executor
+from Executor import Operator, Sort
+
+class RowSource(Operator):
+    """ Produces the given rows (input of the tested operator). """
+    def __init__(self, column_names, rows):
+        super().__init__(column_names)
+        self.input_rows = rows
+
+    def rows(self):
+        yield from self.input_rows
+
+def expected_order(rows, sort_keys):
+    """ Sorts rows with sorted(), one stable pass per key from the last one (NULL greater than any value). """
+    expected = list(rows)
+    for position, descending in reversed(sort_keys):
+        expected = sorted(expected, key=lambda row: (row[position] is None, row[position]), reverse=descending)
+    return expected
+
+class SortTest(unittest.TestCase):
+    """ Sort produces the order of sorted(), whether the input is sorted in memory or merged from runs. """
+
+    def setUp(self):
+        generator = random.Random(2024)
+        def value(values):
+            return None if generator.random() < 0.1 else generator.choice(values)
+        # Many equal keys (with NULLs), so the order of equal rows is checked as well; row number last
+        self.rows = [(value(range(20)), value(["a", "b", "c", "김", ""]), number) for number in range(5000)]
+        self.source = RowSource(["t.a", "t.b", "t.n"], self.rows)
+
+    def assert_sorted(self, sort_keys, memory_budget=Executor.DEFAULT_SORT_MEMORY, runs=0):
+        positions = [(self.source.column_position(column_name), descending) for column_name, descending in sort_keys]
+        with mock.patch.object(Executor, "write_run", wraps=Executor.write_run) as write_run:
+            result = list(Sort(self.source, sort_keys, memory_budget))
+        self.assertEqual(result, expected_order(self.rows, positions))
+        self.assertGreaterEqual(write_run.call_count, runs)
+        return write_run.call_count
+
+    def test_in_memory(self):
+        self.assertEqual(self.assert_sorted([("t.a", False)]), 0)
+        self.assert_sorted([("t.a", True)])
+        self.assert_sorted([("t.b", False), ("t.a", True)])
+        self.assert_sorted([("t.b", True), ("t.a", True)])
+
+    def test_runs(self):
+        # The smallest run holds SPILL_CHUNK_ROWS rows: 5 runs
+        self.assertEqual(self.assert_sorted([("t.a", False)], memory_budget=1, runs=5), 5)
+        self.assert_sorted([("t.a", True)], memory_budget=1, runs=5)
+        self.assert_sorted([("t.b", False), ("t.a", True)], memory_budget=1, runs=5)
+        self.assert_sorted([("t.b", True), ("t.a", False)], memory_budget=1, runs=5)
+
+    def test_merge_passes(self):
+        # 500 runs of 10 rows merged 4 at a time: runs of merged runs are written before the final merge
+        with mock.patch.object(Executor, "SPILL_CHUNK_ROWS", 10), mock.patch.object(Executor, "MERGE_FAN_IN", 4):
+            self.assert_sorted([("t.a", False)], memory_budget=1, runs=500 + 4)
+            self.assert_sorted([("t.a", True)], memory_budget=1, runs=500 + 4)
+            self.assert_sorted([("t.b", False), ("t.a", True)], memory_budget=1, runs=500 + 4)
+            self.assert_sorted([("t.b", True), ("t.a", True)], memory_budget=1, runs=500 + 4)
+
+    def test_empty_input(self):
+        self.assertEqual(list(Sort(RowSource(["t.a"], []), [("t.a", False)], memory_budget=1)), [])
+
+if __name__ == "__main__":
+    unittest.main()